@@ -7,7 +7,7 @@ from alembic import context
 
 from app.core.config import settings
 from app.db.base import Base
-from app.db import models  
+from app import models  # noqa: F401 - registers all models on Base.metadata
 
 config = context.config
 
@@ -46,6 +46,8 @@ def run_migrations_online() -> None:
             connection=connection,
             target_metadata=target_metadata,
             compare_type=True,
+            # SQLite can't ALTER constraints or columns; batch mode rebuilds the table.
+            render_as_batch=connection.dialect.name == "sqlite",
         )
 
         with context.begin_transaction():
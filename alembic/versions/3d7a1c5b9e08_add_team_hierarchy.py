@@ -0,0 +1,42 @@
+# Migration adding teams.parent_id and the team_closure table, seeded with each team's self-row.
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '3d7a1c5b9e08'
+down_revision: Union[str, None] = 'e61f0b8c4d92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('teams') as batch_op:
+        batch_op.add_column(sa.Column('parent_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_teams_parent_id_teams', 'teams', ['parent_id'], ['id'], ondelete='SET NULL')
+        batch_op.create_index(batch_op.f('ix_teams_parent_id'), ['parent_id'], unique=False)
+
+    op.create_table('team_closure',
+        sa.Column('ancestor_id', sa.Integer(), nullable=False),
+        sa.Column('descendant_id', sa.Integer(), nullable=False),
+        sa.Column('depth', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['ancestor_id'], ['teams.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['descendant_id'], ['teams.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id')
+    )
+    op.create_index('ix_team_closure_descendant_id_depth', 'team_closure', ['descendant_id', 'depth'], unique=False)
+
+    # Existing teams are all roots.
+    op.execute("INSERT INTO team_closure (ancestor_id, descendant_id, depth) SELECT id, id, 0 FROM teams")
+
+
+def downgrade() -> None:
+    op.drop_index('ix_team_closure_descendant_id_depth', table_name='team_closure')
+    op.drop_table('team_closure')
+
+    with op.batch_alter_table('teams') as batch_op:
+        batch_op.drop_index(batch_op.f('ix_teams_parent_id'))
+        batch_op.drop_constraint('fk_teams_parent_id_teams', type_='foreignkey')
+        batch_op.drop_column('parent_id')
@@ -0,0 +1,34 @@
+# Migration preparing the move of team_memberships to hash partitions: shadow table, mirror trigger, backfill cursor.
+
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.db.membership_partitioning import drop_shadow_ddl, shadow_ddl
+
+
+revision: str = '4b7f2c9d1e86'
+down_revision: Union[str, None] = 'd5b8e3f1a7c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        # No partitioning elsewhere; only the team-scoped index the partitions carry.
+        op.create_index('ix_team_memberships_team_id_joined_at', 'team_memberships', ['team_id', 'joined_at'], unique=False)
+        return
+
+    # Creating an empty table and a trigger is instant. Existing rows are copied by
+    # `python -m app.cli.partition_memberships backfill` before running the next migration.
+    for statement in shadow_ddl():
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        op.drop_index('ix_team_memberships_team_id_joined_at', table_name='team_memberships')
+        return
+
+    for statement in drop_shadow_ddl():
+        op.execute(statement)
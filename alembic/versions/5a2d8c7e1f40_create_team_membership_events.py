@@ -0,0 +1,31 @@
+# Migration creating the append-only team_membership_events table for the members change feed.
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '5a2d8c7e1f40'
+down_revision: Union[str, None] = 'c4f1e9a2b7d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('team_membership_events',
+        sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), autoincrement=True, nullable=False),
+        sa.Column('team_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('event', sa.String(length=16), nullable=False),
+        sa.Column('role', sa.String(length=16), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.ForeignKeyConstraint(['team_id'], ['teams.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_team_membership_events_team_id_id', 'team_membership_events', ['team_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_team_membership_events_team_id_id', table_name='team_membership_events')
+    op.drop_table('team_membership_events')
@@ -0,0 +1,48 @@
+# Migration swapping the hash-partitioned copy in as team_memberships; the old table is kept as team_memberships_unpartitioned.
+
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.db.membership_partitioning import finish_backfill_sql, swap_ddl
+
+
+revision: str = '8d3a6e1f5c27'
+down_revision: Union[str, None] = '4b7f2c9d1e86'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    # Copies whatever the backfill CLI has not (everything, if it was never run) while
+    # writes continue through the trigger, then takes the lock only for the renames.
+    op.execute(finish_backfill_sql())
+    for statement in swap_ddl():
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    # Back to a single plain table with the current rows. The previous migration's
+    # shadow table and trigger are not recreated; its downgrade tolerates that.
+    op.execute("""
+        CREATE TABLE team_memberships_plain (
+            user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+            team_id INTEGER NOT NULL REFERENCES teams (id) ON DELETE CASCADE,
+            role VARCHAR(16) NOT NULL,
+            joined_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+            CONSTRAINT team_memberships_plain_pkey PRIMARY KEY (user_id, team_id)
+        )
+    """)
+    op.execute("LOCK TABLE team_memberships IN ACCESS EXCLUSIVE MODE")
+    op.execute("INSERT INTO team_memberships_plain SELECT user_id, team_id, role, joined_at FROM team_memberships")
+    op.execute("DROP TABLE team_memberships")
+    op.execute("DROP TABLE IF EXISTS team_memberships_unpartitioned")
+    op.execute("ALTER TABLE team_memberships_plain RENAME TO team_memberships")
+    op.execute("ALTER TABLE team_memberships RENAME CONSTRAINT team_memberships_plain_pkey TO team_memberships_pkey")
+    op.execute("CREATE INDEX ix_team_memberships_team_id_joined_at ON team_memberships (team_id, joined_at)")
@@ -0,0 +1,37 @@
+# Migration adding denormalized member_count and per-role counts to teams, backfilled from team_memberships.
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '9e3b6f0d2a17'
+down_revision: Union[str, None] = '5a2d8c7e1f40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+COUNT_COLUMNS = {
+    'member_count': None,
+    'role_admin_count': 'admin',
+    'role_member_count': 'member',
+    'role_viewer_count': 'viewer',
+}
+
+
+def upgrade() -> None:
+    for column in COUNT_COLUMNS:
+        op.add_column('teams', sa.Column(column, sa.Integer(), server_default='0', nullable=False))
+
+    for column, role in COUNT_COLUMNS.items():
+        role_filter = f" AND m.role = '{role}'" if role else ""
+        op.execute(
+            f"UPDATE teams SET {column} = "
+            f"(SELECT COUNT(*) FROM team_memberships m WHERE m.team_id = teams.id{role_filter})"
+        )
+
+
+def downgrade() -> None:
+    for column in reversed(list(COUNT_COLUMNS)):
+        op.drop_column('teams', column)
@@ -0,0 +1,39 @@
+# Migration adding pg_trgm GIN indexes on teams.name and users.email for directory search (Postgres only).
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = 'a6e2d9b4c871'
+down_revision: Union[str, None] = 'f3a9c1d7e254'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Other backends search with plain LIKE scans; nothing to create there.
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # CONCURRENTLY can't run inside the migration transaction, but doesn't block writes
+    # on tables that may already hold millions of rows.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_teams_name_trgm', 'teams', ['name'],
+            postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}, postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_users_email_trgm', 'users', ['email'],
+            postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'}, postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_email_trgm', table_name='users', postgresql_concurrently=True)
+        op.drop_index('ix_teams_name_trgm', table_name='teams', postgresql_concurrently=True)
@@ -16,7 +16,7 @@ def upgrade() -> None:
     op.create_table('teams',
         sa.Column('id', sa.Integer(), nullable=False),
         sa.Column('name', sa.String(length=128), nullable=False),
-        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
         sa.PrimaryKeyConstraint('id')
     )
     op.create_index(op.f('ix_teams_name'), 'teams', ['name'], unique=False)
@@ -25,7 +25,7 @@ def upgrade() -> None:
         sa.Column('user_id', sa.Integer(), nullable=False),
         sa.Column('team_id', sa.Integer(), nullable=False),
         sa.Column('role', sa.String(length=16), nullable=False),
-        sa.Column('joined_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('joined_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
         sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
         sa.ForeignKeyConstraint(['team_id'], ['teams.id'], ondelete='CASCADE'),
         sa.PrimaryKeyConstraint('user_id', 'team_id')  # <-- COMPOSITE PRIMARY KEY
@@ -0,0 +1,20 @@
+# Migration adding the teams.version counter used for ETags.
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'c4f1e9a2b7d3'
+down_revision: Union[str, None] = 'bbe7a32e5d11'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('teams', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('teams', 'version')
@@ -0,0 +1,72 @@
+# Migration creating audit_events: range-partitioned by month on Postgres, a plain table elsewhere.
+
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'd5b8e3f1a7c2'
+down_revision: Union[str, None] = 'a6e2d9b4c871'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Partitions created up front; later months come from
+# `python -m app.cli.maintenance create-audit-partitions`.
+MONTHS_AHEAD = 3
+
+
+def _month_start(value: date, offset: int) -> date:
+    months = value.year * 12 + value.month - 1 + offset
+    return date(months // 12, months % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        op.create_table('audit_events',
+            sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), autoincrement=True, nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+            sa.Column('action', sa.String(length=64), nullable=False),
+            sa.Column('outcome', sa.String(length=16), nullable=False),
+            sa.Column('actor_id', sa.Integer(), nullable=True),
+            sa.Column('team_id', sa.Integer(), nullable=True),
+            sa.Column('target_user_id', sa.Integer(), nullable=True),
+            sa.Column('request_id', sa.String(length=64), nullable=True),
+            sa.Column('detail', sa.JSON(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_audit_events_team_id_created_at', 'audit_events', ['team_id', 'created_at'], unique=False)
+        return
+
+    # The primary key must include the partition key. Retention drops whole partitions.
+    op.execute("""
+        CREATE TABLE audit_events (
+            id BIGINT GENERATED BY DEFAULT AS IDENTITY,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            action VARCHAR(64) NOT NULL,
+            outcome VARCHAR(16) NOT NULL,
+            actor_id INTEGER,
+            team_id INTEGER,
+            target_user_id INTEGER,
+            request_id VARCHAR(64),
+            detail JSON,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("CREATE INDEX ix_audit_events_team_id_created_at ON audit_events (team_id, created_at)")
+    # Catches rows for months nobody created a partition for, instead of failing the flush.
+    op.execute("CREATE TABLE audit_events_default PARTITION OF audit_events DEFAULT")
+
+    today = date.today()
+    for offset in range(MONTHS_AHEAD + 1):
+        start, end = _month_start(today, offset), _month_start(today, offset + 1)
+        op.execute(
+            f"CREATE TABLE audit_events_{start:%Y_%m} PARTITION OF audit_events "
+            f"FOR VALUES FROM ('{start.isoformat()} 00:00+00') TO ('{end.isoformat()} 00:00+00')"
+        )
+
+
+def downgrade() -> None:
+    # Dropping the parent drops every partition with it.
+    op.drop_table('audit_events')
@@ -0,0 +1,23 @@
+# Migration adding soft-delete flags: teams.deleted_at and users.deactivated_at.
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'f3a9c1d7e254'
+down_revision: Union[str, None] = 'b82d5f3e6a19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Nullable without a default: a metadata-only change, no table rewrite.
+    op.add_column('teams', sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('users', sa.Column('deactivated_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'deactivated_at')
+    op.drop_column('teams', 'deleted_at')
@@ -4,8 +4,14 @@ from fastapi import APIRouter
 
 from app.api.v1.routes.teams import router as teams_router
 from app.api.v1.routes.auth import router as auth_router  
+from app.api.v1.routes.jobs import router as jobs_router
+from app.api.v1.routes.users import router as users_router
+from app.api.v1.routes.admin import router as admin_router
 
 api_router = APIRouter()
 
 api_router.include_router(auth_router) 
 api_router.include_router(teams_router)
+api_router.include_router(jobs_router)
+api_router.include_router(users_router)
+api_router.include_router(admin_router)
@@ -3,15 +3,28 @@
 from typing import Generator, Optional
 
 from fastapi import Depends, HTTPException, Request, status
+from jose.exceptions import ExpiredSignatureError
+from sqlalchemy import bindparam, select
 from sqlalchemy.orm import Session
 
+from app.core import metrics
+from app.core.audit import DENIED, audit_log
+from app.core.config import settings
+from app.core.request_context import get_request_context
+from app.core.revocation import revocation_list
 from app.core.security import decode_access_token
-from app.core.permissions import role_allows
+from app.core.permissions import INDEX_ACTIONS, role_allows
 from app.db.session import SessionLocal
 
 from app.models.user import User
 from app.models.team import Team
 from app.models.membership import Membership
+from app.services import team_service
+from app.services.membership_index import membership_index
+
+
+# Runs on every authenticated request; built once (see team_service._TEAM_BY_ID).
+_USER_BY_ID = select(User).where(User.id == bindparam("user_id"))
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -22,6 +35,27 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+def _auth_error(status_code: int, detail: str, reason: str) -> HTTPException:
+    metrics.record_auth_failure(status_code, reason)
+    return HTTPException(status_code=status_code, detail=detail)
+
+
+def _deny(user_id: int, team_id: int | None, action: str | None, reason: str) -> HTTPException:
+    # Denials are audited as non-essential: a client can produce them at any rate, so
+    # they are dropped rather than slowing requests down when the audit buffer is full.
+    audit_log.record(
+        "permission.denied",
+        DENIED,
+        actor_id=user_id,
+        team_id=team_id,
+        detail={"action": action, "reason": reason},
+        essential=False,
+    )
+    if reason == "not_member":
+        return _auth_error(status.HTTP_403_FORBIDDEN, "Not a member of this team", reason)
+    return _auth_error(status.HTTP_403_FORBIDDEN, "Insufficient permissions", reason)
+
+
 def get_token(request: Request) -> Optional[str]:
     auth = request.headers.get("Authorization")
     if not auth:
@@ -43,54 +77,58 @@ def get_current_user(
     db: Session = Depends(get_db),
 ) -> User:
     if token is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Not authenticated",
-        )
+        raise _auth_error(status.HTTP_401_UNAUTHORIZED, "Not authenticated", "missing_token")
 
     try:
         payload = decode_access_token(token)
+    except ExpiredSignatureError:
+        raise _auth_error(status.HTTP_401_UNAUTHORIZED, "Invalid token", "expired_token")
     except Exception:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token",
-        )
+        raise _auth_error(status.HTTP_401_UNAUTHORIZED, "Invalid token", "invalid_token")
+
+    # In-memory check only: revocations reach every worker through the background sync.
+    if revocation_list.is_revoked(payload.get("sid")):
+        raise _auth_error(status.HTTP_401_UNAUTHORIZED, "Token revoked", "revoked")
 
     sub = payload.get("sub")
     if not sub:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token",
-        )
+        raise _auth_error(status.HTTP_401_UNAUTHORIZED, "Invalid token", "invalid_token")
 
     try:
         user_id = int(sub)
     except (TypeError, ValueError):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token",
-        )
+        raise _auth_error(status.HTTP_401_UNAUTHORIZED, "Invalid token", "invalid_token")
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = db.execute(_USER_BY_ID, {"user_id": user_id}).scalar_one_or_none()
     if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-        )
+        raise _auth_error(status.HTTP_401_UNAUTHORIZED, "User not found", "unknown_user")
+    if user.deactivated_at is not None:
+        raise _auth_error(status.HTTP_401_UNAUTHORIZED, "User deactivated", "deactivated")
+
+    ctx = get_request_context()
+    if ctx is not None:
+        ctx.user_id = user.id
 
     return user
 
 
 def get_team_by_id(
     team_id: int,
+    request: Request,
     db: Session = Depends(get_db),
 ) -> Team:
-    team = db.query(Team).filter(Team.id == team_id).first()
+    # Only reads share a coalesced lookup; write routes act on a row they read themselves.
+    team = team_service.get_team(db=db, team_id=team_id, coalesce=request.method in ("GET", "HEAD"))
     if not team:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Team not found",
         )
+
+    ctx = get_request_context()
+    if ctx is not None:
+        ctx.team_id = team.id
+
     return team
 
 
@@ -99,36 +137,62 @@ def get_current_membership(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ) -> Membership:
-    membership = (
-        db.query(Membership)
-        .filter(
-            Membership.team_id == team.id,
-            Membership.user_id == current_user.id,
-        )
-        .first()
-    )
+    membership = resolve_membership(db, team.id, current_user)
 
     if not membership:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not a member of this team",
-        )
+        raise _deny(current_user.id, team.id, None, "not_member")
+
+    return membership
+
+
+def resolve_membership(db: Session, team_id: int, user: User, authoritative: bool = False) -> Membership | None:
+    # Effective membership, including roles inherited from ancestor teams. `authoritative`
+    # skips the index, whose hits may be a removal or demotion behind.
+    membership = None
+    if membership_index.ready and not authoritative:
+        membership = membership_index.get_effective(team_id, user.id)
+
+    # A miss may just be a member added by another worker since the last refresh.
+    if membership is None:
+        membership = team_service.get_effective_membership(db, team_id, user.id)
+        if membership is not None:
+            membership_index.upsert(
+                membership.team_id, membership.user_id, membership.role, membership.joined_at
+            )
 
     return membership
 
 
+def check_team_permission(db: Session, team_id: int, user: User, action: str) -> Membership:
+    # For teams named in a request body rather than the path (e.g. a new parent team).
+    membership = resolve_membership(db, team_id, user, authoritative=action not in INDEX_ACTIONS)
+    if membership is None or not role_allows(membership.role, action):
+        raise _deny(user.id, team_id, action, "insufficient_role")
+    return membership
+
+
 def require_permission(action: str):
     def permission_dependency(
-        membership: Membership = Depends(get_current_membership),
+        team: Team = Depends(get_team_by_id),
+        current_user: User = Depends(get_current_user),
+        db: Session = Depends(get_db),
     ) -> Membership:
+        membership = resolve_membership(db, team.id, current_user, authoritative=action not in INDEX_ACTIONS)
+        if not membership:
+            raise _deny(current_user.id, team.id, None, "not_member")
         role = membership.role
 
         if not role_allows(role, action):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Insufficient permissions",
-            )
+            # The membership may be inherited from an ancestor; audit the team asked for.
+            raise _deny(membership.user_id, team.id, action, "insufficient_role")
 
         return membership
 
     return permission_dependency
+
+
+def require_admin(current_user: User = Depends(get_current_user)) -> User:
+    # Installation-wide operations (bulk export) that no team role can grant.
+    if current_user.email.lower() not in {email.lower() for email in settings.ADMIN_EMAILS}:
+        raise _deny(current_user.id, None, "admin", "not_admin")
+    return current_user
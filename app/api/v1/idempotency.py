@@ -0,0 +1,145 @@
+# Idempotency-Key handling for mutating endpoints: stores the first response, replays it for retries,
+# and lets concurrent duplicates in this process wait for the first one instead of racing it.
+
+import json
+import threading
+from typing import Any, Callable, Optional
+
+from fastapi import Header, HTTPException, Request, Response, status
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.deadline import DeadlineExceeded, remaining
+from app.core.request_context import bind_request_context, get_request_context, reset_request_context
+from app.db.session import SessionLocal
+from app.services import idempotency_service
+
+
+class _Call:
+    __slots__ = ("done", "fingerprint", "response")
+
+    def __init__(self, fingerprint: str) -> None:
+        self.done = threading.Event()
+        self.fingerprint = fingerprint
+        self.response: tuple[int, str] | None = None
+
+
+_lock = threading.Lock()
+_in_flight: dict[tuple[int, str], _Call] = {}
+
+
+def get_idempotency_key(
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", min_length=1, max_length=255),
+) -> Optional[str]:
+    return idempotency_key
+
+
+def run_idempotent(
+    request: Request,
+    db: Session,
+    user_id: int,
+    key: str | None,
+    payload: BaseModel,
+    status_code: int,
+    response_model: type[BaseModel],
+    operation: Callable[[bool], Any],
+):
+    # operation(commit) commits its own changes only when told to: with a key, they
+    # commit together with the stored outcome instead.
+    if key is None:
+        return operation(True)
+
+    fingerprint = idempotency_service.request_hash(request.method, request.url.path, payload.model_dump_json())
+
+    with _lock:
+        call = _in_flight.get((user_id, key))
+        leader = call is None
+        if leader:
+            call = _in_flight[(user_id, key)] = _Call(fingerprint)
+
+    if not leader:
+        # Wait for the first request, but no longer than this one's own deadline allows.
+        ctx = get_request_context()
+        left = remaining(ctx) if ctx is not None else None
+        if left is not None and left < settings.IDEMPOTENCY_CLAIM_SECONDS:
+            if left <= 0 or not call.done.wait(left):
+                raise DeadlineExceeded()
+        else:
+            call.done.wait(settings.IDEMPOTENCY_CLAIM_SECONDS)
+        if call.response is not None and call.fingerprint == fingerprint:
+            metrics.record_idempotent_replay("coalesced")
+            return _response(*call.response, replayed=True)
+        # The first request failed, or this one differs: settle it against the table.
+        return _run(db, user_id, key, fingerprint, status_code, response_model, operation, None)
+
+    try:
+        return _run(db, user_id, key, fingerprint, status_code, response_model, operation, call)
+    finally:
+        with _lock:
+            del _in_flight[(user_id, key)]
+        call.done.set()
+
+
+def _run(db, user_id, key, fingerprint, status_code, response_model, operation, call: _Call | None):
+    try:
+        record = idempotency_service.claim_key(db, user_id, key, fingerprint)
+    except ValueError as e:
+        if str(e) == "key_mismatch":
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+                detail="Idempotency-Key was already used for a different request",
+            )
+        if str(e) == "in_progress":
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still in progress",
+            )
+        raise
+
+    if record is not None:
+        metrics.record_idempotent_replay("stored")
+        return _response(record.status_code, record.response_body, replayed=True)
+
+    try:
+        result = operation(False)
+        body = response_model.model_validate(result, from_attributes=True).model_dump_json()
+    except HTTPException as exc:
+        # Client errors (e.g. 409 already a member) are part of the outcome and replayed too.
+        if exc.status_code >= 500:
+            _release(db, user_id, key)
+            raise
+        outcome = (exc.status_code, json.dumps({"detail": exc.detail}))
+        idempotency_service.complete_key(db, user_id, key, *outcome)
+        if call is not None:
+            call.response = outcome
+        raise
+    except Exception:
+        _release(db, user_id, key)
+        raise
+
+    # Commits the operation's changes and its stored response together: a crash in
+    # between can no longer leave the change applied with the key still unsettled.
+    idempotency_service.complete_key(db, user_id, key, status_code, body)
+    if call is not None:
+        call.response = (status_code, body)
+    return _response(status_code, body, replayed=False)
+
+
+def _release(db: Session, user_id: int, key: str) -> None:
+    # The operation may have failed on the request deadline, which would fail this too:
+    # the claim is dropped on a fresh session with no request context, so neither the
+    # in-process check nor statement_timeout applies.
+    db.rollback()
+    token = bind_request_context(None)
+    try:
+        with SessionLocal() as release_db:
+            idempotency_service.release_key(release_db, user_id, key)
+    finally:
+        reset_request_context(token)
+
+
+def _response(status_code: int, body: str, replayed: bool) -> Response:
+    headers = {"Idempotent-Replayed": "true"} if replayed else None
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
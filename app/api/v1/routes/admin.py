@@ -0,0 +1,47 @@
+# HTTP endpoints for installation admins (ADMIN_EMAILS): streaming bulk export of teams, users and memberships.
+
+from typing import Literal
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.api.v1.deps import get_db, require_admin
+from app.core.audit import audit_log
+from app.core.config import settings
+from app.db.session import engine
+from app.models.user import User
+from app.services import export_service
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get("/export/{table}", response_class=StreamingResponse)
+def export_table(
+    table: Literal["teams", "users", "memberships"],
+    format: Literal["csv", "ndjson"] = "csv",
+    admin: User = Depends(require_admin),
+    db: Session = Depends(get_db),
+):
+    # Streams the whole table in chunks from its own connection, held only while the
+    # body is being sent. The request session is closed first: it would otherwise keep
+    # its connection (and in SQLite's in-memory mode the write lock) until the response
+    # has been sent.
+    db.close()
+
+    def body():
+        with engine.connect() as connection:
+            yield from export_service.stream(
+                connection,
+                table,
+                format,
+                chunk_bytes=settings.EXPORT_CHUNK_BYTES,
+                fetch_rows=settings.EXPORT_FETCH_ROWS,
+            )
+
+    audit_log.record("admin.export", actor_id=admin.id, detail={"table": table, "format": format})
+    return StreamingResponse(
+        body(),
+        media_type=export_service.FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{table}.{format}"'},
+    )
@@ -1,10 +1,11 @@
-# HTTP endpoints for register and login, mapping service outcomes to HTTP responses.
+# HTTP endpoints for register, login, token refresh and logout, mapping service outcomes to HTTP responses.
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
 from app.api.v1.deps import get_db
-from app.schemas.auth import Login, Register, TokenResponse, UserPublic
+from app.core.config import settings
+from app.schemas.auth import Login, RefreshRequest, Register, TokenResponse, UserPublic
 from app.services import auth_service
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -33,5 +34,34 @@ def login(payload: Login, db: Session = Depends(get_db)):
             detail="Invalid credentials",
         )
 
-    token = auth_service.issue_access_token(user)
-    return TokenResponse(access_token=token)
\ No newline at end of file
+    access_token, refresh_token = auth_service.issue_tokens(db=db, user=user)
+    return _token_response(access_token, refresh_token)
+
+
+@router.post("/refresh", response_model=TokenResponse)
+def refresh(payload: RefreshRequest, db: Session = Depends(get_db)):
+    tokens = auth_service.refresh_tokens(db=db, refresh_token=payload.refresh_token)
+    if tokens is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+        )
+
+    return _token_response(*tokens)
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(payload: RefreshRequest, db: Session = Depends(get_db)):
+    if not auth_service.revoke_refresh_token(db=db, refresh_token=payload.refresh_token):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+        )
+
+
+def _token_response(access_token: str, refresh_token: str) -> TokenResponse:
+    return TokenResponse(
+        access_token=access_token,
+        refresh_token=refresh_token,
+        expires_in=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    )
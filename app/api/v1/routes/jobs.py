@@ -0,0 +1,27 @@
+# HTTP endpoint for polling the status of background jobs started by the caller.
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.api.v1.deps import get_current_user, get_db
+from app.models.user import User
+from app.schemas.job import JobPublic
+from app.services import job_service
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+@router.get("/{job_id}", response_model=JobPublic)
+def get_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    job = job_service.get_job(db=db, job_id=job_id)
+    # Other users' jobs are indistinguishable from missing ones.
+    if job is None or job.created_by != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found",
+        )
+    return job
@@ -1,15 +1,29 @@
-#  HTTP endpoints for creating teams, getting a team, listing members, and adding members (RBAC via dependencies).
+#  HTTP endpoints for creating, searching, getting and deleting teams, listing members, adding members, and the team audit trail (RBAC via dependencies).
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import hashlib
+import time
+from datetime import datetime, timedelta, timezone
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from app.api.v1.deps import (
+    check_team_permission,
     get_current_user,
     get_db,
     get_team_by_id,
     require_permission,
 )
+from app.api.v1.idempotency import get_idempotency_key, run_idempotent
+from app.api.v1.pagination import decode_cursor, encode_cursor
+from app.core.audit import audit_log
+from app.core.config import settings
+from app.core.deadline import route_timeout
 from app.core.permissions import (
+    TEAM_AUDIT_READ,
+    TEAM_DELETE,
+    TEAM_HIERARCHY_MANAGE,
     TEAM_READ,
     TEAM_MEMBER_ADD,
     TEAM_MEMBER_CHANGE_ROLE,
@@ -23,40 +37,320 @@ from app.schemas.team import (
     TeamCreate,
     TeamPublic,
     TeamMemberAdd,
+    TeamMemberBulkAdd,
+    TeamMemberChanges,
+    TeamMemberListItem,
     TeamMemberPublic,
     TeamMemberRoleUpdate,
+    TeamParentUpdate,
 )
+from app.schemas.audit import AuditEventPublic
+from app.schemas.common import Page
+from app.schemas.job import JobPublic
+from app.services import audit_service, job_service
 from app.services import team_service as team_service
+from app.services.job_handlers import BULK_ADD_MEMBERS, DELETE_TEAM
+from app.services.change_notifier import membership_changes
 
 router = APIRouter(prefix="/teams", tags=["teams"])
 
 
+def _team_etag(team: Team, resource: str, variant: str = "") -> str:
+    # variant tells apart representations of one resource (e.g. a sparse fieldset),
+    # so a cached copy of one is never confirmed as fresh for another.
+    suffix = f"-{hashlib.sha256(variant.encode()).hexdigest()[:12]}" if variant else ""
+    return f'"team-{team.id}-{resource}-v{team.version}{suffix}"'
+
+
+def _not_modified(request: Request, etag: str) -> Response | None:
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return None
+
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    if etag in candidates or "*" in candidates:
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": etag, "Cache-Control": "private, no-cache"},
+        )
+    return None
+
+
+def _set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+
+
 @router.post("", response_model=TeamPublic, status_code=status.HTTP_201_CREATED)
 def create_team(
+    request: Request,
     payload: TeamCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    idempotency_key: str | None = Depends(get_idempotency_key),
+):
+    if payload.parent_id is not None:
+        _check_parent(db, payload.parent_id, current_user)
+
+    return run_idempotent(
+        request,
+        db,
+        current_user.id,
+        idempotency_key,
+        payload,
+        status.HTTP_201_CREATED,
+        TeamPublic,
+        lambda commit: _create(db, current_user, payload, commit),
+    )
+
+
+def _create(db: Session, current_user: User, payload: TeamCreate, commit: bool) -> Team:
+    team = team_service.create_team(db=db, creator=current_user, payload=payload, commit=commit)
+    audit_log.record("team.create", actor_id=current_user.id, team_id=team.id, detail={"parent_id": payload.parent_id})
+    return team
+
+
+# Declared before /{team_id} so "search" is not taken for a team id.
+@router.get("/search", response_model=Page[TeamPublic])
+def search_teams(
+    q: str = Query(min_length=3, max_length=128),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
 ):
-    team = team_service.create_team(db=db, creator=current_user, payload=payload)
+    # Under 3 characters there are no trigrams to look up, so short queries are refused.
+    teams = team_service.search_teams(
+        db=db,
+        user_id=current_user.id,
+        query=q,
+        limit=limit + 1,
+        after=decode_cursor(cursor, (str, int)),
+    )
+    has_more = len(teams) > limit
+    teams = teams[:limit]
+    return Page[TeamPublic](
+        items=teams,
+        next_cursor=encode_cursor(teams[-1].name, teams[-1].id) if has_more else None,
+    )
+
+
+@router.put("/{team_id}/parent", response_model=TeamPublic)
+def move_team(
+    payload: TeamParentUpdate,
+    db: Session = Depends(get_db),
+    team: Team = Depends(get_team_by_id),
+    current_user: User = Depends(get_current_user),
+    _: Membership = Depends(require_permission(TEAM_HIERARCHY_MANAGE)),
+):
+    if payload.parent_id is not None:
+        _check_parent(db, payload.parent_id, current_user)
+
+    try:
+        team = team_service.move_team(db=db, team=team, new_parent_id=payload.parent_id)
+    except ValueError as e:
+        if str(e) == "cycle":
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A team cannot be moved under itself or its descendants",
+            )
+        raise
+
+    audit_log.record("team.move", actor_id=current_user.id, team_id=team.id, detail={"parent_id": payload.parent_id})
     return team
 
 
+def _check_parent(db: Session, parent_id: int, current_user: User) -> None:
+    if team_service.get_team(db=db, team_id=parent_id, coalesce=False) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Parent team not found",
+        )
+    check_team_permission(db, parent_id, current_user, TEAM_HIERARCHY_MANAGE)
+
+
 @router.get("/{team_id}", response_model=TeamPublic)
 def get_team(
+    request: Request,
+    response: Response,
     team: Team = Depends(get_team_by_id),
     _: Membership = Depends(require_permission(TEAM_READ)),
 ):
+    etag = _team_etag(team, "team")
+    not_modified = _not_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
+
+    _set_etag(response, etag)
     return team
 
 
-@router.get("/{team_id}/members", response_model=list[TeamMemberPublic])
+@router.delete("/{team_id}", response_model=JobPublic, status_code=status.HTTP_202_ACCEPTED)
+def delete_team(
+    response: Response,
+    db: Session = Depends(get_db),
+    team: Team = Depends(get_team_by_id),
+    current_user: User = Depends(get_current_user),
+    _: Membership = Depends(require_permission(TEAM_DELETE)),
+):
+    # The team 404s from here on; the worker removes its rows in batches. The job
+    # commits together with the soft delete.
+    job = job_service.enqueue(
+        db=db,
+        kind=DELETE_TEAM,
+        payload={"team_id": team.id},
+        created_by=current_user.id,
+        total=team.member_count,
+        commit=False,
+    )
+    try:
+        team_service.soft_delete_team(db=db, team=team)
+    except ValueError as e:
+        if str(e) == "has_children":
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Team has child teams",
+            )
+        raise
+    audit_log.record("team.delete", actor_id=current_user.id, team_id=team.id, detail={"job_id": job.id})
+    response.headers["Location"] = f"/api/v1/jobs/{job.id}"
+    return job
+
+
+def _member_fields(fields: str | None, include: str | None) -> tuple[tuple[str, ...], bool]:
+    includes = {part.strip() for part in include.split(",")} if include else set()
+    if includes - {"user"}:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail="include supports: user",
+        )
+    include_user = "user" in includes
+
+    if fields is None:
+        return team_service.MEMBER_FIELDS, include_user
+
+    requested = {part.strip() for part in fields.split(",") if part.strip()}
+    allowed = set(team_service.MEMBER_FIELDS) | ({"user"} if include_user else set())
+    if not requested or requested - allowed:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=f"fields supports: {', '.join(sorted(allowed))}",
+        )
+    # Keep the column order stable so equivalent requests share one coalesced query.
+    return tuple(f for f in team_service.MEMBER_FIELDS if f in requested), include_user and "user" in requested
+
+
+@router.get(
+    "/{team_id}/members",
+    response_model=list[TeamMemberListItem],
+    response_model_exclude_unset=True,
+)
 def list_members(
     team_id: int,
+    request: Request,
+    response: Response,
+    fields: str | None = Query(None, description="Comma-separated: user_id, role, joined_at, user"),
+    include: str | None = Query(None, description="user: embed each member's id and email"),
+    db: Session = Depends(get_db),
+    team: Team = Depends(get_team_by_id),
+    _: Membership = Depends(require_permission(TEAM_MEMBER_LIST)),
+):
+    member_fields, include_user = _member_fields(fields, include)
+
+    # The version check runs after authorization but before members are loaded or serialized.
+    variant = ""
+    if (member_fields, include_user) != (team_service.MEMBER_FIELDS, False):
+        variant = f"{','.join(member_fields)};user={include_user}"
+    etag = _team_etag(team, "members", variant)
+    not_modified = _not_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
+
+    _set_etag(response, etag)
+    # Rows come from the database, read after team.version, so the body is never older
+    # than its ETag; the index lags writes made by other workers.
+    if fields is None and not include_user:
+        return team_service.list_members(db=db, team_id=team_id, use_index=False)
+    return team_service.list_member_fields(
+        db=db, team_id=team_id, fields=member_fields, include_user=include_user, use_index=False
+    )
+
+
+@router.get("/{team_id}/audit", response_model=Page[AuditEventPublic])
+def list_audit_events(
+    team_id: int,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str | None = None,
+    db: Session = Depends(get_db),
+    _: Membership = Depends(require_permission(TEAM_AUDIT_READ)),
+):
+    # Newest first within [since, until); defaults to the last 24 hours. The window is
+    # capped so a query only ever touches a bounded number of monthly partitions.
+    until = until or datetime.now(timezone.utc)
+    since = since or until - timedelta(hours=24)
+    if since.tzinfo is None or until.tzinfo is None:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail="since and until need a timezone",
+        )
+    if not since < until <= since + timedelta(days=settings.AUDIT_QUERY_MAX_DAYS):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=f"since must be before until, at most {settings.AUDIT_QUERY_MAX_DAYS} days apart",
+        )
+
+    before = decode_cursor(cursor, (str, int))
+    if before is not None:
+        try:
+            before = (datetime.fromisoformat(before[0]), before[1])
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    events = audit_service.list_events(
+        db=db, team_id=team_id, since=since, until=until, limit=limit + 1, before=before
+    )
+    has_more = len(events) > limit
+    events = events[:limit]
+    return Page[AuditEventPublic](
+        items=events,
+        next_cursor=encode_cursor(events[-1].created_at.isoformat(), events[-1].id) if has_more else None,
+    )
+
+
+@router.get(
+    "/{team_id}/members/changes",
+    response_model=TeamMemberChanges,
+    # The long-poll may wait the full period before its last query.
+    dependencies=[Depends(route_timeout(settings.MEMBER_CHANGES_MAX_WAIT_SECONDS + 5))],
+)
+async def list_member_changes(
+    team_id: int,
+    since: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    wait: float = Query(0, ge=0, le=settings.MEMBER_CHANGES_MAX_WAIT_SECONDS),
     db: Session = Depends(get_db),
     _: Membership = Depends(require_permission(TEAM_MEMBER_LIST)),
 ):
-    members = team_service.list_members(db=db, team_id=team_id)
-    return members
+    events = await run_in_threadpool(team_service.list_member_changes, db, team_id, since, limit)
+
+    # Long-poll: wake on local writes, re-poll for writes committed by other workers.
+    deadline = time.monotonic() + wait
+    while not events:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        # End the read transaction so the pooled connection is not held while idle.
+        await run_in_threadpool(db.rollback)
+        await membership_changes.wait(team_id, min(remaining, settings.MEMBER_CHANGES_POLL_SECONDS))
+        events = await team_service.poll_member_changes(db, team_id, since, limit)
+
+    return TeamMemberChanges(
+        events=events,
+        cursor=events[-1].id if events else since,
+        has_more=len(events) == limit,
+    )
 
 
 @router.post(
@@ -65,28 +359,81 @@ def list_members(
     status_code=status.HTTP_201_CREATED,
 )
 def add_member(
+    request: Request,
     team_id: int,
     payload: TeamMemberAdd,
     db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
     _: Membership = Depends(require_permission(TEAM_MEMBER_ADD)),
+    idempotency_key: str | None = Depends(get_idempotency_key),
 ):
-    try:
-        membership = team_service.add_member(db=db, team_id=team_id, payload=payload)
-    except ValueError as e:
-        if str(e) == "already_member":
+    def _add(commit: bool):
+        try:
+            membership = team_service.add_member(db=db, team_id=team_id, payload=payload, commit=commit)
+        except ValueError as e:
+            if str(e) == "already_member":
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="User is already a member",
+                )
+            raise
+
+        if membership is None:
             raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail="User is already a member",
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found",
             )
-        raise
 
-    if membership is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found",
+        audit_log.record(
+            "member.add",
+            actor_id=current_user.id,
+            team_id=team_id,
+            target_user_id=membership.user_id,
+            detail={"role": membership.role},
         )
+        return membership
 
-    return membership
+    return run_idempotent(
+        request,
+        db,
+        current_user.id,
+        idempotency_key,
+        payload,
+        status.HTTP_201_CREATED,
+        TeamMemberPublic,
+        _add,
+    )
+
+
+@router.post(
+    "/{team_id}/members/bulk",
+    response_model=JobPublic,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+def bulk_add_members(
+    team_id: int,
+    payload: TeamMemberBulkAdd,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    _: Membership = Depends(require_permission(TEAM_MEMBER_ADD)),
+):
+    # Processed by `python -m app.cli.worker` in batches; poll the job for progress.
+    job = job_service.enqueue(
+        db=db,
+        kind=BULK_ADD_MEMBERS,
+        payload={"team_id": team_id, "members": [m.model_dump(mode="json") for m in payload.members]},
+        created_by=current_user.id,
+        total=len(payload.members),
+    )
+    audit_log.record(
+        "member.bulk_add",
+        actor_id=current_user.id,
+        team_id=team_id,
+        detail={"job_id": job.id, "count": len(payload.members)},
+    )
+    response.headers["Location"] = f"/api/v1/jobs/{job.id}"
+    return job
 
 
 @router.delete(
@@ -97,7 +444,7 @@ def remove_member(
     team_id: int,
     user_id: int,
     db: Session = Depends(get_db),
-    _: Membership = Depends(require_permission(TEAM_MEMBER_REMOVE)),
+    actor: Membership = Depends(require_permission(TEAM_MEMBER_REMOVE)),
 ):
     removed = team_service.remove_member(db=db, team_id=team_id, user_id=user_id)
     if not removed:
@@ -105,6 +452,7 @@ def remove_member(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Membership not found",
         )
+    audit_log.record("member.remove", actor_id=actor.user_id, team_id=team_id, target_user_id=user_id)
 
 
 @router.patch(
@@ -116,7 +464,7 @@ def change_member_role(
     user_id: int,
     payload: TeamMemberRoleUpdate,
     db: Session = Depends(get_db),
-    _: Membership = Depends(require_permission(TEAM_MEMBER_CHANGE_ROLE)),
+    actor: Membership = Depends(require_permission(TEAM_MEMBER_CHANGE_ROLE)),
 ):
     membership = team_service.change_member_role(
         db=db,
@@ -130,4 +478,11 @@ def change_member_role(
             detail="Membership not found",
         )
 
+    audit_log.record(
+        "member.role_change",
+        actor_id=actor.user_id,
+        team_id=team_id,
+        target_user_id=user_id,
+        detail={"role": payload.role},
+    )
     return membership
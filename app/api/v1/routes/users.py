@@ -0,0 +1,72 @@
+# HTTP endpoints for the caller's own account (deactivation) and the user directory search.
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.orm import Session
+
+from app.api.v1.deps import check_team_permission, get_current_user, get_db
+from app.api.v1.pagination import decode_cursor, encode_cursor
+from app.core.audit import audit_log
+from app.core.permissions import TEAM_MEMBER_ADD
+from app.models.membership import Membership
+from app.models.user import User
+from app.schemas.common import Page
+from app.schemas.job import JobPublic
+from app.schemas.user import UserPublic
+from app.services import auth_service, job_service, team_service, user_service
+from app.services.job_handlers import DEACTIVATE_USER
+
+router = APIRouter(prefix="/users", tags=["users"])
+
+
+@router.get("/search", response_model=Page[UserPublic])
+def search_users(
+    team_id: int,
+    email: str = Query(min_length=3, max_length=255),
+    limit: int = Query(20, ge=1, le=50),
+    cursor: str | None = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    # For picking people to add to `team_id`: only its admins may search, and current
+    # members are left out. A minimum prefix and small pages keep the directory from
+    # being enumerated.
+    if team_service.get_team(db=db, team_id=team_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Team not found",
+        )
+    check_team_permission(db, team_id, current_user, TEAM_MEMBER_ADD)
+
+    (after,) = decode_cursor(cursor, (str,)) or (None,)
+    users = user_service.search_users(
+        db=db,
+        email_prefix=email,
+        limit=limit + 1,
+        exclude_team_id=team_id,
+        after=after,
+    )
+    has_more = len(users) > limit
+    users = users[:limit]
+    return Page[UserPublic](items=users, next_cursor=encode_cursor(users[-1].email) if has_more else None)
+
+
+@router.delete("/me", response_model=JobPublic, status_code=status.HTTP_202_ACCEPTED)
+def deactivate_me(
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    # Tokens stop working immediately; memberships are removed by the worker in batches.
+    # The job commits together with the deactivation.
+    job = job_service.enqueue(
+        db=db,
+        kind=DEACTIVATE_USER,
+        payload={"user_id": current_user.id},
+        created_by=current_user.id,
+        total=db.query(Membership).filter(Membership.user_id == current_user.id).count(),
+        commit=False,
+    )
+    auth_service.deactivate_user(db=db, user=current_user)
+    audit_log.record("user.deactivate", actor_id=current_user.id, target_user_id=current_user.id, detail={"job_id": job.id})
+    response.headers["Location"] = f"/api/v1/jobs/{job.id}"
+    return job
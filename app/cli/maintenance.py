@@ -0,0 +1,76 @@
+# Operational maintenance commands, run as `python -m app.cli.maintenance <command>`.
+
+import argparse
+import logging
+from datetime import date
+
+from app.core.log_config import setup_logging
+from app.db.session import SessionLocal
+from app.services import audit_service, idempotency_service, team_service
+
+logger = logging.getLogger(__name__)
+
+
+def reconcile_team_counts(args: argparse.Namespace) -> None:
+    with SessionLocal() as db:
+        repaired = team_service.reconcile_member_counts(db=db, batch_size=args.batch_size)
+    logger.info("Reconciled team member counts, repaired %d team(s)", repaired)
+
+
+def purge_idempotency_keys(args: argparse.Namespace) -> None:
+    with SessionLocal() as db:
+        purged = idempotency_service.purge_expired_keys(db=db, batch_size=args.batch_size)
+    logger.info("Purged %d expired idempotency key(s)", purged)
+
+
+def create_audit_partitions(args: argparse.Namespace) -> None:
+    with SessionLocal() as db:
+        created = audit_service.ensure_partitions(db=db, today=date.today(), months_ahead=args.months_ahead)
+    logger.info("Created %d audit partition(s): %s", len(created), ", ".join(created) or "-")
+
+
+def drop_audit_partitions(args: argparse.Namespace) -> None:
+    with SessionLocal() as db:
+        dropped = audit_service.drop_old_partitions(db=db, today=date.today(), keep_months=args.keep_months)
+    logger.info("Dropped audit data older than %d month(s): %s", args.keep_months, ", ".join(dropped) or "-")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli.maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    reconcile = commands.add_parser(
+        "reconcile-team-counts",
+        help="Recompute teams.member_count and per-role counts from team_memberships",
+    )
+    reconcile.add_argument("--batch-size", type=int, default=500)
+    reconcile.set_defaults(func=reconcile_team_counts)
+
+    purge = commands.add_parser(
+        "purge-idempotency-keys",
+        help="Delete idempotency keys past their TTL",
+    )
+    purge.add_argument("--batch-size", type=int, default=1000)
+    purge.set_defaults(func=purge_idempotency_keys)
+
+    partitions = commands.add_parser(
+        "create-audit-partitions",
+        help="Create monthly audit_events partitions ahead of time (Postgres)",
+    )
+    partitions.add_argument("--months-ahead", type=int, default=3)
+    partitions.set_defaults(func=create_audit_partitions)
+
+    retention = commands.add_parser(
+        "drop-audit-partitions",
+        help="Drop audit partitions older than the current month minus --keep-months",
+    )
+    retention.add_argument("--keep-months", type=int, default=12)
+    retention.set_defaults(func=drop_audit_partitions)
+
+    args = parser.parse_args(argv)
+    setup_logging()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
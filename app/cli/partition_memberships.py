@@ -0,0 +1,82 @@
+# Online migration of team_memberships to hash partitions, run as `python -m app.cli.partition_memberships <command>`.
+#
+#   alembic upgrade 4b7f2c9d1e86                          shadow table + mirror trigger
+#   python -m app.cli.partition_memberships backfill      copy existing rows in batches
+#   python -m app.cli.partition_memberships verify        both diffs must be 0
+#   alembic upgrade head                                  copy the remainder, swap tables
+#   python -m app.cli.partition_memberships drop-old      once the old table is not needed
+
+import argparse
+import logging
+import sys
+
+from app.core.log_config import setup_logging
+from app.db import membership_partitioning
+from app.db.session import engine
+
+logger = logging.getLogger(__name__)
+
+
+def backfill(args: argparse.Namespace) -> None:
+    # Resumable: the cursor is committed with each batch, so it is safe to stop and rerun.
+    with engine.connect() as connection:
+        copied = membership_partitioning.backfill(
+            connection,
+            batch_size=args.batch_size,
+            pause=args.pause_ms / 1000,
+            max_batches=args.max_batches,
+        )
+        state = membership_partitioning.backfill_state(connection)
+    logger.info(
+        "Copied %d membership row(s); cursor=(%s, %s) done=%s",
+        copied, state["last_user_id"], state["last_team_id"], state["done"],
+    )
+
+
+def status(args: argparse.Namespace) -> None:
+    with engine.connect() as connection:
+        state = membership_partitioning.backfill_state(connection)
+    logger.info("Backfill cursor=(%s, %s) done=%s", state["last_user_id"], state["last_team_id"], state["done"])
+
+
+def verify(args: argparse.Namespace) -> None:
+    with engine.connect() as connection:
+        result = membership_partitioning.verify(connection)
+    logger.info(
+        "team_memberships=%d shadow=%d missing=%d extra=%d",
+        result["source_rows"], result["shadow_rows"], result["missing"], result["extra"],
+    )
+    if result["missing"] or result["extra"]:
+        sys.exit(1)
+
+
+def drop_old(args: argparse.Namespace) -> None:
+    with engine.connect() as connection:
+        dropped = membership_partitioning.drop_unpartitioned(connection)
+    logger.info("Dropped team_memberships_unpartitioned" if dropped else "team_memberships_unpartitioned does not exist")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli.partition_memberships")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    copy = commands.add_parser("backfill", help="Copy team_memberships into the partitioned shadow table")
+    copy.add_argument("--batch-size", type=int, default=5000)
+    copy.add_argument("--pause-ms", type=int, default=50, help="Sleep between batches to leave room for live traffic")
+    copy.add_argument("--max-batches", type=int, default=None)
+    copy.set_defaults(func=backfill)
+
+    commands.add_parser("status", help="Show the backfill cursor").set_defaults(func=status)
+    commands.add_parser("verify", help="Compare team_memberships with the shadow table").set_defaults(func=verify)
+    commands.add_parser(
+        "drop-old",
+        help="Drop team_memberships_unpartitioned, left behind by the swap migration",
+    ).set_defaults(func=drop_old)
+
+    args = parser.parse_args(argv)
+    setup_logging()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
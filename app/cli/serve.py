@@ -0,0 +1,274 @@
+# Production HTTP server, run as `python -m app.cli.serve`: preloaded app, forked uvicorn workers sized to CPUs and connection budget.
+
+import argparse
+import logging
+import math
+import os
+import signal
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.core.log_config import setup_logging, stop_logging
+from app.db import sqlite
+
+logger = logging.getLogger(__name__)
+
+# Below this a worker's lifespan threads (revocation sync, index refresh, audit writer)
+# already compete with requests for connections.
+MIN_CONNECTIONS_PER_WORKER = 2
+
+
+def available_cpus(cgroup_root: str = "/sys/fs/cgroup") -> int:
+    # CPUs this process may run on, further limited by a container CPU quota
+    # (cgroup v2 cpu.max, or v1 cfs quota/period); os.cpu_count() sees the whole host.
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    root = Path(cgroup_root)
+    try:
+        quota, period = (root / "cpu.max").read_text().split()[:2]
+    except (OSError, ValueError):
+        try:
+            quota = (root / "cpu" / "cpu.cfs_quota_us").read_text().strip()
+            period = (root / "cpu" / "cpu.cfs_period_us").read_text().strip()
+        except OSError:
+            return cpus
+    if quota not in ("max", "-1") and int(period) > 0:
+        cpus = min(cpus, math.ceil(int(quota) / int(period)))
+    return max(cpus, 1)
+
+
+def connection_budget(url: str) -> int | None:
+    # Connections this server instance may hold in total; None when the backend has no limit.
+    if make_url(url).get_backend_name() != "postgresql":
+        return None
+    max_connections = settings.DB_MAX_CONNECTIONS
+    if not max_connections:
+        probe = create_engine(url, poolclass=NullPool)
+        try:
+            with probe.connect() as connection:
+                max_connections = int(connection.execute(text("SHOW max_connections")).scalar())
+        finally:
+            probe.dispose()
+    return (max_connections - settings.DB_RESERVED_CONNECTIONS) // max(settings.SERVER_INSTANCES, 1)
+
+
+def plan(
+    cpus: int,
+    budget: int | None,
+    web_concurrency: int = 0,
+    pool_size: int = 5,
+    max_overflow: int = 10,
+) -> dict[str, int]:
+    # One worker per CPU unless WEB_CONCURRENCY says otherwise, but never more workers
+    # than the connection budget can give MIN_CONNECTIONS_PER_WORKER each. Each worker's
+    # pool (kept + overflow) is then cut down to its share of the budget, so the whole
+    # instance can never hold more than `budget` connections.
+    workers = web_concurrency or cpus
+    if budget is None:
+        return {"workers": workers, "pool_size": pool_size, "max_overflow": max_overflow}
+    if budget < MIN_CONNECTIONS_PER_WORKER:
+        raise ValueError("connection_budget_exhausted")
+    workers = min(workers, budget // MIN_CONNECTIONS_PER_WORKER)
+    share = budget // workers
+    pool_size = min(pool_size, share)
+    return {"workers": workers, "pool_size": pool_size, "max_overflow": min(max_overflow, share - pool_size)}
+
+
+class Supervisor:
+    # Forks the workers from the preloaded parent, restarts any that die, and on
+    # SIGTERM drains them: readiness fails first while requests are still served,
+    # then uvicorn stops accepting and waits for in-flight requests.
+
+    def __init__(self, app, sock, workers: int, drain_seconds: float, graceful_seconds: float) -> None:
+        self.app = app
+        self.sock = sock
+        self.workers = workers
+        self.drain_seconds = drain_seconds
+        self.graceful_seconds = graceful_seconds
+        self.children: dict[int, int] = {}
+        self._stop = threading.Event()
+        self._drain = True
+
+    def _spawn(self, slot: int) -> None:
+        pid = os.fork()
+        if pid:
+            self.children[pid] = slot
+            return
+        code = 0
+        try:
+            _run_worker(self.app, self.sock, self.graceful_seconds)
+        except BaseException:
+            logger.exception("Worker %d crashed", slot)
+            code = 1
+        finally:
+            stop_logging()
+            os._exit(code)
+
+    def _reap(self) -> list[tuple[int, int]]:
+        exited = []
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            exited.append((self.children.pop(pid), os.waitstatus_to_exitcode(status)))
+            _mark_dead(pid)
+        return exited
+
+    def _request_stop(self, signum, frame) -> None:
+        # Ctrl-C in a terminal reaches the workers too; there is no load balancer to drain.
+        self._drain = self._drain and signum == signal.SIGTERM
+        self._stop.set()
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+        for slot in range(self.workers):
+            self._spawn(slot)
+        logger.info("Started %d worker(s): %s", self.workers, sorted(self.children))
+
+        while not self._stop.wait(0.5):
+            for slot, code in self._reap():
+                if self._stop.is_set():
+                    break
+                logger.error("Worker %d exited with code %d; restarting", slot, code)
+                time.sleep(1)
+                self._spawn(slot)
+        self.shutdown()
+
+    def _signal_children(self, signum: int) -> None:
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def shutdown(self) -> None:
+        if self._drain and self.drain_seconds:
+            logger.info("Draining for %.1fs before stopping workers", self.drain_seconds)
+            self._signal_children(signal.SIGUSR1)
+            time.sleep(self.drain_seconds)
+        self._signal_children(signal.SIGTERM)
+
+        # uvicorn gives in-flight requests graceful_seconds; a little more for the
+        # lifespan shutdown (final audit flush) before anything is killed.
+        deadline = time.monotonic() + self.graceful_seconds + 5
+        while self.children and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.1)
+        if self.children:
+            logger.warning("Killing %d worker(s) that did not stop in time", len(self.children))
+            self._signal_children(signal.SIGKILL)
+            while self.children:
+                self._reap()
+                time.sleep(0.05)
+        logger.info("All workers stopped")
+
+
+def _run_worker(app, sock, graceful_seconds: float) -> None:
+    import uvicorn
+
+    from app.core.readiness import readiness
+
+    def start_draining(signum, frame):
+        logger.info("Draining: readiness now fails")
+        readiness.draining = True
+
+    signal.signal(signal.SIGUSR1, start_draining)
+    # uvicorn handles these while serving and re-raises them once it has stopped;
+    # ignoring them then lets the worker exit normally and flush its logs.
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    config = uvicorn.Config(
+        app,
+        backlog=settings.SERVER_BACKLOG,
+        timeout_keep_alive=settings.SERVER_KEEPALIVE_SECONDS,
+        timeout_graceful_shutdown=graceful_seconds,
+        # Logging is set up by the app (AccessLogMiddleware writes the access log).
+        log_config=None,
+        access_log=False,
+        proxy_headers=True,
+    )
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def _mark_dead(pid: int) -> None:
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(pid)
+
+
+def serve(host: str, port: int, workers: int | None = None) -> None:
+    import uvicorn
+
+    cpus = available_cpus()
+    budget = connection_budget(settings.DATABASE_URL)
+    if sqlite.is_memory(settings.DATABASE_URL):
+        # Every worker would get a database of its own.
+        workers = 1
+    sizing = plan(
+        cpus,
+        budget,
+        web_concurrency=workers or settings.WEB_CONCURRENCY,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+    )
+    logger.info(
+        "%d CPU(s), connection budget %s: %d worker(s), pool_size=%d max_overflow=%d",
+        cpus, budget if budget is not None else "unlimited",
+        sizing["workers"], sizing["pool_size"], sizing["max_overflow"],
+    )
+    # Must be in place before app.db.session creates the engine.
+    settings.DB_POOL_SIZE = sizing["pool_size"]
+    settings.DB_MAX_OVERFLOW = sizing["max_overflow"]
+    if settings.METRICS_ENABLED and sizing["workers"] > 1 and "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="prometheus-")
+
+    # Preload: imports, route compilation and settings parsing happen once here and the
+    # workers share those pages copy-on-write. Connections and threads are only opened
+    # after the fork (the lifespan runs in each worker).
+    from app.main import app
+
+    sock = uvicorn.Config(app, host=host, port=port, log_config=None).bind_socket()
+    # Listening before the fork lets the kernel queue connections while workers start.
+    sock.listen(settings.SERVER_BACKLOG)
+    Supervisor(
+        app,
+        sock,
+        sizing["workers"],
+        drain_seconds=settings.SHUTDOWN_DRAIN_SECONDS,
+        graceful_seconds=settings.SHUTDOWN_GRACEFUL_SECONDS,
+    ).run()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli.serve")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, help="Overrides WEB_CONCURRENCY (default: one per available CPU)")
+
+    args = parser.parse_args(argv)
+    setup_logging()
+    try:
+        serve(args.host, args.port, args.workers)
+    except ValueError as exc:
+        if str(exc) != "connection_budget_exhausted":
+            raise
+        sys.exit(
+            "Postgres max_connections leaves no room for this server: lower DB_RESERVED_CONNECTIONS "
+            "or SERVER_INSTANCES, or raise max_connections"
+        )
+
+
+if __name__ == "__main__":
+    main()
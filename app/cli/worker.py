@@ -0,0 +1,56 @@
+# Background job worker, run as `python -m app.cli.worker`; run several processes for more throughput.
+
+import argparse
+import logging
+import signal
+import threading
+import time
+
+from app.core.config import settings
+from app.core.log_config import setup_logging
+from app.db.session import SessionLocal
+from app.services import job_handlers, job_service
+
+logger = logging.getLogger(__name__)
+
+
+def run_worker(kinds: list[str] | None, poll_interval: float, once: bool = False) -> None:
+    stop = threading.Event()
+
+    def request_stop(signum, frame):
+        # The job in progress is finished (its batches are already committed incrementally).
+        logger.info("Worker stopping after the current job")
+        stop.set()
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    last_sweep = 0.0
+    while not stop.is_set():
+        with SessionLocal() as db:
+            if time.monotonic() - last_sweep > settings.JOB_STALE_SECONDS / 2:
+                recovered = job_service.requeue_stale(db)
+                if recovered:
+                    logger.warning("Recovered %d stale job(s)", recovered)
+                last_sweep = time.monotonic()
+            job = job_handlers.process_next(db, kinds)
+
+        if job is None:
+            if once:
+                return
+            stop.wait(poll_interval)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli.worker")
+    parser.add_argument("--kind", action="append", dest="kinds", choices=sorted(job_handlers.HANDLERS))
+    parser.add_argument("--poll-interval", type=float, default=settings.JOB_POLL_SECONDS)
+    parser.add_argument("--once", action="store_true", help="Exit when the queue is empty")
+
+    args = parser.parse_args(argv)
+    setup_logging()
+    run_worker(args.kinds, args.poll_interval, once=args.once)
+
+
+if __name__ == "__main__":
+    main()
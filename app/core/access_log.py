@@ -0,0 +1,111 @@
+# Structured access log: ASGI middleware that emits one record per request, plus DB timing hooks.
+
+import logging
+import random
+import time
+import uuid
+
+from fastapi import routing
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.deadline import parse_timeout_header
+from app.core.request_context import (
+    RequestContext,
+    bind_request_context,
+    get_request_context,
+    reset_request_context,
+)
+
+logger = logging.getLogger("app.access")
+
+
+def install_db_timing(engine: Engine) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_started"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        ctx = get_request_context()
+        started = conn.info.pop("query_started", None)
+        if ctx is not None and started is not None:
+            ctx.db_time += time.perf_counter() - started
+            ctx.db_queries += 1
+
+
+class AccessLogMiddleware:
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = _header(scope, b"x-request-id") or uuid.uuid4().hex
+        ctx = RequestContext(request_id)
+        ctx.requested_timeout = parse_timeout_header(_header(scope, b"x-request-timeout-ms"))
+        token = bind_request_context(ctx)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = [*message.get("headers", []), (b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            reset_request_context(token)
+            if status_code >= 400 or random.random() < settings.ACCESS_LOG_SAMPLE_RATE:
+                _log(scope, ctx, status_code)
+
+
+def _header(scope, name: bytes) -> str | None:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")[:128]
+    return None
+
+
+def route_template(scope) -> str | None:
+    # Included routers hand the original APIRoute (without its mount prefix) to
+    # the scope, so the full template is looked up from the app's route contexts.
+    route = scope.get("route")
+    if route is None:
+        return None
+    app = scope.get("app")
+    templates = getattr(app.state, "route_templates", None)
+    if templates is None and hasattr(routing, "iter_route_contexts"):
+        templates = {
+            id(context.original_route): context.path_format
+            for context in routing.iter_route_contexts(app.routes)
+        }
+        app.state.route_templates = templates
+    return (templates or {}).get(id(route), getattr(route, "path", None))
+
+
+def _log(scope, ctx: RequestContext, status_code: int) -> None:
+    # Only raw values are captured here; the JSON encoding happens on the log listener thread.
+    logger.info(
+        "%s %s %s",
+        scope["method"],
+        scope["path"],
+        status_code,
+        extra={
+            "request_id": ctx.request_id,
+            "method": scope["method"],
+            "route": route_template(scope),
+            "path": scope["path"],
+            "status": status_code,
+            "latency_ms": round((time.perf_counter() - ctx.started) * 1000, 3),
+            "db_ms": round(ctx.db_time * 1000, 3),
+            "db_queries": ctx.db_queries,
+            "user_id": ctx.user_id,
+            "team_id": ctx.team_id,
+        },
+    )
@@ -0,0 +1,143 @@
+# Admission control: per-budget adaptive concurrency limits with a bounded, deadline-limited queue.
+
+import asyncio
+import json
+import math
+import time
+from collections import deque
+
+from app.core import metrics
+
+
+class AdaptiveLimiter:
+    # Gradient-style limit (as in Netflix's concurrency-limits): a fast moving
+    # average of request latency is compared with a slow one. While they agree the
+    # limit drifts up towards max_limit; when recent requests get slower than
+    # TOLERANCE times the long-term average, the limit shrinks proportionally, so
+    # the excess waits in (and is shed from) the admission queue instead of piling
+    # into the threadpool and the DB pool.
+    #
+    # Everything runs on the event loop thread, so no locking is needed.
+
+    TOLERANCE = 1.5
+
+    def __init__(self, name: str, max_limit: int, queue_timeout: float, min_limit: int = 1) -> None:
+        self.name = name
+        self.max_limit = max_limit
+        self.min_limit = min(min_limit, max_limit)
+        self.queue_timeout = queue_timeout
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._short_rtt: float | None = None
+        self._long_rtt: float | None = None
+
+    async def acquire(self) -> str | None:
+        # Returns None when admitted, otherwise the rejection reason.
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return None
+        if len(self._waiters) >= int(self.limit):
+            return "queue_full"
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+            return None
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                return None  # the slot was handed over just as the deadline hit
+            self._discard(waiter)
+            return "queue_timeout"
+        except asyncio.CancelledError:
+            # Client went away while queued; give back a slot we may already own.
+            if waiter.done() and not waiter.cancelled():
+                self._pass_on()
+            else:
+                self._discard(waiter)
+            raise
+
+    def release(self, latency: float) -> None:
+        self._update_limit(latency)
+        self._pass_on()
+
+    def _discard(self, waiter: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _pass_on(self) -> None:
+        # Hand the slot straight to the oldest waiter so in_flight never dips and re-races.
+        while self._waiters and self.in_flight <= int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def _update_limit(self, latency: float) -> None:
+        if self._short_rtt is None:
+            self._short_rtt = self._long_rtt = latency
+            return
+        self._short_rtt += (latency - self._short_rtt) * 0.1
+        self._long_rtt += (latency - self._long_rtt) * 0.002
+        # After a long overload the slow average lags; let it catch up on recovery.
+        if self._long_rtt > self._short_rtt * 2:
+            self._long_rtt *= 0.95
+
+        gradient = max(0.5, min(1.0, self.TOLERANCE * self._long_rtt / self._short_rtt))
+        target = self.limit * gradient + math.sqrt(self.limit)
+        self.limit = max(self.min_limit, min(self.max_limit, self.limit * 0.8 + target * 0.2))
+        metrics.observe_admission_limit(self.name, self.limit)
+
+
+_OVERLOADED = json.dumps({"detail": "Server overloaded, retry later"}).encode()
+
+
+class AdmissionControlMiddleware:
+    def __init__(self, app, budgets: dict[str, AdaptiveLimiter], exempt_suffixes: tuple[str, ...] = ()) -> None:
+        self.app = app
+        # Longest prefix first so a specific budget wins over a catch-all one.
+        self.budgets = sorted(budgets.items(), key=lambda item: len(item[0]), reverse=True)
+        self.exempt_suffixes = exempt_suffixes
+
+    def _limiter_for(self, path: str) -> AdaptiveLimiter | None:
+        if path.endswith(self.exempt_suffixes):
+            return None
+        for prefix, limiter in self.budgets:
+            if path.startswith(prefix):
+                return limiter
+        return None
+
+    async def __call__(self, scope, receive, send):
+        limiter = self._limiter_for(scope["path"]) if scope["type"] == "http" else None
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        rejected = await limiter.acquire()
+        if rejected is not None:
+            metrics.record_admission_rejection(limiter.name, rejected)
+            await _reject(send)
+            return
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.perf_counter() - started)
+
+
+async def _reject(send) -> None:
+    await send({
+        "type": "http.response.start",
+        "status": 503,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(_OVERLOADED)).encode()),
+            (b"retry-after", b"1"),
+        ],
+    })
+    await send({"type": "http.response.body", "body": _OVERLOADED})
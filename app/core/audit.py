@@ -0,0 +1,163 @@
+# Authorization audit trail: events are buffered in memory and written in batches by a background thread.
+
+import json
+import logging
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy import insert
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.request_context import get_request_context
+from app.models.audit_event import AuditEvent
+
+logger = logging.getLogger(__name__)
+
+OK = "ok"
+DENIED = "denied"
+
+_COLUMNS = ("created_at", "action", "outcome", "actor_id", "team_id", "target_user_id", "request_id", "detail")
+
+
+class AuditLog:
+    # The request path only appends a dict to a bounded deque. A writer thread drains
+    # it every AUDIT_FLUSH_INTERVAL_SECONDS, or as soon as a full batch is waiting, with
+    # one COPY (psycopg 3) or executemany INSERT per batch.
+
+    def __init__(self) -> None:
+        self._events: deque[dict[str, Any]] = deque()
+        self._room = threading.Condition()
+        self._batch_ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._session_factory = None
+        self.dropped = 0
+
+    def record(
+        self,
+        action: str,
+        outcome: str = OK,
+        actor_id: int | None = None,
+        team_id: int | None = None,
+        target_user_id: int | None = None,
+        detail: dict[str, Any] | None = None,
+        essential: bool = True,
+    ) -> bool:
+        if not settings.AUDIT_ENABLED:
+            return False
+
+        ctx = get_request_context()
+        event = {
+            "created_at": datetime.now(timezone.utc),
+            "action": action,
+            "outcome": outcome,
+            "actor_id": actor_id,
+            "team_id": team_id,
+            "target_user_id": target_user_id,
+            "request_id": ctx.request_id if ctx is not None else None,
+            "detail": detail,
+        }
+        capacity = settings.AUDIT_BUFFER_SIZE
+        with self._room:
+            if len(self._events) >= capacity:
+                # Backpressure: a mutation waits briefly for the writer to make room.
+                # Denials can be produced at any rate by a client, so they never wait.
+                has_room = essential and self._room.wait_for(
+                    lambda: len(self._events) < capacity,
+                    timeout=settings.AUDIT_ENQUEUE_TIMEOUT_MS / 1000,
+                )
+                if not has_room:
+                    self._drop(action)
+                    return False
+            self._events.append(event)
+            if len(self._events) >= settings.AUDIT_BATCH_SIZE:
+                self._batch_ready.set()
+        return True
+
+    def _drop(self, action: str, count: int = 1) -> None:
+        self.dropped += count
+        metrics.record_audit_drop(action, count)
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def _take_batch(self) -> list[dict[str, Any]]:
+        with self._room:
+            size = min(len(self._events), settings.AUDIT_BATCH_SIZE)
+            batch = [self._events.popleft() for _ in range(size)]
+            if size:
+                self._room.notify_all()
+        return batch
+
+    def _requeue(self, batch: list[dict[str, Any]]) -> None:
+        # A failed batch goes back to the front, oldest first, as far as there is room.
+        with self._room:
+            room = max(settings.AUDIT_BUFFER_SIZE - len(self._events), 0)
+            kept = batch[:room]
+            self._events.extendleft(reversed(kept))
+        for event in batch[len(kept):]:
+            self._drop(event["action"])
+
+    def flush(self, session_factory=None) -> int:
+        session_factory = session_factory or self._session_factory
+        written = 0
+        while batch := self._take_batch():
+            try:
+                with session_factory() as db:
+                    _write(db, batch)
+            except Exception:
+                self._requeue(batch)
+                raise
+            written += len(batch)
+        return written
+
+    def start(self, session_factory, interval: float) -> None:
+        self._session_factory = session_factory
+
+        def _loop() -> None:
+            while not self._stop.is_set():
+                self._batch_ready.wait(interval)
+                self._batch_ready.clear()
+                try:
+                    self.flush()
+                except Exception:
+                    logger.exception("Audit flush failed; %d event(s) buffered", len(self._events))
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=_loop, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        # Called on shutdown: stop the writer, then write whatever is still buffered.
+        self._stop.set()
+        self._batch_ready.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self._session_factory is not None:
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Final audit flush failed; %d event(s) lost", len(self._events))
+
+
+def _write(db, batch: list[dict[str, Any]]) -> None:
+    connection = db.connection()
+    if connection.dialect.driver == "psycopg":
+        # COPY streams the whole batch in one round trip with no per-row statement.
+        with connection.connection.driver_connection.cursor() as cursor:
+            with cursor.copy(f"COPY audit_events ({', '.join(_COLUMNS)}) FROM STDIN") as copy:
+                for event in batch:
+                    copy.write_row([
+                        json.dumps(event[c]) if c == "detail" and event[c] is not None else event[c]
+                        for c in _COLUMNS
+                    ])
+    else:
+        db.execute(insert(AuditEvent), batch)
+    db.commit()
+
+
+audit_log = AuditLog()
@@ -9,9 +9,125 @@ class Settings(BaseSettings):
     APP_ENV: str = "local"
     DATABASE_URL: str
 
-    JWT_SECRET_KEY: str
+    # With the psycopg 3 driver (postgresql+psycopg://), a statement is prepared
+    # server-side once it has run DB_PREPARE_THRESHOLD times on a connection. Turn
+    # DB_PREPARED_STATEMENTS off behind a transaction-mode pgbouncer.
+    DB_PREPARED_STATEMENTS: bool = True
+    DB_PREPARE_THRESHOLD: int = 2
+
+    # Connections per process: DB_POOL_SIZE kept open, up to DB_MAX_OVERFLOW more under
+    # load. `python -m app.cli.serve` sets both per worker from the connection budget.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+
+    # SQLite backend (DATABASE_URL=sqlite:///./app.db, or sqlite:// in memory): WAL
+    # journal, one write transaction at a time. busy_timeout is also how long a writer
+    # waits for its turn. Cache is per connection; the mmap is shared by all of them.
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_SYNCHRONOUS: str = "NORMAL"  # FULL: fsync on every commit
+    SQLITE_CACHE_MB: int = 16
+    SQLITE_MMAP_MB: int = 256
+
+    # Production launcher (`python -m app.cli.serve`). WEB_CONCURRENCY=0 sizes the worker
+    # count from the CPUs available to the container. All SERVER_INSTANCES replicas
+    # together stay within Postgres max_connections (or DB_MAX_CONNECTIONS when set)
+    # minus DB_RESERVED_CONNECTIONS, kept for job workers, migrations and psql.
+    WEB_CONCURRENCY: int = 0
+    SERVER_INSTANCES: int = 1
+    DB_MAX_CONNECTIONS: int = 0
+    DB_RESERVED_CONNECTIONS: int = 10
+    SERVER_BACKLOG: int = 2048
+    # Keep above the load balancer's idle timeout, or it reuses connections we closed.
+    SERVER_KEEPALIVE_SECONDS: float = 75
+    # On SIGTERM /health/ready fails for SHUTDOWN_DRAIN_SECONDS while requests are still
+    # served (so the load balancer stops routing here), then in-flight requests get up
+    # to SHUTDOWN_GRACEFUL_SECONDS to finish.
+    SHUTDOWN_DRAIN_SECONDS: float = 5
+    SHUTDOWN_GRACEFUL_SECONDS: float = 30
+
+    # bcrypt work factor for new password hashes (existing hashes keep theirs). The test
+    # suite lowers it to 4, the minimum; never do that in a deployment.
+    BCRYPT_ROUNDS: int = 12
+
+    # HS* algorithms sign with JWT_SECRET_KEY. RS*/ES* algorithms sign with
+    # JWT_KEYS_DIR/<JWT_ACTIVE_KEY_ID>.pem and verify with every key in the directory.
+    JWT_SECRET_KEY: str = ""
     JWT_ALGORITHM: str = "HS256"
-    JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    JWT_KEYS_DIR: str | None = None
+    JWT_ACTIVE_KEY_ID: str | None = None
+    JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = 5
+    JWT_REFRESH_TOKEN_EXPIRE_DAYS: int = 14
+    TOKEN_REVOCATION_SYNC_SECONDS: float = 2.0
+
+    LOG_FORMAT: str = "json"  # or "text"
+    LOG_QUEUE_SIZE: int = 10_000
+    # Fraction of successful (< 400) requests written to the access log; errors are always logged.
+    ACCESS_LOG_SAMPLE_RATE: float = 1.0
+
+    # Default per-request time budget (0 disables); routes may set their own and
+    # clients may shorten it with X-Request-Timeout-Ms. Enforced on every query.
+    REQUEST_TIMEOUT_MS: float = 10_000
+
+    # Completed Idempotency-Key responses are replayed for this long. A key whose first
+    # request is still running (or crashed) is blocked for IDEMPOTENCY_CLAIM_SECONDS.
+    IDEMPOTENCY_KEY_TTL_HOURS: float = 24
+    IDEMPOTENCY_CLAIM_SECONDS: float = 60
+
+    # Background jobs (`python -m app.cli.worker`). A running job that hasn't reported
+    # progress for JOB_STALE_SECONDS is assumed dead and requeued, up to JOB_MAX_ATTEMPTS.
+    JOB_POLL_SECONDS: float = 1.0
+    JOB_BATCH_SIZE: int = 500
+    JOB_STALE_SECONDS: float = 300
+    JOB_MAX_ATTEMPTS: int = 3
+
+    # Team deletion and user deactivation remove memberships DELETE_BATCH_SIZE rows per
+    # transaction, sleeping DELETE_BATCH_PAUSE_MS between batches so concurrent reads and
+    # writes on the same rows (and replicas/vacuum) keep up.
+    DELETE_BATCH_SIZE: int = 1000
+    DELETE_BATCH_PAUSE_MS: float = 10
+
+    # Audit trail of membership changes and denied permission checks. Events wait in a
+    # buffer of AUDIT_BUFFER_SIZE and are written AUDIT_BATCH_SIZE at a time, at least
+    # every AUDIT_FLUSH_INTERVAL_SECONDS. When the buffer is full a mutation waits up to
+    # AUDIT_ENQUEUE_TIMEOUT_MS for room; denials are dropped at once (and counted).
+    AUDIT_ENABLED: bool = True
+    AUDIT_BUFFER_SIZE: int = 10_000
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 1.0
+    AUDIT_ENQUEUE_TIMEOUT_MS: float = 50
+    AUDIT_QUERY_MAX_DAYS: int = 31
+
+    # Accounts allowed to use the admin endpoints (bulk export), as a JSON list, e.g.
+    # ADMIN_EMAILS='["ops@example.com"]'. Empty disables them.
+    ADMIN_EMAILS: list[str] = []
+
+    # Exports are sent in chunks of about EXPORT_CHUNK_BYTES; without COPY (other
+    # drivers/backends) rows are fetched EXPORT_FETCH_ROWS at a time.
+    EXPORT_CHUNK_BYTES: int = 256 * 1024
+    EXPORT_FETCH_ROWS: int = 5000
+
+    # Concurrency budgets per worker. Auth is bcrypt/CPU bound (size it near the core
+    # count); teams is DB bound (size it near the pool size). The adaptive limit stays
+    # at or below these, and queued requests are shed after ADMISSION_QUEUE_TIMEOUT_MS.
+    ADMISSION_CONTROL_ENABLED: bool = True
+    ADMISSION_AUTH_CONCURRENCY: int = 8
+    ADMISSION_TEAMS_CONCURRENCY: int = 32
+    ADMISSION_QUEUE_TIMEOUT_MS: float = 250.0
+
+    # /health/ready re-pings the database at most once per READINESS_CACHE_SECONDS.
+    READINESS_CACHE_SECONDS: float = 2.0
+    READINESS_MAX_POOL_WAIT_MS: float = 200.0
+    READINESS_MAX_PING_MS: float = 250.0
+
+    # Exposes /metrics; set PROMETHEUS_MULTIPROC_DIR too when running several workers.
+    METRICS_ENABLED: bool = False
+
+    MEMBERSHIP_INDEX_ENABLED: bool = False
+    MEMBERSHIP_INDEX_REFRESH_SECONDS: float = 5.0
+    MEMBERSHIP_INDEX_REBUILD_SECONDS: float = 300.0
+
+    MEMBER_CHANGES_MAX_WAIT_SECONDS: float = 30.0
+    MEMBER_CHANGES_POLL_SECONDS: float = 1.0
 
 
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,105 @@
+# Request deadlines: per-route/header time budgets enforced on every query and pushed to Postgres as statement_timeout.
+
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.request_context import RequestContext, get_request_context
+
+# Postgres SQLSTATE for "canceling statement due to statement timeout".
+_QUERY_CANCELED = "57014"
+
+# Connection.info key: the statement_timeout (ms) in force for the current transaction.
+_TIMEOUT_MS = "deadline_statement_timeout_ms"
+# Once less than this share of that timeout is left in the budget, it is lowered again.
+_TIGHTEN_BELOW = 0.75
+
+_SET_TIMEOUT = "SELECT set_config('statement_timeout', %(ms)s, true)"
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+def parse_timeout_header(value: str | None) -> float | None:
+    # X-Request-Timeout-Ms; clients may only shorten the route's budget, never extend it.
+    if not value:
+        return None
+    try:
+        timeout_ms = float(value)
+    except ValueError:
+        return None
+    return timeout_ms / 1000 if timeout_ms > 0 else None
+
+
+def remaining(ctx: RequestContext) -> float | None:
+    timeout = ctx.route_timeout
+    if timeout is None and settings.REQUEST_TIMEOUT_MS > 0:
+        timeout = settings.REQUEST_TIMEOUT_MS / 1000
+    if ctx.requested_timeout is not None:
+        timeout = ctx.requested_timeout if timeout is None else min(timeout, ctx.requested_timeout)
+    if timeout is None:
+        return None
+    return ctx.started + timeout - time.perf_counter()
+
+
+def route_timeout(seconds: float):
+    # Route-level default, e.g. dependencies=[Depends(route_timeout(60))].
+    def set_route_timeout() -> None:
+        ctx = get_request_context()
+        if ctx is not None:
+            ctx.route_timeout = seconds
+
+    return set_route_timeout
+
+
+def is_statement_timeout(exc: DBAPIError) -> bool:
+    return getattr(exc.orig, "sqlstate", None) == _QUERY_CANCELED or getattr(exc.orig, "pgcode", None) == _QUERY_CANCELED
+
+
+def install_deadlines(engine: Engine, session_factory: sessionmaker) -> None:
+    @event.listens_for(session_factory, "after_begin")
+    def _set_statement_timeout(session, transaction, connection):
+        # Each transaction is capped by what is left of the budget when it starts;
+        # later statements in it are additionally checked in-process below.
+        ctx = get_request_context()
+        left = remaining(ctx) if ctx is not None else None
+        if left is None or connection.dialect.name != "postgresql":
+            return
+        if left <= 0:
+            raise DeadlineExceeded()
+        # set_config(..., true) is SET LOCAL with the value as a parameter, so the SQL text
+        # stays constant and doesn't churn psycopg's prepared-statement cache.
+        timeout_ms = max(int(left * 1000), 1)
+        connection.exec_driver_sql(_SET_TIMEOUT, {"ms": str(timeout_ms)})
+        connection.info[_TIMEOUT_MS] = timeout_ms
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _check_deadline(conn, cursor, statement, parameters, context, executemany):
+        ctx = get_request_context()
+        left = remaining(ctx) if ctx is not None else None
+        if left is None:
+            return
+        if left <= 0:
+            raise DeadlineExceeded()
+
+        # The transaction's timeout was what was left when it began; after a slow first
+        # half, a statement could still run past the request. Lower it once the budget
+        # has shrunk well below it, on a cursor of its own (this one may be server-side).
+        timeout_ms = conn.info.get(_TIMEOUT_MS)
+        left_ms = max(int(left * 1000), 1)
+        if timeout_ms is not None and left_ms < timeout_ms * _TIGHTEN_BELOW:
+            with conn.connection.dbapi_connection.cursor() as tighten:
+                tighten.execute(_SET_TIMEOUT, {"ms": str(left_ms)})
+            conn.info[_TIMEOUT_MS] = left_ms
+
+    def _end(conn):
+        # SET LOCAL ends with the transaction.
+        conn.info.pop(_TIMEOUT_MS, None)
+
+    event.listen(engine, "commit", _end)
+    event.listen(engine, "rollback", _end)
@@ -1,8 +1,19 @@
-# Role enum (admin, member, viewer).
+# Role enum (admin, member, viewer), membership change event types, and background job states.
 
 from enum import Enum
 
 class Role(str, Enum):
     admin = "admin"
     member = "member"
-    viewer = "viewer"
\ No newline at end of file
+    viewer = "viewer"
+
+class MembershipEventType(str, Enum):
+    added = "added"
+    removed = "removed"
+    role_changed = "role_changed"
+
+class JobStatus(str, Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
@@ -1,11 +1,97 @@
-# Logging setup configuration.
+# Logging setup configuration: handlers sit behind a queue so formatting and I/O run off the request path.
 
+import atexit
+import json
 import logging
+import os
+import queue
 import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from app.core.config import settings
+
+_listener: QueueListener | None = None
+
+# LogRecord attributes that are not user-supplied `extra` fields.
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, separators=(",", ":"))
+
+
+class _DeferredQueueHandler(QueueHandler):
+    # The stock QueueHandler formats the message in the caller's thread before enqueueing.
+    # Records stay in-process here, so hand them over untouched and let the listener
+    # thread do all formatting. When the queue is full the record is dropped rather
+    # than blocking a request.
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            type(self).dropped += 1
+            # Imported here: app.cli.serve sets up logging before it decides on
+            # PROMETHEUS_MULTIPROC_DIR, which must be in place when metrics is imported.
+            from app.core import metrics
+
+            metrics.record_log_drop(record.levelname)
+
 
 def setup_logging() -> None:
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s %(levelname)s %(name)s - %(message)s",
-        handlers=[logging.StreamHandler(sys.stdout)],
-    )
+    global _listener
+    if _listener is not None:
+        return
+
+    if settings.LOG_FORMAT == "json":
+        formatter: logging.Formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter("%(asctime)s %(levelname)s %(name)s - %(message)s")
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(formatter)
+
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.handlers = [_DeferredQueueHandler(log_queue)]
+
+
+def _restart_after_fork() -> None:
+    # The listener thread does not survive fork(); give the child its own queue and thread.
+    global _listener
+    if _listener is not None:
+        _listener = None
+        setup_logging()
+
+
+os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+def stop_logging() -> None:
+    # Drains whatever is still queued.
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
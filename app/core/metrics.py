@@ -0,0 +1,189 @@
+# Prometheus metrics: per-route latency, in-flight requests, auth failures, password hashing, dropped log records and DB pool usage.
+
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.access_log import route_template
+from app.core.config import settings
+
+# Checked by every recording helper, so a disabled deployment pays one attribute
+# lookup per call site and the request middleware / pool listeners are never installed.
+enabled = settings.METRICS_ENABLED
+
+# With several uvicorn workers, prometheus_client keeps each worker's samples in
+# mmap'd files under PROMETHEUS_MULTIPROC_DIR (which must be set in the environment
+# before the app is imported) and the scraping worker merges them on /metrics.
+_multiprocess = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by route template.",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Requests currently being handled.",
+    multiprocess_mode="livesum",
+)
+AUTH_FAILURES = Counter(
+    "auth_failures_total",
+    "Rejected requests by status code and reason.",
+    ["status", "reason"],
+)
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_seconds",
+    "Time spent in bcrypt.",
+    ["operation"],
+    buckets=(0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0),
+)
+ADMISSION_REJECTED = Counter(
+    "admission_rejected_total",
+    "Requests shed by admission control.",
+    ["budget", "reason"],
+)
+ADMISSION_LIMIT = Gauge(
+    "admission_concurrency_limit",
+    "Current adaptive concurrency limit.",
+    ["budget"],
+    multiprocess_mode="livesum",
+)
+IDEMPOTENT_REPLAYS = Counter(
+    "idempotent_replays_total",
+    "Retried requests answered without re-running the operation.",
+    ["source"],
+)
+AUDIT_EVENTS_DROPPED = Counter(
+    "audit_events_dropped_total",
+    "Audit events lost because the buffer stayed full (or a failed batch didn't fit back).",
+    ["action"],
+)
+LOG_RECORDS_DROPPED = Counter(
+    "log_records_dropped_total",
+    "Log records lost because the logging queue was full.",
+    ["level"],
+)
+SINGLEFLIGHT_CALLS = Counter(
+    "singleflight_calls_total",
+    "Coalesced reads; coalescing ratio = follower / (leader + follower).",
+    ["group", "role"],
+)
+DB_POOL_SIZE = Gauge("db_pool_size", "Configured pool size.", multiprocess_mode="livesum")
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out", "Connections currently checked out.", multiprocess_mode="livesum"
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow", "Connections open beyond pool_size.", multiprocess_mode="livesum"
+)
+
+
+def record_auth_failure(status_code: int, reason: str) -> None:
+    if enabled:
+        AUTH_FAILURES.labels(str(status_code), reason).inc()
+
+
+def observe_password_hash(operation: str, seconds: float) -> None:
+    if enabled:
+        PASSWORD_HASH_SECONDS.labels(operation).observe(seconds)
+
+
+def record_admission_rejection(budget: str, reason: str) -> None:
+    if enabled:
+        ADMISSION_REJECTED.labels(budget, reason).inc()
+
+
+def observe_admission_limit(budget: str, limit: float) -> None:
+    if enabled:
+        ADMISSION_LIMIT.labels(budget).set(limit)
+
+
+def record_idempotent_replay(source: str) -> None:
+    if enabled:
+        IDEMPOTENT_REPLAYS.labels(source).inc()
+
+
+def record_audit_drop(action: str, count: int = 1) -> None:
+    if enabled:
+        AUDIT_EVENTS_DROPPED.labels(action).inc(count)
+
+
+def record_log_drop(level: str) -> None:
+    if enabled:
+        LOG_RECORDS_DROPPED.labels(level).inc()
+
+
+def record_singleflight(group: str, leader: bool) -> None:
+    if enabled:
+        SINGLEFLIGHT_CALLS.labels(group, "leader" if leader else "follower").inc()
+
+
+def install_pool_metrics(engine: Engine) -> None:
+    pool = engine.pool
+    if not hasattr(pool, "checkedout"):
+        return
+
+    def _update(*_args) -> None:
+        DB_POOL_CHECKED_OUT.set(pool.checkedout())
+        DB_POOL_OVERFLOW.set(max(pool.overflow(), 0))
+
+    DB_POOL_SIZE.set(pool.size())
+    event.listen(pool, "checkout", _update)
+    event.listen(pool, "checkin", _update)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    if _multiprocess:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid: int) -> None:
+    # Drops a dead worker's live gauges so in-flight / pool totals stay accurate.
+    if _multiprocess:
+        multiprocess.mark_process_dead(pid)
+
+
+class MetricsMiddleware:
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            # Unmatched paths share one label so scanners can't blow up cardinality.
+            route = route_template(scope) or "unmatched"
+            REQUEST_LATENCY.labels(scope["method"], route, f"{status_code // 100}xx").observe(
+                time.perf_counter() - started
+            )
@@ -9,6 +9,9 @@ TEAM_MEMBER_LIST = "team:member:list"
 TEAM_MEMBER_ADD = "team:member:add"
 TEAM_MEMBER_REMOVE = "team:member:remove"
 TEAM_MEMBER_CHANGE_ROLE = "team:member:change_role"
+TEAM_HIERARCHY_MANAGE = "team:hierarchy:manage"
+TEAM_DELETE = "team:delete"
+TEAM_AUDIT_READ = "team:audit:read"
 
 ROLE_PERMISSIONS: dict[Role, set[str]] = {
     Role.viewer: {
@@ -25,8 +28,17 @@ ROLE_PERMISSIONS: dict[Role, set[str]] = {
         TEAM_MEMBER_ADD,
         TEAM_MEMBER_REMOVE,
         TEAM_MEMBER_CHANGE_ROLE,
+        TEAM_HIERARCHY_MANAGE,
+        TEAM_DELETE,
+        TEAM_AUDIT_READ,
     },
 }
 
+# Actions the in-process membership index may authorize on its own. It can lag other
+# workers' changes by a refresh interval (team moves: a rebuild), so everything else is
+# checked against the database.
+INDEX_ACTIONS = {TEAM_READ, TEAM_MEMBER_LIST}
+
+
 def role_allows(role: Role, action: str) -> bool:
     return action in ROLE_PERMISSIONS.get(role, set())
\ No newline at end of file
@@ -0,0 +1,45 @@
+# Per-request context (request id, user, team, DB time) shared by logging and other cross-cutting middleware.
+
+import time
+from contextvars import ContextVar
+
+
+class RequestContext:
+    # A single mutable object per request: sync dependencies and endpoints run in the
+    # threadpool with a *copy* of the context, so they mutate this object rather than
+    # setting context variables of their own.
+    __slots__ = (
+        "request_id",
+        "user_id",
+        "team_id",
+        "started",
+        "db_time",
+        "db_queries",
+        "requested_timeout",
+        "route_timeout",
+    )
+
+    def __init__(self, request_id: str) -> None:
+        self.request_id = request_id
+        self.user_id: int | None = None
+        self.team_id: int | None = None
+        self.started = time.perf_counter()
+        self.db_time = 0.0
+        self.db_queries = 0
+        self.requested_timeout: float | None = None
+        self.route_timeout: float | None = None
+
+
+_current: ContextVar[RequestContext | None] = ContextVar("request_context", default=None)
+
+
+def get_request_context() -> RequestContext | None:
+    return _current.get()
+
+
+def bind_request_context(ctx: RequestContext | None):
+    return _current.set(ctx)
+
+
+def reset_request_context(token) -> None:
+    _current.reset(token)
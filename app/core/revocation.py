@@ -0,0 +1,94 @@
+# In-memory denylist of revoked session ids, checked on every authenticated request and synced from the DB in the background.
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.models.refresh_token import RefreshToken
+
+logger = logging.getLogger(__name__)
+
+# revoked_at is stamped before commit, so a slow transaction can land behind the watermark.
+_SYNC_OVERLAP = timedelta(seconds=30)
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+class RevocationList:
+    # session id -> unix time after which every access token of that session has expired
+    # anyway. Entries drop out once they pass that point, so the list only ever holds
+    # sessions revoked within the last access-token lifetime.
+
+    def __init__(self) -> None:
+        self._entries: dict[str, float] = {}
+        self._watermark = datetime.now(timezone.utc)
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def revoke(self, session_id: str, revoked_at: datetime | None = None) -> None:
+        revoked_at = _as_utc(revoked_at) if revoked_at else datetime.now(timezone.utc)
+        until = revoked_at + timedelta(minutes=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES)
+        self._entries[session_id] = until.timestamp()
+
+    def is_revoked(self, session_id: str | None) -> bool:
+        if session_id is None:
+            return False
+        until = self._entries.get(session_id)
+        return until is not None and until > time.time()
+
+    def purge(self) -> None:
+        now = time.time()
+        for session_id, until in list(self._entries.items()):
+            if until <= now:
+                self._entries.pop(session_id, None)
+
+    def sync(self, db) -> int:
+        # Pick up revocations committed by other workers since the last sync.
+        rows = db.execute(
+            select(RefreshToken.session_id, RefreshToken.revoked_at)
+            .where(RefreshToken.revoked_at > self._watermark - _SYNC_OVERLAP)
+            .distinct()
+        ).all()
+        for session_id, revoked_at in rows:
+            self.revoke(session_id, revoked_at)
+            revoked_at = _as_utc(revoked_at)
+            if revoked_at > self._watermark:
+                self._watermark = revoked_at
+        self.purge()
+        return len(rows)
+
+    def start(self, session_factory, interval: float) -> None:
+        # Start far enough back to cover access tokens that are still live after a restart.
+        self._watermark = datetime.now(timezone.utc) - timedelta(minutes=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES)
+
+        def _loop() -> None:
+            while True:
+                try:
+                    with session_factory() as db:
+                        self.sync(db)
+                except Exception:
+                    logger.exception("Token revocation sync failed")
+                if self._stop.wait(interval):
+                    return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=_loop, name="revocation-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+revocation_list = RevocationList()
@@ -1,33 +1,119 @@
-# Password hashing/verification and JWT creation/decoding utilities.
+# Password hashing/verification, JWT creation/decoding, and refresh token helpers.
 
 import bcrypt 
+import hashlib
+import secrets
+import time
+import uuid
 from datetime import datetime, timedelta, timezone
-from jose import jwt
+from functools import lru_cache
+from pathlib import Path
+from jose import jwk, jwt
+from jose.backends.base import Key
+from jose.exceptions import JWTError
+from app.core import metrics
 from app.core.config import settings
 
 
 def hash_password(password: str) -> bytes:
     password_bytes = password.encode("utf-8") 
-    salt = bcrypt.gensalt() 
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
+    started = time.perf_counter()
     hashed_password = bcrypt.hashpw(password_bytes, salt)
+    metrics.observe_password_hash("hash", time.perf_counter() - started)
     return hashed_password
 
 
 def verify_password(password: str, hashed_password: bytes) -> bool:
     password_bytes = password.encode("utf-8")
     stored_hash = hashed_password 
+    started = time.perf_counter()
     is_valid = bcrypt.checkpw(password_bytes, stored_hash)
+    metrics.observe_password_hash("verify", time.perf_counter() - started)
     return is_valid
 
 
-def create_access_token(subject: str) -> str:
+def create_access_token(subject: str, session_id: str | None = None) -> str:
     expire = datetime.now(timezone.utc) + timedelta(minutes=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES)
     # payload is the decoded data section of the token that contains claims like user ID, email, expiration.
-    payload = {"sub": subject, "exp": expire} 
-    access_token = jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+    payload = {"sub": subject, "exp": expire, "jti": uuid.uuid4().hex} 
+    if session_id is not None:
+        payload["sid"] = session_id
+    keys = get_signing_keys()
+    headers = {"kid": keys.active_kid} if keys.active_kid else None
+    access_token = jwt.encode(payload, keys.signing_key, algorithm=settings.JWT_ALGORITHM, headers=headers)
     return access_token
 
 
 def decode_access_token(token: str) -> dict:
-    payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
-    return payload
\ No newline at end of file
+    keys = get_signing_keys()
+    if keys.active_kid is None:
+        return jwt.decode(token, keys.signing_key, algorithms=[settings.JWT_ALGORITHM])
+
+    kid = jwt.get_unverified_header(token).get("kid")
+    key = keys.verification_keys.get(kid)
+    if key is None:
+        raise JWTError("Unknown key id")
+    payload = jwt.decode(token, key, algorithms=[settings.JWT_ALGORITHM])
+    return payload
+
+
+class SigningKeys:
+    def __init__(
+        self,
+        signing_key: str | Key,
+        active_kid: str | None = None,
+        verification_keys: dict[str, Key] | None = None,
+    ) -> None:
+        self.signing_key = signing_key
+        self.active_kid = active_kid
+        self.verification_keys = verification_keys or {}
+
+    def jwks(self) -> dict:
+        keys = []
+        for kid, key in self.verification_keys.items():
+            public = key.to_dict()
+            public.update({"kid": kid, "use": "sig"})
+            keys.append(public)
+        return {"keys": keys}
+
+
+@lru_cache(maxsize=1)
+def get_signing_keys() -> SigningKeys:
+    # Keys are parsed once per process. Rotation: add <new>.pem (or <new>.pub.pem) next to the
+    # current key and roll it out, then switch JWT_ACTIVE_KEY_ID, and remove the old key file
+    # once tokens it signed have expired.
+    algorithm = settings.JWT_ALGORITHM
+    if algorithm.startswith("HS"):
+        if not settings.JWT_SECRET_KEY:
+            raise RuntimeError(f"JWT_SECRET_KEY is required for {algorithm}")
+        return SigningKeys(settings.JWT_SECRET_KEY)
+
+    if not settings.JWT_KEYS_DIR or not settings.JWT_ACTIVE_KEY_ID:
+        raise RuntimeError(f"JWT_KEYS_DIR and JWT_ACTIVE_KEY_ID are required for {algorithm}")
+
+    private_keys: dict[str, Key] = {}
+    verification_keys: dict[str, Key] = {}
+    for path in sorted(Path(settings.JWT_KEYS_DIR).glob("*.pem")):
+        if path.name.endswith(".pub.pem"):
+            kid = path.name[: -len(".pub.pem")]
+            verification_keys[kid] = jwk.construct(path.read_text(), algorithm)
+        else:
+            kid = path.stem
+            private_keys[kid] = jwk.construct(path.read_text(), algorithm)
+            verification_keys[kid] = private_keys[kid].public_key()
+
+    signing_key = private_keys.get(settings.JWT_ACTIVE_KEY_ID)
+    if signing_key is None:
+        raise RuntimeError(f"No private key {settings.JWT_ACTIVE_KEY_ID}.pem in {settings.JWT_KEYS_DIR}")
+
+    return SigningKeys(signing_key, settings.JWT_ACTIVE_KEY_ID, verification_keys)
+
+
+def generate_refresh_token() -> str:
+    return secrets.token_urlsafe(32)
+
+
+def hash_refresh_token(token: str) -> str:
+    # Refresh tokens are 256 random bits, so a fast digest is enough; no bcrypt on /auth/refresh.
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
@@ -0,0 +1,124 @@
+# Single-flight: concurrent callers asking for the same key share one call that starts after they ask, and its result.
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Hashable
+
+from sqlalchemy.exc import DBAPIError
+
+from app.core import metrics
+from app.core.deadline import DeadlineExceeded, is_statement_timeout, remaining
+from app.core.request_context import get_request_context
+
+
+class _Call:
+    __slots__ = ("done", "started", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.started = False
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class _Task:
+    __slots__ = ("future", "started")
+
+    def __init__(self) -> None:
+        self.future: asyncio.Future | None = None
+        self.started = False
+
+
+def _leader_gave_up(error: BaseException) -> bool:
+    if isinstance(error, (DeadlineExceeded, asyncio.CancelledError)):
+        return True
+    return isinstance(error, DBAPIError) and is_statement_timeout(error)
+
+
+def _wait_budget() -> float | None:
+    ctx = get_request_context()
+    return remaining(ctx) if ctx is not None else None
+
+
+class SingleFlight:
+    # A caller only joins a call that has not started yet, so whatever it committed
+    # before asking is visible to the shared query (read-your-writes). While a call is
+    # running, the next caller queues a new one behind it and later arrivals join that,
+    # so a burst costs at most two queries per key. Nothing is cached once a call
+    # returns. Results are handed to every waiter as-is, so callers must share
+    # immutable snapshots (plain rows), never objects bound to the leader's session.
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+        self._tasks: dict[Hashable, _Task] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        # For threadpool code: followers block until the leader's call finishes, but no
+        # longer than their own request deadline allows.
+        while True:
+            with self._lock:
+                running = self._calls.get(key)
+                leader = running is None or running.started
+                if leader:
+                    call = self._calls[key] = _Call()
+                else:
+                    call = running
+            metrics.record_singleflight(self.name, leader)
+            if leader:
+                break
+
+            left = _wait_budget()
+            if left is not None and (left <= 0 or not call.done.wait(left)):
+                raise DeadlineExceeded()
+            call.done.wait()
+            if call.error is None:
+                return call.result
+            if not _leader_gave_up(call.error):
+                raise call.error
+            # The leader ran out of its own time budget (or was cancelled); that says
+            # nothing about this caller's, so try again, leading if nobody else does.
+
+        try:
+            if running is not None:
+                # Let callers gather behind the running call; start regardless once
+                # this request's own budget is spent.
+                left = _wait_budget()
+                running.done.wait(max(left, 0) if left is not None else None)
+            with self._lock:
+                call.started = True
+            call.result = fn()
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        # For event-loop code: one task per key, joined on the same terms as do(); a
+        # cancelled waiter doesn't cancel the shared call.
+        running = self._tasks.get(key)
+        leader = running is None or running.started
+        if leader:
+            entry = self._tasks[key] = _Task()
+            entry.future = asyncio.ensure_future(self._run_async(entry, running, fn))
+            entry.future.add_done_callback(lambda done: self._forget(key, entry))
+        else:
+            entry = running
+        metrics.record_singleflight(self.name, leader)
+        return await asyncio.shield(entry.future)
+
+    async def _run_async(self, entry: _Task, running: _Task | None, fn: Callable[[], Awaitable[Any]]) -> Any:
+        if running is not None:
+            await asyncio.wait([running.future])
+        entry.started = True
+        return await fn()
+
+    def _forget(self, key: Hashable, entry: _Task) -> None:
+        if self._tasks.get(key) is entry:
+            del self._tasks[key]
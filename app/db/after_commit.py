@@ -0,0 +1,27 @@
+# Side effects (index updates, change notifications) deferred until the session's transaction has committed.
+
+from typing import Any, Callable
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+_PENDING = "after_commit"
+
+
+def after_commit(db: Session, fn: Callable[..., Any], *args: Any) -> None:
+    # Runs fn(*args) once the current transaction commits, whoever commits it; dropped
+    # if it rolls back. There is no transaction while it runs, so pass values in rather
+    # than reading them from the session.
+    db.info.setdefault(_PENDING, []).append((fn, args))
+
+
+@event.listens_for(Session, "after_commit")
+def _run(session):
+    for fn, args in session.info.pop(_PENDING, ()):
+        fn(*args)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _drop(session, transaction):
+    if transaction.parent is None:
+        session.info.pop(_PENDING, None)
@@ -0,0 +1,215 @@
+# Online move of team_memberships into a hash-partitioned table: shadow table DDL, trigger mirroring, batched backfill.
+#
+# 1. Migration 4b7f2c9d1e86 creates team_memberships_p (partitioned by HASH (team_id))
+#    and a trigger that mirrors every write on team_memberships into it.
+# 2. `python -m app.cli.partition_memberships backfill` copies the existing rows in
+#    short keyset batches while the app keeps running.
+# 3. Migration 8d3a6e1f5c27 copies whatever is left, then swaps the tables under a
+#    brief ACCESS EXCLUSIVE lock.
+
+import time
+
+from sqlalchemy import Connection, text
+
+# Fixed at creation time: changing it means another full table rewrite.
+MEMBERSHIP_PARTITIONS = 16
+
+SHADOW = "team_memberships_p"
+
+
+def partition_ddl(table: str, partitions: int = MEMBERSHIP_PARTITIONS) -> list[str]:
+    return [
+        f"CREATE TABLE {table}_{i:02d} PARTITION OF {table} "
+        f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {i})"
+        for i in range(partitions)
+    ]
+
+
+def shadow_ddl() -> list[str]:
+    return [
+        f"""
+        CREATE TABLE {SHADOW} (
+            user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+            team_id INTEGER NOT NULL REFERENCES teams (id) ON DELETE CASCADE,
+            role VARCHAR(16) NOT NULL,
+            joined_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+            PRIMARY KEY (user_id, team_id)
+        ) PARTITION BY HASH (team_id)
+        """,
+        *partition_ddl(SHADOW),
+        f"CREATE INDEX ix_{SHADOW}_team_id_joined_at ON {SHADOW} (team_id, joined_at)",
+        # Single-row cursor so an interrupted backfill resumes where it stopped.
+        """
+        CREATE TABLE team_memberships_backfill (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            last_user_id INTEGER,
+            last_team_id INTEGER,
+            done BOOLEAN NOT NULL DEFAULT false
+        )
+        """,
+        "INSERT INTO team_memberships_backfill (id) VALUES (1)",
+        # Writes made while the backfill runs reach the shadow table through the trigger.
+        # Upserts make it order-independent with respect to the backfill.
+        f"""
+        CREATE FUNCTION team_memberships_mirror() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('DELETE', 'UPDATE') THEN
+                DELETE FROM {SHADOW} WHERE user_id = OLD.user_id AND team_id = OLD.team_id;
+            END IF;
+            IF TG_OP = 'DELETE' THEN
+                RETURN OLD;
+            END IF;
+            INSERT INTO {SHADOW} (user_id, team_id, role, joined_at)
+            VALUES (NEW.user_id, NEW.team_id, NEW.role, NEW.joined_at)
+            ON CONFLICT (user_id, team_id) DO UPDATE SET role = EXCLUDED.role, joined_at = EXCLUDED.joined_at;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        """
+        CREATE TRIGGER team_memberships_mirror
+        AFTER INSERT OR UPDATE OR DELETE ON team_memberships
+        FOR EACH ROW EXECUTE FUNCTION team_memberships_mirror()
+        """,
+    ]
+
+
+def drop_shadow_ddl() -> list[str]:
+    return [
+        "DROP TRIGGER IF EXISTS team_memberships_mirror ON team_memberships",
+        "DROP FUNCTION IF EXISTS team_memberships_mirror()",
+        "DROP TABLE IF EXISTS team_memberships_backfill",
+        f"DROP TABLE IF EXISTS {SHADOW}",
+    ]
+
+
+# FOR SHARE keeps each source row from being deleted or updated until its copy has
+# committed; the trigger then applies that change to the shadow table as well. Rows
+# already changed before the batch read them are simply read in their new state.
+_COPY_BATCH = text(f"""
+    WITH batch AS (
+        SELECT user_id, team_id, role, joined_at
+        FROM team_memberships
+        WHERE (user_id, team_id) > (COALESCE(:last_user_id, -1), COALESCE(:last_team_id, -1))
+        ORDER BY user_id, team_id
+        LIMIT :batch_size
+        FOR SHARE
+    ), copied AS (
+        INSERT INTO {SHADOW} (user_id, team_id, role, joined_at)
+        SELECT user_id, team_id, role, joined_at FROM batch
+        ON CONFLICT (user_id, team_id) DO NOTHING
+    )
+    SELECT count(*), max(user_id), max(team_id) FILTER (WHERE user_id = (SELECT max(user_id) FROM batch))
+    FROM batch
+""")
+
+
+def backfill_state(connection: Connection) -> dict:
+    row = connection.execute(text(
+        "SELECT last_user_id, last_team_id, done FROM team_memberships_backfill WHERE id = 1"
+    )).mappings().one()
+    return dict(row)
+
+
+def backfill(
+    connection: Connection,
+    batch_size: int,
+    pause: float = 0.0,
+    max_batches: int | None = None,
+    commit: bool = True,
+) -> int:
+    # Copies rows in primary-key order, one short transaction per batch when `commit`
+    # is set (the CLI); inside a migration everything runs in the migration transaction.
+    state = backfill_state(connection)
+    if state["done"]:
+        return 0
+
+    copied = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        count, last_user_id, last_team_id = connection.execute(_COPY_BATCH, {
+            "last_user_id": state["last_user_id"],
+            "last_team_id": state["last_team_id"],
+            "batch_size": batch_size,
+        }).one()
+        finished = count < batch_size
+        if count:
+            state["last_user_id"], state["last_team_id"] = last_user_id, last_team_id
+        connection.execute(
+            text(
+                "UPDATE team_memberships_backfill "
+                "SET last_user_id = :last_user_id, last_team_id = :last_team_id, done = :done WHERE id = 1"
+            ),
+            {**state, "done": finished},
+        )
+        if commit:
+            connection.commit()
+        copied += count
+        batches += 1
+        if finished:
+            break
+        if pause:
+            time.sleep(pause)
+    return copied
+
+
+def finish_backfill_sql() -> str:
+    # Everything past the saved cursor in one statement; all of it when the CLI was
+    # never run. Also what offline (--sql) migrations emit, as it needs no round trips.
+    return f"""
+        INSERT INTO {SHADOW} (user_id, team_id, role, joined_at)
+        SELECT m.user_id, m.team_id, m.role, m.joined_at
+        FROM team_memberships m, team_memberships_backfill b
+        WHERE b.id = 1 AND NOT b.done
+          AND (m.user_id, m.team_id) > (COALESCE(b.last_user_id, -1), COALESCE(b.last_team_id, -1))
+        FOR SHARE OF m
+        ON CONFLICT (user_id, team_id) DO NOTHING
+    """
+
+
+def swap_ddl() -> list[str]:
+    # Renames only, so the exclusive lock is held for milliseconds. The old table is
+    # kept as team_memberships_unpartitioned until `partition_memberships drop-old`.
+    renames = [
+        "LOCK TABLE team_memberships IN ACCESS EXCLUSIVE MODE",
+        "DROP TRIGGER team_memberships_mirror ON team_memberships",
+        "DROP FUNCTION team_memberships_mirror()",
+        "ALTER TABLE team_memberships RENAME TO team_memberships_unpartitioned",
+        "ALTER TABLE team_memberships_unpartitioned RENAME CONSTRAINT team_memberships_pkey TO team_memberships_unpartitioned_pkey",
+        f"ALTER TABLE {SHADOW} RENAME TO team_memberships",
+        f"ALTER TABLE team_memberships RENAME CONSTRAINT {SHADOW}_pkey TO team_memberships_pkey",
+        f"ALTER INDEX ix_{SHADOW}_team_id_joined_at RENAME TO ix_team_memberships_team_id_joined_at",
+        "DROP TABLE team_memberships_backfill",
+    ]
+    renames += [
+        f"ALTER TABLE {SHADOW}_{i:02d} RENAME TO team_memberships_{i:02d}"
+        for i in range(MEMBERSHIP_PARTITIONS)
+    ]
+    return renames
+
+
+def verify(connection: Connection) -> dict[str, int]:
+    # Before the swap: rows of team_memberships that are missing from, or differ in,
+    # the shadow table. Both numbers must be 0 once the backfill is done.
+    return dict(connection.execute(text(f"""
+        SELECT
+            (SELECT count(*) FROM team_memberships) AS source_rows,
+            (SELECT count(*) FROM {SHADOW}) AS shadow_rows,
+            (SELECT count(*) FROM (
+                SELECT user_id, team_id, role, joined_at FROM team_memberships
+                EXCEPT SELECT user_id, team_id, role, joined_at FROM {SHADOW}
+            ) diff) AS missing,
+            (SELECT count(*) FROM (
+                SELECT user_id, team_id, role, joined_at FROM {SHADOW}
+                EXCEPT SELECT user_id, team_id, role, joined_at FROM team_memberships
+            ) diff) AS extra
+    """)).mappings().one())
+
+
+def drop_unpartitioned(connection: Connection) -> bool:
+    exists = connection.execute(text("SELECT to_regclass('team_memberships_unpartitioned')")).scalar()
+    if exists is None:
+        return False
+    connection.execute(text("DROP TABLE team_memberships_unpartitioned"))
+    connection.commit()
+    return True
@@ -0,0 +1,15 @@
+# LIKE patterns for the directory searches, with user input escaped.
+
+LIKE_ESCAPE = "\\"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def contains_pattern(value: str) -> str:
+    return f"%{_escape(value)}%"
+
+
+def prefix_pattern(value: str) -> str:
+    return f"{_escape(value)}%"
@@ -1,12 +1,43 @@
-# SQLAlchemy engine/session factory tied to DATABASE_URL.
+# SQLAlchemy engine/session factory tied to DATABASE_URL.
+
+import os
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.db import sqlite
+
+
+def connect_args(url: str) -> dict:
+    if sqlite.is_sqlite(url):
+        return sqlite.connect_args(url)
+    # Only psycopg 3 prepares statements; psycopg2 ignores the setting.
+    if make_url(url).get_driver_name() != "psycopg":
+        return {}
+    return {"prepare_threshold": settings.DB_PREPARE_THRESHOLD if settings.DB_PREPARED_STATEMENTS else None}
+
+
+def pool_args(url: str) -> dict:
+    # SQLite's pools are not sized this way.
+    if sqlite.is_sqlite(url):
+        return sqlite.engine_args(url)
+    return {"pool_size": settings.DB_POOL_SIZE, "max_overflow": settings.DB_MAX_OVERFLOW}
+
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+engine = create_engine(
+    settings.DATABASE_URL,
+    pool_pre_ping=True,
+    connect_args=connect_args(settings.DATABASE_URL),
+    **pool_args(settings.DATABASE_URL),
+)
+if sqlite.is_sqlite(settings.DATABASE_URL):
+    sqlite.install(engine)
+# A forked worker must not reuse connections opened by its parent; close=False leaves
+# them alone for the parent and just starts the child with an empty pool.
+os.register_at_fork(after_in_child=lambda: engine.dispose(close=False))
+SessionLocal = sessionmaker(bind=engine, class_=sqlite.session_class(engine), autoflush=False, autocommit=False)
 
 
 def get_db():
@@ -0,0 +1,165 @@
+# SQLite backend mode: WAL and pragmas on connect, explicit transactions, and a single writer with concurrent readers.
+#
+# SQLite allows one write transaction per database at a time. Rather than letting
+# writers collide (a deferred transaction that read first and then writes fails with
+# "database is locked" when another writer committed in between), each Session reads
+# on the shared pool until it first writes; from then on, until commit or rollback, it
+# uses a connection that starts with BEGIN IMMEDIATE under a process-wide lock. Other
+# processes (several server workers, the job worker) wait on busy_timeout instead.
+
+import sqlite3
+import threading
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.core.config import settings
+
+# Execution option on the engine used for writes, and the Session.info flag routing to it.
+WRITER = "sqlite_writer"
+_WRITING = "sqlite_writing"
+_HOLDS_LOCK = "sqlite_holds_write_lock"
+
+_write_lock = threading.Lock()
+
+
+def is_sqlite(url) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def is_memory(url) -> bool:
+    url = make_url(url)
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def engine_args(url) -> dict:
+    if not is_memory(url):
+        return {}
+    # Each connection to :memory: is a database of its own, so everything shares one
+    # connection; transactions on it take turns through the write lock. Resetting it on
+    # return to the pool would roll back whoever is using it at that moment.
+    return {"poolclass": StaticPool, "pool_reset_on_return": None}
+
+
+def connect_args(url) -> dict:
+    # The shared in-memory connection is used from the threadpool and background threads.
+    return {"check_same_thread": False} if is_memory(url) else {}
+
+
+def _pragmas(memory: bool) -> list[str]:
+    pragmas = [
+        f"busy_timeout = {settings.SQLITE_BUSY_TIMEOUT_MS}",
+        "foreign_keys = ON",
+        # Negative: KiB rather than pages. Per connection.
+        f"cache_size = -{settings.SQLITE_CACHE_MB * 1024}",
+        "temp_store = MEMORY",
+    ]
+    if not memory:
+        # WAL: readers and the writer no longer block each other, and a commit appends to
+        # the log instead of rewriting pages. NORMAL only fsyncs at checkpoints; a power
+        # loss can drop the last commits but never corrupts the database.
+        pragmas = [
+            "journal_mode = WAL",
+            f"synchronous = {settings.SQLITE_SYNCHRONOUS}",
+            f"mmap_size = {settings.SQLITE_MMAP_MB * 1024 * 1024}",
+            *pragmas,
+        ]
+    return pragmas
+
+
+def _finish(connection, name: str) -> None:
+    # Commit/rollback on the driver connection here, so the lock is only released once
+    # the database itself is free; SQLAlchemy's own call afterwards is then a no-op.
+    if not connection.info.pop(_HOLDS_LOCK, False):
+        return
+    try:
+        if not connection.invalidated:
+            getattr(connection.connection.dbapi_connection, name)()
+    finally:
+        _write_lock.release()
+
+
+def install(engine: Engine) -> None:
+    memory = is_memory(engine.url)
+
+    @event.listens_for(engine, "connect")
+    def _configure(dbapi_connection, connection_record):
+        # pysqlite would only BEGIN before the first write and mishandles SAVEPOINT;
+        # transactions are started explicitly in _begin instead.
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for pragma in _pragmas(memory):
+            cursor.execute(f"PRAGMA {pragma}")
+        cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def _begin(connection):
+        if not (memory or connection.get_execution_options().get(WRITER)):
+            # Deferred: a consistent snapshot for the transaction's reads, no lock.
+            connection.exec_driver_sql("BEGIN")
+            return
+        if not _write_lock.acquire(timeout=settings.SQLITE_BUSY_TIMEOUT_MS / 1000):
+            raise exc.OperationalError("BEGIN IMMEDIATE", None, sqlite3.OperationalError("database is locked"))
+        try:
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+        except BaseException:
+            _write_lock.release()
+            raise
+        connection.info[_HOLDS_LOCK] = True
+
+    event.listen(engine, "commit", lambda connection: _finish(connection, "commit"))
+    event.listen(engine, "rollback", lambda connection: _finish(connection, "rollback"))
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        # A connection dropped without commit or rollback must not keep the lock.
+        if connection_record.info.pop(_HOLDS_LOCK, False):
+            _write_lock.release()
+
+
+def _is_write(clause) -> bool:
+    if clause is None:
+        return False
+    if getattr(clause, "is_dml", False):
+        return True
+    # SELECT ... FOR UPDATE: the caller is about to write what it reads.
+    return getattr(clause, "_for_update_arg", None) is not None
+
+
+def begin_write(db: Session) -> None:
+    # Sends the rest of the session's transaction to the writer, e.g. before reads
+    # that a following write depends on (what FOR UPDATE or an advisory lock does on
+    # Postgres).
+    db.info[_WRITING] = True
+
+
+class RoutingSession(Session):
+    # Reads go to the engine; flushes, DML, FOR UPDATE and everything after them in
+    # the same transaction go to the writer. Sessions bound to something else (tests
+    # bind one connection) are left alone.
+    reader: Engine | None = None
+    writer: Engine | None = None
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        bind = super().get_bind(mapper, clause=clause, **kw)
+        if self.writer is None or bind is not self.reader:
+            return bind
+        if self.info.get(_WRITING) or self._flushing or _is_write(clause):
+            self.info[_WRITING] = True
+            return self.writer
+        return bind
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _end_write(session, transaction):
+    if transaction.parent is None:
+        session.info.pop(_WRITING, None)
+
+
+def session_class(engine: Engine) -> type[Session]:
+    if not is_sqlite(engine.url) or is_memory(engine.url):
+        # In memory there is a single connection, and every transaction is already serialized.
+        return Session
+    return type("SQLiteSession", (RoutingSession,), {"reader": engine, "writer": engine.execution_options(**{WRITER: True})})
@@ -1,21 +1,61 @@
 # Boots the FastAPI app, sets logging, health endpoint, routers, and OpenAPI schema with Swagger auth.
 
 import logging
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response, status
+from fastapi.responses import JSONResponse
 from fastapi.openapi.utils import get_openapi
+from sqlalchemy.exc import DBAPIError
 
 from app.api.v1.api import api_router
+from app.core.audit import audit_log
+from app.core.admission import AdaptiveLimiter, AdmissionControlMiddleware
+from app.core.access_log import AccessLogMiddleware, install_db_timing
 from app.core.config import settings
+from app.core.deadline import DeadlineExceeded, install_deadlines, is_statement_timeout
 from app.core.log_config import setup_logging
+from app.core.metrics import MetricsMiddleware, install_pool_metrics, render_metrics
+from app.core.readiness import readiness
+from app.core.revocation import revocation_list
+from app.core.security import get_signing_keys
+from app import models  # noqa: F401 - registers all models on Base.metadata
+from app.db import sqlite
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+from app.services.membership_index import membership_index
 
 setup_logging()
 logger = logging.getLogger(__name__)
 logger.info("App started")
-logger.info(f"ENV = {settings.APP_ENV}")
+logger.info("ENV = %s", settings.APP_ENV)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Parse signing/verification keys up front so a bad key config fails at boot.
+    get_signing_keys()
+    if sqlite.is_memory(settings.DATABASE_URL):
+        # An in-memory database starts empty and can't be migrated from outside.
+        Base.metadata.create_all(engine)
+    if settings.MEMBERSHIP_INDEX_ENABLED:
+        membership_index.start(
+            SessionLocal,
+            refresh_seconds=settings.MEMBERSHIP_INDEX_REFRESH_SECONDS,
+            rebuild_seconds=settings.MEMBERSHIP_INDEX_REBUILD_SECONDS,
+        )
+    revocation_list.start(SessionLocal, interval=settings.TOKEN_REVOCATION_SYNC_SECONDS)
+    audit_log.start(SessionLocal, interval=settings.AUDIT_FLUSH_INTERVAL_SECONDS)
+    yield
+    # Writes out whatever audit events are still buffered.
+    audit_log.stop()
+    revocation_list.stop()
+    membership_index.stop()
+
 
 app = FastAPI(
     title="fastapi-postgres-template",
+    lifespan=lifespan,
     swagger_ui_parameters={"persistAuthorization": True},
 )
 
@@ -43,10 +83,73 @@ def custom_openapi():
 
 app.openapi = custom_openapi
 
+install_db_timing(engine)
+install_deadlines(engine, SessionLocal)
+
+if settings.ADMISSION_CONTROL_ENABLED:
+    # Innermost, so shed requests still show up in the access log and metrics.
+    # Long-polls mostly sleep on the event loop and would skew the latency signal.
+    queue_timeout = settings.ADMISSION_QUEUE_TIMEOUT_MS / 1000
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        budgets={
+            "/api/v1/auth": AdaptiveLimiter("auth", settings.ADMISSION_AUTH_CONCURRENCY, queue_timeout),
+            "/api/v1/teams": AdaptiveLimiter("teams", settings.ADMISSION_TEAMS_CONCURRENCY, queue_timeout),
+        },
+        exempt_suffixes=("/members/changes",),
+    )
+
+app.add_middleware(AccessLogMiddleware)
+
+if settings.METRICS_ENABLED:
+    install_pool_metrics(engine)
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        body, content_type = render_metrics()
+        return Response(body, media_type=content_type)
+
+
+def _deadline_response() -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+        content={"detail": "Request deadline exceeded"},
+    )
+
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded(request: Request, exc: DeadlineExceeded):
+    return _deadline_response()
+
+
+@app.exception_handler(DBAPIError)
+async def database_error(request: Request, exc: DBAPIError):
+    # Postgres cancelled the statement because SET LOCAL statement_timeout ran out.
+    if is_statement_timeout(exc):
+        return _deadline_response()
+    raise exc
+
+
+@app.get("/.well-known/jwks.json", include_in_schema=False)
+def jwks(response: Response):
+    # Lets other services verify access tokens locally; empty for HS* deployments.
+    response.headers["Cache-Control"] = "public, max-age=300"
+    return get_signing_keys().jwks()
+
 
 @app.get("/health")
+@app.get("/health/live")
 async def health():
     return {"health": "ok"}
 
 
+@app.get("/health/ready")
+def ready(response: Response):
+    result = readiness.check(engine)
+    if not result["ready"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return result
+
+
 app.include_router(api_router, prefix="/api/v1")
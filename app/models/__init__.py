@@ -1,3 +1,9 @@
 from app.models.user import User
 from app.models.team import Team
-from app.models.membership import Membership
\ No newline at end of file
+from app.models.membership import Membership
+from app.models.membership_event import MembershipEvent
+from app.models.refresh_token import RefreshToken
+from app.models.team_closure import TeamClosure
+from app.models.idempotency_key import IdempotencyKey
+from app.models.job import Job
+from app.models.audit_event import AuditEvent
@@ -0,0 +1,30 @@
+# Idempotency key ORM model: one row per (user, Idempotency-Key) holding the stored response of the first request.
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, SmallInteger, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    # SHA-256 of method, path and body; a key reused for a different request is rejected.
+    request_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    # NULL while the first request is still running.
+    status_code: Mapped[int | None] = mapped_column(SmallInteger, nullable=True)
+    response_body: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+    # Short for an in-progress claim (so a crashed request frees the key), the TTL once completed.
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True, nullable=False)
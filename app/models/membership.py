@@ -1,16 +1,23 @@
-# Team membership ORM model with composite PK (user_id, team_id), role, joined_at.
+# Team membership ORM model with composite PK (user_id, team_id), role, joined_at; hash-partitioned by team_id on Postgres.
 
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, String, func
+from sqlalchemy import DDL, DateTime, ForeignKey, Index, String, event, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.core.enums import Role
 from app.db.base import Base
+from app.db.membership_partitioning import partition_ddl
 
 
 class Membership(Base):
     __tablename__ = "team_memberships"
+    # On Postgres the table is PARTITION BY HASH (team_id) with MEMBERSHIP_PARTITIONS
+    # partitions, so every query filtering on team_id touches a single partition.
+    __table_args__ = (
+        Index("ix_team_memberships_team_id_joined_at", "team_id", "joined_at"),
+        {"postgresql_partition_by": "HASH (team_id)"},
+    )
 
     user_id: Mapped[int] = mapped_column(
         ForeignKey("users.id", ondelete="CASCADE"),
@@ -27,4 +34,9 @@ class Membership(Base):
         DateTime(timezone=True),
         server_default=func.now(),
         nullable=False,
-    )
\ No newline at end of file
+    )
+
+
+# create_all (tests, benchmarks) needs the partitions too; migrations create their own.
+for _statement in partition_ddl(Membership.__tablename__):
+    event.listen(Membership.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
@@ -0,0 +1,35 @@
+# Append-only membership change log (one row per add / remove / role change) backing the members change feed.
+
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Index, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.enums import MembershipEventType, Role
+from app.db.base import Base
+
+
+class MembershipEvent(Base):
+    __tablename__ = "team_membership_events"
+    __table_args__ = (
+        Index("ix_team_membership_events_team_id_id", "team_id", "id"),
+    )
+
+    # The id doubles as the feed cursor; SQLite only autoincrements INTEGER primary keys.
+    id: Mapped[int] = mapped_column(
+        BigInteger().with_variant(Integer, "sqlite"),
+        primary_key=True,
+        autoincrement=True,
+    )
+    team_id: Mapped[int] = mapped_column(
+        ForeignKey("teams.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    event: Mapped[MembershipEventType] = mapped_column(String(16), nullable=False)
+    role: Mapped[Role] = mapped_column(String(16), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
@@ -1,10 +1,11 @@
-# Team ORM model with id, name, timestamps.
+# Team ORM model with id, name, parent team, version counter, denormalized membership counts, soft-delete flag, timestamps.
 
 from datetime import datetime
 
-from sqlalchemy import DateTime, Integer, String, func
+from sqlalchemy import DateTime, ForeignKey, Integer, String, func
 from sqlalchemy.orm import Mapped, mapped_column
 
+from app.core.enums import Role
 from app.db.base import Base
 
 
@@ -12,9 +13,36 @@ class Team(Base):
     __tablename__ = "teams"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # On Postgres also indexed with pg_trgm (ix_teams_name_trgm, created by migration only
+    # since it needs the extension) for /teams/search.
     name: Mapped[str] = mapped_column(String(128), index=True, nullable=False)
+    # Roles held on a parent are inherited by every descendant (see team_closure).
+    parent_id: Mapped[int | None] = mapped_column(
+        ForeignKey("teams.id", ondelete="SET NULL"),
+        index=True,
+        nullable=True,
+    )
+    # Bumped by every membership mutation; used as the ETag for team and member reads.
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
+    # Maintained by team_service in the same transaction as each membership change;
+    # repaired by `python -m app.cli.maintenance reconcile-team-counts`.
+    member_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    role_admin_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    role_member_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    role_viewer_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         server_default=func.now(),
         nullable=False,
     )
+    # Set by DELETE /teams/{id}: the team is gone for every read from then on, while a
+    # background job removes its memberships in batches and finally the row itself.
+    deleted_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    @property
+    def role_counts(self) -> dict[Role, int]:
+        return {role: getattr(self, role_count_column(role).key) for role in Role}
+
+
+def role_count_column(role: Role):
+    return getattr(Team, f"role_{Role(role).value}_count")
@@ -0,0 +1,24 @@
+# Closure table for the team hierarchy: one row per (ancestor, descendant) pair, including each team with itself at depth 0.
+
+from sqlalchemy import ForeignKey, Index, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class TeamClosure(Base):
+    __tablename__ = "team_closure"
+    __table_args__ = (
+        # Effective-role lookups walk from a team up to its ancestors.
+        Index("ix_team_closure_descendant_id_depth", "descendant_id", "depth"),
+    )
+
+    ancestor_id: Mapped[int] = mapped_column(
+        ForeignKey("teams.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    descendant_id: Mapped[int] = mapped_column(
+        ForeignKey("teams.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    depth: Mapped[int] = mapped_column(Integer, nullable=False)
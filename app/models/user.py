@@ -1,4 +1,4 @@
-# User ORM model with id, email, hashed_password, timestamps.
+# User ORM model with id, email, hashed_password, deactivation flag, timestamps.
 
 from datetime import datetime
 
@@ -12,6 +12,7 @@ class User(Base):
     __tablename__ = "users"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # Plus ix_users_email_trgm on Postgres (migration only) for /users/search.
     email: Mapped[str] = mapped_column(String(255), unique=True, index=True, nullable=False)
     hashed_password: Mapped[bytes] = mapped_column(nullable=False)  
 
@@ -19,4 +20,7 @@ class User(Base):
         DateTime(timezone=True),
         server_default=func.now(),
         nullable=False,
-    )
\ No newline at end of file
+    )
+    # Deactivated users can no longer log in or use existing tokens; their memberships
+    # are removed by a background job.
+    deactivated_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
\ No newline at end of file
@@ -0,0 +1,20 @@
+# Pydantic schema for audit trail entries.
+
+from datetime import datetime
+from typing import Any
+
+from pydantic import BaseModel, ConfigDict
+
+
+class AuditEventPublic(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    created_at: datetime
+    action: str
+    outcome: str
+    actor_id: int | None
+    team_id: int | None
+    target_user_id: int | None
+    request_id: str | None
+    detail: dict[str, Any] | None
@@ -1,4 +1,4 @@
-# Pydantic schemas for register/login requests and token responses.
+# Pydantic schemas for register/login/refresh requests and token responses.
 
 from datetime import datetime
 from typing import Literal
@@ -19,6 +19,12 @@ class Login(BaseModel):
 class TokenResponse(BaseModel):
     access_token: str
     token_type: Literal["bearer"] = "bearer"
+    expires_in: int  # access token lifetime in seconds
+    refresh_token: str
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str = Field(min_length=1, max_length=256)
 
 
 class UserPublic(BaseModel):
@@ -1 +1,12 @@
-# shared types (common.py for Message, pagination minimal, etc.)
\ No newline at end of file
+# shared types (common.py for Message, pagination minimal, etc.)
+
+from typing import Generic, TypeVar
+
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    items: list[T]
+    next_cursor: str | None  # pass back as ?cursor= for the next page; null on the last one
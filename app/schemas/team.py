@@ -1,14 +1,15 @@
-# Pydantic schemas for team create/read and member add/public DTOs.
+# Pydantic schemas for team create/read, member add/public DTOs, sparse member listings, and the member change feed.
 
 from datetime import datetime
 
 from pydantic import BaseModel, EmailStr, Field, ConfigDict
 
-from app.core.enums import Role
+from app.core.enums import MembershipEventType, Role
 
 
 class TeamCreate(BaseModel): # used for input, no ORM
     name: str = Field(min_length=2, max_length=128)
+    parent_id: int | None = None
 
 
 class TeamPublic(BaseModel): # used for output 
@@ -16,14 +17,25 @@ class TeamPublic(BaseModel): # used for output
 
     id: int
     name: str
+    parent_id: int | None
+    member_count: int
+    role_counts: dict[Role, int]
     created_at: datetime
 
 
+class TeamParentUpdate(BaseModel):
+    parent_id: int | None
+
+
 class TeamMemberAdd(BaseModel): # used for input, no ORM
     email: EmailStr
     role: Role = Role.member
 
 
+class TeamMemberBulkAdd(BaseModel):
+    members: list[TeamMemberAdd] = Field(min_length=1, max_length=10_000)
+
+
 class TeamMemberPublic(BaseModel): # user for output
     model_config = ConfigDict(from_attributes=True)
   
@@ -32,5 +44,37 @@ class TeamMemberPublic(BaseModel): # user for output
     joined_at: datetime
 
 
+class TeamMemberUser(BaseModel):
+    id: int
+    email: EmailStr
+
+
+class TeamMemberListItem(BaseModel):
+    # Every field is optional so ?fields= can leave any out; the route serializes with
+    # exclude_unset, so fields that weren't asked for are absent rather than null.
+    model_config = ConfigDict(from_attributes=True)
+
+    user_id: int | None = None
+    role: Role | None = None
+    joined_at: datetime | None = None
+    user: TeamMemberUser | None = None  # only with ?include=user
+
+
 class TeamMemberRoleUpdate(BaseModel):
     role: Role
+
+
+class TeamMemberEventPublic(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    user_id: int
+    event: MembershipEventType
+    role: Role
+    created_at: datetime
+
+
+class TeamMemberChanges(BaseModel):
+    events: list[TeamMemberEventPublic]
+    cursor: int  # pass back as ?since= to continue
+    has_more: bool
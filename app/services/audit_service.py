@@ -0,0 +1,116 @@
+# Reading the audit trail with time-range keyset pagination, and maintaining its monthly partitions.
+
+import re
+from datetime import date, datetime, timezone
+
+from sqlalchemy import delete, select, text, tuple_
+from sqlalchemy.orm import Session
+
+from app.models.audit_event import AuditEvent
+
+_PARTITION_NAME = re.compile(r"^audit_events_(\d{4})_(\d{2})$")
+
+
+def list_events(
+    db: Session,
+    team_id: int,
+    since: datetime,
+    until: datetime,
+    limit: int,
+    before: tuple[datetime, int] | None = None,
+) -> list[AuditEvent]:
+    # Newest first. The created_at bounds let Postgres prune to the partitions in range;
+    # pages continue strictly before the (created_at, id) of the previous page's last row.
+    stmt = (
+        select(AuditEvent)
+        .where(
+            AuditEvent.team_id == team_id,
+            AuditEvent.created_at >= since,
+            AuditEvent.created_at < until,
+        )
+        .order_by(AuditEvent.created_at.desc(), AuditEvent.id.desc())
+        .limit(limit)
+    )
+    if before is not None:
+        stmt = stmt.where(tuple_(AuditEvent.created_at, AuditEvent.id) < tuple_(*before))
+    return list(db.execute(stmt).scalars())
+
+
+def _month_start(value: date, offset: int) -> date:
+    months = value.year * 12 + value.month - 1 + offset
+    return date(months // 12, months % 12 + 1, 1)
+
+
+def _month_bounds(start: date, end: date) -> dict[str, datetime]:
+    return {
+        "start": datetime.combine(start, datetime.min.time(), timezone.utc),
+        "end": datetime.combine(end, datetime.min.time(), timezone.utc),
+    }
+
+
+def ensure_partitions(db: Session, today: date, months_ahead: int) -> list[str]:
+    # Creates monthly partitions from the current month up to `months_ahead` ahead.
+    # Rows outside them land in audit_events_default; run this well before month end.
+    if db.get_bind().dialect.name != "postgresql":
+        return []
+
+    created = []
+    for offset in range(months_ahead + 1):
+        start, end = _month_start(today, offset), _month_start(today, offset + 1)
+        name = f"audit_events_{start:%Y_%m}"
+        exists = db.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar()
+        if exists is None:
+            # Postgres refuses a new partition while the default one holds rows for its
+            # range: park them in a temporary table and route them back in afterwards,
+            # all in this transaction.
+            bounds = _month_bounds(start, end)
+            stranded = db.execute(text(
+                "SELECT EXISTS (SELECT 1 FROM audit_events_default "
+                "WHERE created_at >= :start AND created_at < :end)"
+            ), bounds).scalar()
+            if stranded:
+                db.execute(text("CREATE TEMPORARY TABLE audit_events_moving (LIKE audit_events)"))
+                db.execute(text(
+                    "WITH moved AS (DELETE FROM audit_events_default "
+                    "WHERE created_at >= :start AND created_at < :end RETURNING *) "
+                    "INSERT INTO audit_events_moving SELECT * FROM moved"
+                ), bounds)
+            db.execute(text(
+                f"CREATE TABLE {name} PARTITION OF audit_events "
+                f"FOR VALUES FROM ('{start.isoformat()} 00:00+00') TO ('{end.isoformat()} 00:00+00')"
+            ))
+            if stranded:
+                db.execute(text("INSERT INTO audit_events SELECT * FROM audit_events_moving"))
+                db.execute(text("DROP TABLE audit_events_moving"))
+            created.append(name)
+    db.commit()
+    return created
+
+
+def drop_old_partitions(db: Session, today: date, keep_months: int) -> list[str]:
+    # Retention: keeps the current month plus `keep_months` before it. Dropping a whole
+    # month is instant and leaves no dead rows behind; other backends have a single
+    # table and delete the rows instead.
+    first_kept = _month_start(today, -keep_months)
+    cutoff = datetime.combine(first_kept, datetime.min.time(), timezone.utc)
+    if db.get_bind().dialect.name != "postgresql":
+        db.execute(delete(AuditEvent).where(AuditEvent.created_at < cutoff))
+        db.commit()
+        return []
+
+    # Old months that never had a partition sit in the default one.
+    db.execute(text("DELETE FROM audit_events_default WHERE created_at < :cutoff"), {"cutoff": cutoff})
+
+    partitions = db.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'audit_events'::regclass"
+    )).scalars()
+    dropped = []
+    for name in partitions:
+        match = _PARTITION_NAME.match(name)
+        if match and date(int(match[1]), int(match[2]), 1) < first_kept:
+            db.execute(text(f"DROP TABLE {name}"))
+            dropped.append(name)
+    db.commit()
+    return sorted(dropped)
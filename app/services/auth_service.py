@@ -1,8 +1,21 @@
-# Business logic for registering users, authenticating, and issuing access tokens.
+# Business logic for registering users, authenticating, issuing/rotating/revoking tokens, and deactivation.
 
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 
-from app.core.security import hash_password, verify_password, create_access_token
+from app.core.config import settings
+from app.core.revocation import revocation_list
+from app.core.security import (
+    create_access_token,
+    generate_refresh_token,
+    hash_password,
+    hash_refresh_token,
+    verify_password,
+)
+from app.models.refresh_token import RefreshToken
 from app.models.user import User
 from app.schemas.auth import Register, Login
 
@@ -32,7 +45,7 @@ def authenticate_user(db: Session, payload: Login) -> User | None:
     email = payload.email.strip().lower()
     
     user = db.query(User).filter(User.email == email).first()
-    if not user:
+    if not user or user.deactivated_at is not None:
         return None  
     
     if not verify_password(payload.password, user.hashed_password):
@@ -41,5 +54,115 @@ def authenticate_user(db: Session, payload: Login) -> User | None:
     return user
 
 
-def issue_access_token(user: User) -> str:
-    return create_access_token(subject=str(user.id))
\ No newline at end of file
+def issue_access_token(user: User, session_id: str | None = None) -> str:
+    return create_access_token(subject=str(user.id), session_id=session_id)
+
+
+def _new_refresh_token(db: Session, user_id: int, session_id: str) -> str:
+    token = generate_refresh_token()
+    db.add(
+        RefreshToken(
+            user_id=user_id,
+            session_id=session_id,
+            token_hash=hash_refresh_token(token),
+            expires_at=datetime.now(timezone.utc) + timedelta(days=settings.JWT_REFRESH_TOKEN_EXPIRE_DAYS),
+        )
+    )
+    return token
+
+
+def issue_tokens(db: Session, user: User) -> tuple[str, str]:
+    session_id = uuid.uuid4().hex
+    refresh_token = _new_refresh_token(db, user.id, session_id)
+    db.commit()
+    return issue_access_token(user, session_id), refresh_token
+
+
+def _revoke_session(db: Session, session_id: str) -> None:
+    now = datetime.now(timezone.utc)
+    (
+        db.query(RefreshToken)
+        .filter(
+            RefreshToken.session_id == session_id,
+            RefreshToken.revoked_at.is_(None),
+        )
+        .update({RefreshToken.revoked_at: now}, synchronize_session=False)
+    )
+    db.commit()
+    revocation_list.revoke(session_id, now)
+
+
+def refresh_tokens(db: Session, refresh_token: str) -> tuple[str, str] | None:
+    stored = (
+        db.query(RefreshToken)
+        .filter(RefreshToken.token_hash == hash_refresh_token(refresh_token))
+        .first()
+    )
+    if stored is None or stored.revoked_at is not None:
+        return None
+
+    expires_at = stored.expires_at
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    if expires_at <= datetime.now(timezone.utc):
+        return None
+
+    if stored.rotated_at is not None:
+        # An already-exchanged token came back: assume it leaked and end the whole session.
+        _revoke_session(db, stored.session_id)
+        return None
+
+    user = db.get(User, stored.user_id)
+    if user is None or user.deactivated_at is not None:
+        return None
+
+    # Claim the token with a conditional UPDATE: of two concurrent exchanges only one
+    # can flip rotated_at, and the other is treated as reuse.
+    claimed = db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.id == stored.id, RefreshToken.rotated_at.is_(None))
+        .values(rotated_at=datetime.now(timezone.utc))
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not claimed:
+        db.rollback()
+        _revoke_session(db, stored.session_id)
+        return None
+
+    new_refresh_token = _new_refresh_token(db, user.id, stored.session_id)
+    db.commit()
+    return issue_access_token(user, stored.session_id), new_refresh_token
+
+
+def deactivate_user(db: Session, user: User) -> None:
+    # Takes effect at once: get_current_user rejects the user on the next request, and
+    # every session is revoked so refresh tokens stop working too.
+    now = datetime.now(timezone.utc)
+    user.deactivated_at = now
+    session_ids = [
+        session_id
+        for (session_id,) in db.query(RefreshToken.session_id)
+        .filter(RefreshToken.user_id == user.id, RefreshToken.revoked_at.is_(None))
+        .distinct()
+    ]
+    (
+        db.query(RefreshToken)
+        .filter(RefreshToken.user_id == user.id, RefreshToken.revoked_at.is_(None))
+        .update({RefreshToken.revoked_at: now}, synchronize_session=False)
+    )
+    db.commit()
+    for session_id in session_ids:
+        revocation_list.revoke(session_id, now)
+
+
+def revoke_refresh_token(db: Session, refresh_token: str) -> bool:
+    stored = (
+        db.query(RefreshToken)
+        .filter(RefreshToken.token_hash == hash_refresh_token(refresh_token))
+        .first()
+    )
+    if stored is None:
+        return False
+
+    _revoke_session(db, stored.session_id)
+    return True
\ No newline at end of file
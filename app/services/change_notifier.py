@@ -0,0 +1,42 @@
+# In-process wake-ups for long-polling change feed requests.
+
+import asyncio
+import threading
+from collections import defaultdict
+
+
+class ChangeNotifier:
+    # Writers run in the threadpool while long-poll waiters sit on the event loop,
+    # so wake-ups are handed over with call_soon_threadsafe. Only this worker's
+    # writes are signalled; waiters still re-poll the database on an interval to
+    # see changes committed by other workers.
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._waiters: dict[int, set[tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = defaultdict(set)
+
+    def notify(self, team_id: int) -> None:
+        with self._lock:
+            waiters = self._waiters.pop(team_id, ())
+        for loop, event in waiters:
+            loop.call_soon_threadsafe(event.set)
+
+    async def wait(self, team_id: int, timeout: float) -> bool:
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._waiters[team_id].add(waiter)
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                waiters = self._waiters.get(team_id)
+                if waiters is not None:
+                    waiters.discard(waiter)
+                    if not waiters:
+                        del self._waiters[team_id]
+
+
+membership_changes = ChangeNotifier()
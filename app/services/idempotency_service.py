@@ -0,0 +1,104 @@
+# Business logic for Idempotency-Key records: claiming a key, storing the response, and purging expired keys.
+
+import hashlib
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.idempotency_key import IdempotencyKey
+
+
+def request_hash(method: str, path: str, body: str) -> str:
+    return hashlib.sha256(f"{method} {path}\n{body}".encode()).hexdigest()
+
+
+def claim_key(db: Session, user_id: int, key: str, fingerprint: str) -> IdempotencyKey | None:
+    # Returns None when this request now owns the key and should run, or the
+    # completed record to replay. The claim is committed before the operation runs
+    # so a concurrent retry on another worker sees it and backs off.
+    now = datetime.now(timezone.utc)
+    db.execute(
+        delete(IdempotencyKey).where(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key,
+            IdempotencyKey.expires_at <= now,
+        )
+    )
+    db.add(
+        IdempotencyKey(
+            user_id=user_id,
+            key=key,
+            request_hash=fingerprint,
+            expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_CLAIM_SECONDS),
+        )
+    )
+    try:
+        db.commit()
+        return None
+    except IntegrityError:
+        db.rollback()
+
+    record = (
+        db.query(IdempotencyKey)
+        .filter(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+        .populate_existing()
+        .first()
+    )
+    if record is None:
+        raise ValueError("in_progress")
+    if record.request_hash != fingerprint:
+        raise ValueError("key_mismatch")
+    if record.status_code is None:
+        raise ValueError("in_progress")
+    return record
+
+
+def complete_key(db: Session, user_id: int, key: str, status_code: int, body: str) -> None:
+    db.query(IdempotencyKey).filter(
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.key == key,
+    ).update(
+        {
+            IdempotencyKey.status_code: status_code,
+            IdempotencyKey.response_body: body,
+            IdempotencyKey.expires_at: datetime.now(timezone.utc)
+            + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS),
+        },
+        synchronize_session=False,
+    )
+    db.commit()
+
+
+def release_key(db: Session, user_id: int, key: str) -> None:
+    # The operation failed without a response worth replaying; let the client retry.
+    db.execute(
+        delete(IdempotencyKey).where(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key,
+            IdempotencyKey.status_code.is_(None),
+        )
+    )
+    db.commit()
+
+
+def purge_expired_keys(db: Session, batch_size: int = 1000) -> int:
+    purged = 0
+    while True:
+        batch = db.execute(
+            select(IdempotencyKey.user_id, IdempotencyKey.key)
+            .where(IdempotencyKey.expires_at <= datetime.now(timezone.utc))
+            .limit(batch_size)
+        ).all()
+        if not batch:
+            return purged
+
+        db.execute(
+            delete(IdempotencyKey).where(
+                tuple_(IdempotencyKey.user_id, IdempotencyKey.key).in_([tuple(row) for row in batch])
+            )
+        )
+        db.commit()
+        purged += len(batch)
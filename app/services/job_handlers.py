@@ -0,0 +1,91 @@
+# Background job handlers and the dispatch loop body used by the worker process.
+
+import logging
+import time
+from collections import Counter
+from typing import Callable
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.enums import Role
+from app.models.job import Job
+from app.services import job_service, team_service
+
+logger = logging.getLogger(__name__)
+
+BULK_ADD_MEMBERS = "bulk_add_members"
+DELETE_TEAM = "delete_team"
+DEACTIVATE_USER = "deactivate_user"
+
+JobHandler = Callable[[Session, Job], dict]
+HANDLERS: dict[str, JobHandler] = {}
+
+
+def handler(kind: str):
+    def register(fn: JobHandler) -> JobHandler:
+        HANDLERS[kind] = fn
+        return fn
+
+    return register
+
+
+@handler(BULK_ADD_MEMBERS)
+def bulk_add_members(db: Session, job: Job) -> dict:
+    team_id = job.payload["team_id"]
+    members = job.payload["members"]
+    totals = Counter(job.result or {})
+    batch_size = settings.JOB_BATCH_SIZE
+
+    # Resumes after the last committed batch if a previous attempt died.
+    for start in range(job.progress, len(members), batch_size):
+        batch = [(m["email"], Role(m["role"])) for m in members[start:start + batch_size]]
+        totals.update(team_service.add_members_bulk(db, team_id, batch))
+        job_service.report_progress(db, job, start + len(batch), len(members), dict(totals))
+
+    return dict(totals)
+
+
+def _drain(db: Session, job: Job, delete_batch: Callable[[int], int]) -> int:
+    # Runs delete_batch until it removes nothing, one short transaction per batch.
+    pause = settings.DELETE_BATCH_PAUSE_MS / 1000
+    removed = job.progress
+    while deleted := delete_batch(settings.DELETE_BATCH_SIZE):
+        removed += deleted
+        job_service.report_progress(db, job, removed)
+        if pause:
+            time.sleep(pause)
+    return removed
+
+
+@handler(DELETE_TEAM)
+def delete_team(db: Session, job: Job) -> dict:
+    # The team was soft-deleted before the job was queued, so nothing reads these rows.
+    team_id = job.payload["team_id"]
+    removed = _drain(db, job, lambda n: team_service.delete_team_memberships_batch(db, team_id, n))
+    _drain(db, job, lambda n: team_service.delete_team_events_batch(db, team_id, n))
+    team_service.finalize_team_deletion(db, team_id)
+    return {"memberships_removed": removed}
+
+
+@handler(DEACTIVATE_USER)
+def deactivate_user(db: Session, job: Job) -> dict:
+    user_id = job.payload["user_id"]
+    removed = _drain(db, job, lambda n: team_service.remove_user_memberships_batch(db, user_id, n))
+    return {"memberships_removed": removed}
+
+
+def process_next(db: Session, kinds: list[str] | None = None) -> Job | None:
+    job = job_service.claim_next(db, kinds or list(HANDLERS))
+    if job is None:
+        return None
+
+    logger.info("Running job %s (%s), attempt %s", job.id, job.kind, job.attempts)
+    try:
+        result = HANDLERS[job.kind](db, job)
+    except Exception as exc:
+        logger.exception("Job %s failed", job.id)
+        job_service.fail(db, job, f"{type(exc).__name__}: {exc}")
+    else:
+        job_service.complete(db, job, result)
+    return job
@@ -0,0 +1,112 @@
+# Business logic for the background job queue: enqueue, claim with SKIP LOCKED, progress, and completion.
+
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.enums import JobStatus
+from app.models.job import Job
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def enqueue(
+    db: Session,
+    kind: str,
+    payload: dict[str, Any],
+    created_by: int | None = None,
+    total: int | None = None,
+    commit: bool = True,
+) -> Job:
+    # commit=False leaves the job in the caller's transaction, so it is only queued if
+    # the change it follows up on commits too.
+    job = Job(kind=kind, payload=payload, status=JobStatus.queued, created_by=created_by, total=total)
+    db.add(job)
+    if not commit:
+        db.flush()
+        return job
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def get_job(db: Session, job_id: int) -> Job | None:
+    return db.get(Job, job_id)
+
+
+def requeue_stale(db: Session) -> int:
+    # Jobs whose worker died mid-run: retry them, or give up after JOB_MAX_ATTEMPTS.
+    cutoff = _now() - timedelta(seconds=settings.JOB_STALE_SECONDS)
+    stale = (Job.status == JobStatus.running) & (Job.heartbeat_at < cutoff)
+    failed = db.execute(
+        update(Job)
+        .where(stale, Job.attempts >= settings.JOB_MAX_ATTEMPTS)
+        .values(status=JobStatus.failed, error="worker stopped heartbeating", finished_at=_now())
+    ).rowcount
+    requeued = db.execute(update(Job).where(stale).values(status=JobStatus.queued)).rowcount
+    db.commit()
+    return failed + requeued
+
+
+def claim_next(db: Session, kinds: list[str] | None = None) -> Job | None:
+    # SKIP LOCKED lets any number of workers poll the same table without blocking on
+    # (or double-claiming) a row another worker is about to take.
+    query = (
+        select(Job)
+        .where(Job.status == JobStatus.queued)
+        .order_by(Job.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    if kinds:
+        query = query.where(Job.kind.in_(kinds))
+
+    job = db.execute(query).scalar_one_or_none()
+    if job is None:
+        db.rollback()
+        return None
+
+    now = _now()
+    job.status = JobStatus.running
+    job.attempts += 1
+    job.started_at = now
+    job.heartbeat_at = now
+    db.commit()
+    return job
+
+
+def report_progress(
+    db: Session,
+    job: Job,
+    progress: int,
+    total: int | None = None,
+    result: dict[str, Any] | None = None,
+) -> None:
+    # Partial results are kept so a job resumed after a crash continues from `progress`.
+    job.progress = progress
+    if total is not None:
+        job.total = total
+    if result is not None:
+        job.result = result
+    job.heartbeat_at = _now()
+    db.commit()
+
+
+def complete(db: Session, job: Job, result: dict[str, Any] | None = None) -> None:
+    job.status = JobStatus.succeeded
+    job.result = result
+    job.finished_at = _now()
+    db.commit()
+
+
+def fail(db: Session, job: Job, error: str) -> None:
+    db.rollback()
+    job.status = JobStatus.failed
+    job.error = error[:2000]
+    job.finished_at = _now()
+    db.commit()
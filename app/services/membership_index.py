@@ -0,0 +1,385 @@
+# Optional in-process snapshot of team_memberships for O(1) authorization lookups and member listing.
+
+import logging
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.enums import Role
+from app.models.membership import Membership
+from app.models.membership_event import MembershipEvent
+from app.models.team_closure import TeamClosure
+
+logger = logging.getLogger(__name__)
+
+_ROLES: tuple[Role, ...] = tuple(Role)
+_ROLE_CODES: dict[Role, int] = {role: code for code, role in enumerate(_ROLES)}
+
+# Event ids are taken before commit, so a slow transaction can commit an id below one
+# already seen. Events younger than this are re-read on every refresh (re-applying one
+# is harmless) and the cursor only moves past older ones.
+_SETTLE_SECONDS = 60
+
+
+def _to_timestamp(value: datetime) -> float:
+    # SQLite hands back naive datetimes; the column is always written in UTC.
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class _TeamEntry:
+    # Parallel arrays sorted by user_id. Entries are never mutated in place:
+    # writers build a new entry and swap it in, so readers need no lock.
+    __slots__ = ("user_ids", "roles", "joined_at")
+
+    def __init__(self) -> None:
+        self.user_ids = array("q")
+        self.roles = array("B")
+        self.joined_at = array("d")
+
+    def copy(self) -> "_TeamEntry":
+        entry = _TeamEntry()
+        entry.user_ids = array("q", self.user_ids)
+        entry.roles = array("B", self.roles)
+        entry.joined_at = array("d", self.joined_at)
+        return entry
+
+    def find(self, user_id: int) -> int:
+        i = bisect_left(self.user_ids, user_id)
+        if i < len(self.user_ids) and self.user_ids[i] == user_id:
+            return i
+        return -1
+
+
+class MembershipIndex:
+    # team -> (user_id, role, joined_at) arrays sorted by user_id, user -> sorted team ids,
+    # and team -> ancestor ids (nearest first) for inherited roles.
+    # Kept fresh by the local team_service write path plus a periodic scan of
+    # team_membership_events past a cursor, which applies adds, removals and role changes
+    # made by other workers. Team moves write no event and reach other workers with the
+    # next full rebuild (MEMBERSHIP_INDEX_REBUILD_SECONDS); until then index hits only
+    # authorize reads (see permissions.INDEX_ACTIONS).
+
+    def __init__(self) -> None:
+        self._teams: dict[int, _TeamEntry] = {}
+        self._user_teams: dict[int, array] = {}
+        self._ancestors: dict[int, array] = {}
+        self._write_lock = threading.Lock()
+        self._cursor = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.ready = False
+
+    def build(self, db: Session, batch_size: int = 10_000) -> None:
+        teams: dict[int, _TeamEntry] = {}
+        user_teams: dict[int, array] = {}
+        # Read first: changes committed during the scan are applied again by refresh.
+        cursor = db.execute(
+            select(func.coalesce(func.max(MembershipEvent.id), 0))
+            .where(MembershipEvent.created_at < datetime.now(timezone.utc) - timedelta(seconds=_SETTLE_SECONDS))
+        ).scalar_one()
+
+        rows = db.execute(
+            select(
+                Membership.team_id,
+                Membership.user_id,
+                Membership.role,
+                Membership.joined_at,
+            )
+            .order_by(Membership.team_id, Membership.user_id)
+            .execution_options(yield_per=batch_size)
+        )
+
+        entry: _TeamEntry | None = None
+        current_team: int | None = None
+        for team_id, user_id, role, joined_at in rows:
+            if team_id != current_team:
+                entry = teams[team_id] = _TeamEntry()
+                current_team = team_id
+            ts = _to_timestamp(joined_at)
+            entry.user_ids.append(user_id)
+            entry.roles.append(_ROLE_CODES[Role(role)])
+            entry.joined_at.append(ts)
+            user_teams.setdefault(user_id, array("q")).append(team_id)
+
+        ancestors: dict[int, array] = {}
+        closure = db.execute(
+            select(TeamClosure.descendant_id, TeamClosure.ancestor_id)
+            .where(TeamClosure.depth > 0)
+            .order_by(TeamClosure.descendant_id, TeamClosure.depth)
+            .execution_options(yield_per=batch_size)
+        )
+        for descendant_id, ancestor_id in closure:
+            ancestors.setdefault(descendant_id, array("q")).append(ancestor_id)
+
+        # Rows arrive ordered by team, so each user's team list is already sorted.
+        with self._write_lock:
+            self._teams = teams
+            self._user_teams = user_teams
+            self._ancestors = ancestors
+            self._cursor = cursor
+            self.ready = True
+
+        logger.info("Membership index built: %s", self.memory_usage())
+
+    def refresh(self, db: Session, batch_size: int = 1000) -> int:
+        # Events only say which (team, user) pairs changed; the current row decides, so
+        # events can be applied in any order and more than once.
+        applied = 0
+        cursor = self._cursor
+        settled = time.time() - _SETTLE_SECONDS
+        pinned = False
+        while True:
+            events = db.execute(
+                select(MembershipEvent.id, MembershipEvent.team_id, MembershipEvent.user_id, MembershipEvent.created_at)
+                .where(MembershipEvent.id > cursor)
+                .order_by(MembershipEvent.id)
+                .limit(batch_size)
+            ).all()
+            if not events:
+                break
+
+            pairs = {(team_id, user_id) for _, team_id, user_id, _ in events}
+            current = {
+                (team_id, user_id): (role, joined_at)
+                for team_id, user_id, role, joined_at in db.execute(
+                    select(Membership.team_id, Membership.user_id, Membership.role, Membership.joined_at)
+                    .where(
+                        Membership.team_id.in_({team_id for team_id, _ in pairs}),
+                        Membership.user_id.in_({user_id for _, user_id in pairs}),
+                    )
+                )
+            }
+            # Grouped by team, so each team's entry is copied once per batch of events.
+            upserts: dict[int, list[tuple[int, Role, datetime]]] = {}
+            removals: dict[int, list[int]] = {}
+            for team_id, user_id in pairs:
+                if (team_id, user_id) in current:
+                    role, joined_at = current[team_id, user_id]
+                    upserts.setdefault(team_id, []).append((user_id, Role(role), joined_at))
+                else:
+                    removals.setdefault(team_id, []).append(user_id)
+            for team_id, rows in upserts.items():
+                self.upsert_many(team_id, rows)
+            for team_id, user_ids in removals.items():
+                self.remove_many(team_id, user_ids)
+
+            cursor = events[-1].id
+            for event_id, _, _, created_at in events:
+                pinned = pinned or _to_timestamp(created_at) >= settled
+                if not pinned:
+                    self._cursor = event_id
+            applied += len(events)
+            if len(events) < batch_size:
+                break
+        return applied
+
+    def start(self, session_factory, refresh_seconds: float, rebuild_seconds: float) -> None:
+        with session_factory() as db:
+            self.build(db)
+
+        def _loop() -> None:
+            since_rebuild = 0.0
+            while not self._stop.wait(refresh_seconds):
+                since_rebuild += refresh_seconds
+                try:
+                    with session_factory() as db:
+                        if rebuild_seconds and since_rebuild >= rebuild_seconds:
+                            self.build(db)
+                            since_rebuild = 0.0
+                        else:
+                            self.refresh(db)
+                except Exception:
+                    logger.exception("Membership index refresh failed")
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=_loop, name="membership-index", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.ready = False
+
+    def upsert(self, team_id: int, user_id: int, role: Role, joined_at: datetime) -> None:
+        self.upsert_many(team_id, [(user_id, role, joined_at)])
+
+    def upsert_many(self, team_id: int, rows: Iterable[tuple[int, Role, datetime]]) -> None:
+        # One copy of the team's entry per batch, edited while unpublished, then swapped in.
+        if not self.ready:
+            return
+        changes = {user_id: (_ROLE_CODES[Role(role)], _to_timestamp(joined_at)) for user_id, role, joined_at in rows}
+        if not changes:
+            return
+
+        with self._write_lock:
+            old = self._teams.get(team_id)
+            entry = old.copy() if old is not None else _TeamEntry()
+            for user_id, (code, ts) in changes.items():
+                i = entry.find(user_id)
+                if i >= 0:
+                    entry.roles[i] = code
+                    entry.joined_at[i] = ts
+                    continue
+                i = bisect_left(entry.user_ids, user_id)
+                entry.user_ids.insert(i, user_id)
+                entry.roles.insert(i, code)
+                entry.joined_at.insert(i, ts)
+
+                teams = array("q", self._user_teams.get(user_id, ()))
+                teams.insert(bisect_left(teams, team_id), team_id)
+                self._user_teams[user_id] = teams
+
+            self._teams[team_id] = entry
+
+    def remove(self, team_id: int, user_id: int) -> None:
+        self.remove_many(team_id, [user_id])
+
+    def remove_many(self, team_id: int, user_ids: Iterable[int]) -> None:
+        if not self.ready:
+            return
+
+        with self._write_lock:
+            old = self._teams.get(team_id)
+            if old is None:
+                return
+            positions = {old.find(user_id): user_id for user_id in user_ids}
+            positions.pop(-1, None)
+            if not positions:
+                return
+            entry = old.copy()
+            for i in sorted(positions, reverse=True):
+                del entry.user_ids[i]
+                del entry.roles[i]
+                del entry.joined_at[i]
+            if len(entry.user_ids):
+                self._teams[team_id] = entry
+            else:
+                self._teams.pop(team_id, None)
+
+            for user_id in positions.values():
+                teams = array("q", self._user_teams.get(user_id, ()))
+                j = bisect_left(teams, team_id)
+                if j < len(teams) and teams[j] == team_id:
+                    del teams[j]
+                if len(teams):
+                    self._user_teams[user_id] = teams
+                else:
+                    self._user_teams.pop(user_id, None)
+
+    def remove_team(self, team_id: int) -> None:
+        if not self.ready:
+            return
+
+        with self._write_lock:
+            entry = self._teams.pop(team_id, None)
+            self._ancestors.pop(team_id, None)
+            if entry is None:
+                return
+            for user_id in entry.user_ids:
+                teams = array("q", self._user_teams.get(user_id, ()))
+                j = bisect_left(teams, team_id)
+                if j < len(teams) and teams[j] == team_id:
+                    del teams[j]
+                if len(teams):
+                    self._user_teams[user_id] = teams
+                else:
+                    self._user_teams.pop(user_id, None)
+
+    def set_ancestors(self, team_id: int, ancestor_ids: list[int]) -> None:
+        if not self.ready:
+            return
+        with self._write_lock:
+            if ancestor_ids:
+                self._ancestors[team_id] = array("q", ancestor_ids)
+            else:
+                self._ancestors.pop(team_id, None)
+
+    def get_effective(self, team_id: int, user_id: int) -> Membership | None:
+        # Same rule as team_service.get_effective_membership: the most privileged role
+        # held on the team or any ancestor wins (role codes follow Role order, admin first).
+        best: tuple[int, _TeamEntry, int] | None = None
+        for candidate in (team_id, *self._ancestors.get(team_id, ())):
+            entry = self._teams.get(candidate)
+            if entry is None:
+                continue
+            i = entry.find(user_id)
+            if i >= 0 and (best is None or entry.roles[i] < best[1].roles[best[2]]):
+                best = (candidate, entry, i)
+        if best is None:
+            return None
+        return self._membership(*best)
+
+    def get(self, team_id: int, user_id: int) -> Membership | None:
+        entry = self._teams.get(team_id)
+        if entry is None:
+            return None
+        i = entry.find(user_id)
+        if i < 0:
+            return None
+        return self._membership(team_id, entry, i)
+
+    def members(self, team_id: int) -> list[Membership]:
+        entry = self._teams.get(team_id)
+        if entry is None:
+            return []
+        order = sorted(range(len(entry.user_ids)), key=entry.joined_at.__getitem__)
+        return [self._membership(team_id, entry, i) for i in order]
+
+    def teams_for_user(self, user_id: int) -> list[int]:
+        return list(self._user_teams.get(user_id, ()))
+
+    def memory_usage(self) -> dict:
+        teams, user_teams = self._teams, self._user_teams
+        memberships = sum(len(e.user_ids) for e in teams.values())
+
+        array_bytes = sum(
+            e.user_ids.buffer_info()[1] * e.user_ids.itemsize
+            + e.roles.buffer_info()[1] * e.roles.itemsize
+            + e.joined_at.buffer_info()[1] * e.joined_at.itemsize
+            for e in teams.values()
+        ) + sum(a.buffer_info()[1] * a.itemsize for a in user_teams.values())
+
+        # getsizeof on an array includes its buffer, so this is the full footprint.
+        total_bytes = (
+            sys.getsizeof(teams)
+            + sys.getsizeof(user_teams)
+            + sum(
+                sys.getsizeof(e) + sys.getsizeof(e.user_ids) + sys.getsizeof(e.roles) + sys.getsizeof(e.joined_at)
+                for e in teams.values()
+            )
+            + sum(sys.getsizeof(a) for a in user_teams.values())
+            + sys.getsizeof(self._ancestors)
+            + sum(sys.getsizeof(a) for a in self._ancestors.values())
+        )
+        return {
+            "memberships": memberships,
+            "teams": len(teams),
+            "users": len(user_teams),
+            "array_bytes": array_bytes,
+            "total_bytes": total_bytes,
+            "bytes_per_million_memberships": int(total_bytes / memberships * 1_000_000) if memberships else 0,
+        }
+
+    @staticmethod
+    def _membership(team_id: int, entry: _TeamEntry, i: int) -> Membership:
+        # Transient instance: never added to a session, only read by RBAC checks and serializers.
+        return Membership(
+            team_id=team_id,
+            user_id=entry.user_ids[i],
+            role=_ROLES[entry.roles[i]],
+            joined_at=datetime.fromtimestamp(entry.joined_at[i], timezone.utc),
+        )
+
+
+membership_index = MembershipIndex()
@@ -1,37 +1,265 @@
-# Business logic for creating teams, adding members, and listing memberships.
+# Business logic for creating teams, adding members, listing memberships, and the membership change log.
 
+from collections import Counter
+from datetime import datetime, timezone
+
+import anyio
+from sqlalchemy import bindparam, case, delete, func, insert, literal, select, text, true, tuple_
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, aliased, make_transient_to_detached
 
-from app.core.enums import Role
+from app.core.enums import MembershipEventType, Role
+from app.core.singleflight import SingleFlight
+from app.db import sqlite
+from app.db.after_commit import after_commit
+from app.db.search import LIKE_ESCAPE, contains_pattern
 from app.models.membership import Membership
-from app.models.team import Team
+from app.models.membership_event import MembershipEvent
+from app.models.team import Team, role_count_column
+from app.models.team_closure import TeamClosure
 from app.models.user import User
 from app.schemas.team import TeamCreate, TeamMemberAdd
+from app.services.change_notifier import membership_changes
+from app.services.membership_index import membership_index
+
+
+def _touch_team(db: Session, team_id: int, role_deltas: dict[Role, int]) -> None:
+    # One UPDATE inside the caller's transaction: the ETag version and the
+    # denormalized counts commit (or roll back) together with the membership change.
+    values = {Team.version: Team.version + 1}
+    total = 0
+    for role, delta in role_deltas.items():
+        if delta:
+            column = role_count_column(role)
+            values[column] = column + delta
+            total += delta
+    if total:
+        values[Team.member_count] = Team.member_count + total
+
+    db.query(Team).filter(Team.id == team_id).update(values, synchronize_session=False)
+
+
+def _record_event(
+    db: Session,
+    team_id: int,
+    user_id: int,
+    event: MembershipEventType,
+    role: Role,
+) -> None:
+    db.add(MembershipEvent(team_id=team_id, user_id=user_id, event=event, role=role))
+
+
+# Most privileged role wins when a user holds roles on several ancestors.
+_ROLE_RANK = case(
+    {Role.admin.value: 0, Role.member.value: 1, Role.viewer.value: 2},
+    value=Membership.role,
+    else_=3,
+)
+
+_HIERARCHY_LOCK_KEY = 0x7EA3  # pg_advisory_xact_lock key serializing hierarchy changes
+
+
+def _lock_hierarchy(db: Session) -> None:
+    # Closure maintenance reads then rewrites ancestor paths; concurrent moves could
+    # otherwise interleave into a cycle or a half-linked subtree.
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _HIERARCHY_LOCK_KEY})
+    else:
+        # SQLite has a single writer: taking it now serializes the reads as well.
+        sqlite.begin_write(db)
+
 
+def _sync_index_ancestors(db: Session, team_id: int) -> None:
+    # Reads the subtree's paths inside the transaction; the index takes them on commit.
+    if not membership_index.ready:
+        return
 
-def create_team(db: Session, creator: User, payload: TeamCreate) -> Team:
-    team = Team(name=payload.name)
+    subtree = select(TeamClosure.descendant_id).where(TeamClosure.ancestor_id == team_id)
+    ancestors: dict[int, list[int]] = {descendant_id: [] for descendant_id in db.scalars(subtree)}
+    rows = (
+        db.query(TeamClosure.descendant_id, TeamClosure.ancestor_id)
+        .filter(TeamClosure.descendant_id.in_(subtree), TeamClosure.depth > 0)
+        .order_by(TeamClosure.descendant_id, TeamClosure.depth)
+        .all()
+    )
+    for descendant_id, ancestor_id in rows:
+        ancestors[descendant_id].append(ancestor_id)
+    for descendant_id, ancestor_ids in ancestors.items():
+        after_commit(db, membership_index.set_ancestors, descendant_id, ancestor_ids)
+
+
+def create_team(db: Session, creator: User, payload: TeamCreate, commit: bool = True) -> Team:
+    if payload.parent_id is not None:
+        _lock_hierarchy(db)
+
+    team = Team(name=payload.name, parent_id=payload.parent_id, member_count=1, role_admin_count=1)
     db.add(team)
     db.flush() 
 
+    db.add(TeamClosure(ancestor_id=team.id, descendant_id=team.id, depth=0))
+    if payload.parent_id is not None:
+        db.execute(
+            insert(TeamClosure).from_select(
+                ["ancestor_id", "descendant_id", "depth"],
+                select(TeamClosure.ancestor_id, literal(team.id), TeamClosure.depth + 1)
+                .where(TeamClosure.descendant_id == payload.parent_id),
+            )
+        )
+
     membership = Membership(
         user_id=creator.id,
         team_id=team.id,
         role=Role.admin,
+        joined_at=datetime.now(timezone.utc),
     )
     db.add(membership)
+    _record_event(db, team.id, creator.id, MembershipEventType.added, Role.admin)
+    after_commit(db, membership_index.upsert, team.id, creator.id, Role.admin, membership.joined_at)
+    _sync_index_ancestors(db, team.id)
 
+    # commit=False leaves the team in the caller's transaction (see job_service.enqueue);
+    # the index only hears about it once that commits.
+    if not commit:
+        db.flush()
+        return team
     db.commit()
     db.refresh(team)
     return team
 
 
-def get_team(db: Session, team_id: int) -> Team | None:
-    return db.query(Team).filter(Team.id == team_id).first()
+# Identical concurrent reads of a popular team share one query. The shared value is
+# a plain row; every caller builds its own instance from it.
+_team_reads = SingleFlight("team")
+_member_reads = SingleFlight("team_members")
+_member_change_reads = SingleFlight("team_member_changes")
+
+# The lookups behind get_team_by_id and get_current_membership run on nearly every
+# request, so they are built once here with bind parameters: no per-call statement
+# construction, the compiled form comes straight from SQLAlchemy's cache, and the SQL
+# text is stable enough for psycopg 3 to prepare it server-side.
+_TEAM_BY_ID = select(Team.__table__).where(Team.id == bindparam("team_id"), Team.deleted_at.is_(None))
+
+_EFFECTIVE_MEMBERSHIP = (
+    select(Membership)
+    .join(TeamClosure, TeamClosure.ancestor_id == Membership.team_id)
+    .where(
+        TeamClosure.descendant_id == bindparam("team_id"),
+        Membership.user_id == bindparam("user_id"),
+    )
+    .order_by(_ROLE_RANK, TeamClosure.depth)
+    .limit(1)
+)
+
+
+def get_team(db: Session, team_id: int, coalesce: bool = True) -> Team | None:
+    # coalesce=False for writes: they must decide from their own read, not from a row
+    # another request's query fetched.
+    if not coalesce:
+        return db.execute(select(Team).where(Team.id == team_id, Team.deleted_at.is_(None))).scalar_one_or_none()
+
+    row = _team_reads.do(
+        team_id,
+        lambda: db.execute(_TEAM_BY_ID, {"team_id": team_id}).mappings().first(),
+    )
+    if row is None:
+        return None
 
+    # Attach to the caller's session without another query, so routes can still modify it.
+    team = Team(**row)
+    make_transient_to_detached(team)
+    return db.merge(team, load=False)
 
-def add_member(db: Session, team_id: int, payload: TeamMemberAdd) -> Membership | None:
+
+def get_effective_membership(db: Session, team_id: int, user_id: int) -> Membership | None:
+    # One indexed query whatever the depth: the closure table lists every ancestor of the
+    # team (itself included), and the user's most privileged membership among them wins.
+    # The returned row may belong to an ancestor team.
+    return db.execute(_EFFECTIVE_MEMBERSHIP, {"team_id": team_id, "user_id": user_id}).scalar_one_or_none()
+
+
+def search_teams(
+    db: Session,
+    user_id: int,
+    query: str,
+    limit: int,
+    after: tuple[str, int] | None = None,
+) -> list[Team]:
+    # Only teams the user holds a role on, directly or through an ancestor. ILIKE on
+    # Postgres is served by the pg_trgm GIN index on teams.name (SQLite falls back to
+    # lower() LIKE); pages are keyset on (name, id), so deep pages cost the same.
+    visible = (
+        select(TeamClosure.descendant_id)
+        .join(Membership, Membership.team_id == TeamClosure.ancestor_id)
+        .where(Membership.user_id == user_id)
+    )
+    stmt = (
+        select(Team)
+        .where(
+            Team.id.in_(visible),
+            Team.deleted_at.is_(None),
+            Team.name.ilike(contains_pattern(query), escape=LIKE_ESCAPE),
+        )
+        .order_by(Team.name, Team.id)
+        .limit(limit)
+    )
+    if after is not None:
+        stmt = stmt.where(tuple_(Team.name, Team.id) > tuple_(*after))
+    return list(db.execute(stmt).scalars())
+
+
+def move_team(db: Session, team: Team, new_parent_id: int | None) -> Team:
+    _lock_hierarchy(db)
+
+    if new_parent_id is not None:
+        in_subtree = (
+            db.query(TeamClosure)
+            .filter(
+                TeamClosure.ancestor_id == team.id,
+                TeamClosure.descendant_id == new_parent_id,
+            )
+            .first()
+        )
+        if in_subtree is not None:
+            raise ValueError("cycle")
+
+    subtree = select(TeamClosure.descendant_id).where(TeamClosure.ancestor_id == team.id)
+
+    # Unlink the subtree from its old ancestors; paths inside the subtree are kept.
+    db.execute(
+        delete(TeamClosure)
+        .where(
+            TeamClosure.descendant_id.in_(subtree),
+            TeamClosure.ancestor_id.not_in(subtree),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+    # Link every ancestor of the new parent to every node of the subtree.
+    if new_parent_id is not None:
+        above = aliased(TeamClosure)
+        below = aliased(TeamClosure)
+        db.execute(
+            insert(TeamClosure).from_select(
+                ["ancestor_id", "descendant_id", "depth"],
+                select(above.ancestor_id, below.descendant_id, above.depth + below.depth + 1)
+                .select_from(above)
+                .join(below, true())  # deliberate cross join of the two path sets
+                .where(
+                    above.descendant_id == new_parent_id,
+                    below.ancestor_id == team.id,
+                ),
+            )
+        )
+
+    team.parent_id = new_parent_id
+    _touch_team(db, team.id, {})
+    _sync_index_ancestors(db, team.id)
+    db.commit()
+    db.refresh(team)
+    return team
+
+
+def add_member(db: Session, team_id: int, payload: TeamMemberAdd, commit: bool = True) -> Membership | None:
     email = payload.email.strip().lower()
     user = db.query(User).filter(User.email == email).first()
     if user is None:
@@ -41,26 +269,130 @@ def add_member(db: Session, team_id: int, payload: TeamMemberAdd) -> Membership
         user_id=user.id,
         team_id=team_id,
         role=payload.role,
+        joined_at=datetime.now(timezone.utc),
     )
     db.add(membership)
-
+    # Flush the membership first so a duplicate fails before the event row is written.
     try:
-        db.commit()
+        db.flush()
     except IntegrityError:
         db.rollback()
-        raise ValueError("already_member") 
+        raise ValueError("already_member")
+
+    _touch_team(db, team_id, {payload.role: 1})
+    _record_event(db, team_id, user.id, MembershipEventType.added, payload.role)
+    after_commit(db, membership_index.upsert, team_id, user.id, payload.role, membership.joined_at)
+    after_commit(db, membership_changes.notify, team_id)
+    if not commit:
+        db.flush()
+        return membership
+    db.commit()
 
     db.refresh(membership)
     return membership
 
 
-def list_members(db: Session, team_id: int) -> list[Membership]:
-    return (
-        db.query(Membership)
-        .filter(Membership.team_id == team_id)
+def add_members_bulk(db: Session, team_id: int, entries: list[tuple[str, Role]]) -> dict[str, int]:
+    # One transaction per batch: two queries to resolve users and existing memberships,
+    # then one INSERT per table and a single counts update for the whole batch.
+    wanted = {email.strip().lower(): Role(role) for email, role in entries}
+    for _ in range(2):
+        users = dict(db.execute(select(User.email, User.id).where(User.email.in_(wanted))).all())
+        existing = set(
+            db.scalars(
+                select(Membership.user_id).where(
+                    Membership.team_id == team_id,
+                    Membership.user_id.in_(users.values()),
+                )
+            )
+        )
+        joined_at = datetime.now(timezone.utc)
+        added = [(users[email], wanted[email]) for email in users if users[email] not in existing]
+        if not added:
+            db.rollback()
+            break
+
+        try:
+            # Lock the team row first: event ids are then handed out in the order the
+            # writers to this team commit, which the change feed cursor relies on.
+            _touch_team(db, team_id, Counter(role for _, role in added))
+            db.execute(
+                insert(Membership),
+                [{"user_id": user_id, "team_id": team_id, "role": role, "joined_at": joined_at} for user_id, role in added],
+            )
+            db.execute(
+                insert(MembershipEvent),
+                [
+                    {"team_id": team_id, "user_id": user_id, "event": MembershipEventType.added, "role": role}
+                    for user_id, role in added
+                ],
+            )
+            after_commit(db, membership_index.upsert_many, team_id, [(user_id, role, joined_at) for user_id, role in added])
+            after_commit(db, membership_changes.notify, team_id)
+            db.commit()
+            break
+        except IntegrityError:
+            # Someone added one of these users concurrently; re-read and retry once.
+            db.rollback()
+    else:
+        raise ValueError("concurrent_update")
+
+    return {"added": len(added), "already_member": len(existing), "unknown_email": len(wanted) - len(users)}
+
+
+def list_members(db: Session, team_id: int, use_index: bool = True) -> list[Membership]:
+    if use_index and membership_index.ready:
+        return membership_index.members(team_id)
+
+    rows = _member_reads.do(
+        team_id,
+        lambda: db.execute(
+            select(Membership.__table__)
+            .where(Membership.team_id == team_id)
+            .order_by(Membership.joined_at.asc())
+        ).mappings().all(),
+    )
+    # Transient instances, like the index returns: only read by serializers.
+    return [Membership(**row) for row in rows]
+
+
+MEMBER_FIELDS = ("user_id", "role", "joined_at")
+
+
+def list_member_fields(
+    db: Session,
+    team_id: int,
+    fields: tuple[str, ...],
+    include_user: bool = False,
+    use_index: bool = True,
+) -> list[dict]:
+    # Sparse listing: only the requested membership columns are selected, and user
+    # details come from one join rather than a request per member.
+    if use_index and membership_index.ready and not include_user:
+        return [{f: getattr(m, f) for f in fields} for m in membership_index.members(team_id)]
+
+    stmt = (
+        select(*(Membership.__table__.c[f] for f in fields))
+        .select_from(Membership)
+        .where(Membership.team_id == team_id)
         .order_by(Membership.joined_at.asc())
-        .all()
     )
+    if include_user:
+        stmt = stmt.join(User, User.id == Membership.user_id).add_columns(
+            User.id.label("user__id"), User.email.label("user__email")
+        )
+
+    rows = _member_reads.do(
+        (team_id, fields, include_user),
+        lambda: db.execute(stmt).mappings().all(),
+    )
+    members = []
+    for row in rows:
+        member = {f: row[f] for f in fields}
+        if include_user:
+            member["user"] = {"id": row["user__id"], "email": row["user__email"]}
+        members.append(member)
+    return members
 
 
 def remove_member(db: Session, team_id: int, user_id: int) -> bool:
@@ -76,6 +408,10 @@ def remove_member(db: Session, team_id: int, user_id: int) -> bool:
         return False
 
     db.delete(membership)
+    _touch_team(db, team_id, {membership.role: -1})
+    _record_event(db, team_id, user_id, MembershipEventType.removed, membership.role)
+    after_commit(db, membership_index.remove, team_id, user_id)
+    after_commit(db, membership_changes.notify, team_id)
     db.commit()
     return True
 
@@ -97,7 +433,162 @@ def change_member_role(
     if membership is None:
         return None
 
+    old_role = Role(membership.role)
     membership.role = new_role
+    _touch_team(db, team_id, {old_role: -1, new_role: 1} if old_role != new_role else {})
+    _record_event(db, team_id, user_id, MembershipEventType.role_changed, new_role)
+    after_commit(db, membership_index.upsert, team_id, user_id, new_role, membership.joined_at)
+    after_commit(db, membership_changes.notify, team_id)
     db.commit()
     db.refresh(membership)
     return membership
+
+
+def soft_delete_team(db: Session, team: Team) -> None:
+    # Children would silently lose inherited roles; they must be moved or deleted first.
+    # The hierarchy lock keeps a concurrent move from adding one after the check.
+    _lock_hierarchy(db)
+    has_children = (
+        db.query(Team.id)
+        .filter(Team.parent_id == team.id, Team.deleted_at.is_(None))
+        .first()
+    )
+    if has_children is not None:
+        db.rollback()
+        raise ValueError("has_children")
+
+    team.deleted_at = datetime.now(timezone.utc)
+    _touch_team(db, team.id, {})
+    after_commit(db, membership_index.remove_team, team.id)
+    db.commit()
+
+
+def delete_team_memberships_batch(db: Session, team_id: int, batch_size: int) -> int:
+    # Bounded deletes instead of one ON DELETE CASCADE over every membership: each
+    # batch holds its row locks only for one short transaction.
+    batch = select(Membership.user_id).where(Membership.team_id == team_id).limit(batch_size)
+    deleted = db.execute(
+        delete(Membership).where(Membership.team_id == team_id, Membership.user_id.in_(batch))
+    ).rowcount
+    db.commit()
+    return deleted
+
+
+def delete_team_events_batch(db: Session, team_id: int, batch_size: int) -> int:
+    batch = select(MembershipEvent.id).where(MembershipEvent.team_id == team_id).limit(batch_size)
+    deleted = db.execute(delete(MembershipEvent).where(MembershipEvent.id.in_(batch))).rowcount
+    db.commit()
+    return deleted
+
+
+def finalize_team_deletion(db: Session, team_id: int) -> None:
+    db.execute(
+        delete(TeamClosure).where(
+            (TeamClosure.ancestor_id == team_id) | (TeamClosure.descendant_id == team_id)
+        )
+    )
+    db.execute(delete(Team).where(Team.id == team_id, Team.deleted_at.is_not(None)))
+    db.commit()
+
+
+def remove_user_memberships_batch(db: Session, user_id: int, batch_size: int) -> int:
+    # Each removal is a normal membership change for its team (event, counts, version);
+    # teams are touched in id order so concurrent writers lock them in the same order.
+    rows = db.execute(
+        select(Membership.team_id, Membership.role)
+        .where(Membership.user_id == user_id)
+        .order_by(Membership.team_id)
+        .limit(batch_size)
+    ).all()
+    if not rows:
+        return 0
+
+    team_ids = [team_id for team_id, _ in rows]
+    db.execute(delete(Membership).where(Membership.user_id == user_id, Membership.team_id.in_(team_ids)))
+    for team_id, role in rows:
+        _touch_team(db, team_id, {Role(role): -1})
+        _record_event(db, team_id, user_id, MembershipEventType.removed, role)
+        after_commit(db, membership_index.remove, team_id, user_id)
+        after_commit(db, membership_changes.notify, team_id)
+    db.commit()
+    return len(rows)
+
+
+def list_member_changes(
+    db: Session,
+    team_id: int,
+    since: int,
+    limit: int,
+) -> list[MembershipEvent]:
+    rows = db.execute(
+        select(MembershipEvent.__table__)
+        .where(
+            MembershipEvent.team_id == team_id,
+            MembershipEvent.id > since,
+        )
+        .order_by(MembershipEvent.id.asc())
+        .limit(limit)
+    ).mappings().all()
+    return [MembershipEvent(**row) for row in rows]
+
+
+async def poll_member_changes(
+    db: Session,
+    team_id: int,
+    since: int,
+    limit: int,
+) -> list[MembershipEvent]:
+    # Long-poll waiters on a team all wake on the same notify and re-query with the
+    # same cursor; let them share one query on the event loop. The shared query uses
+    # its own short session, since it may outlive the request that started it.
+    def read() -> list[MembershipEvent]:
+        with Session(bind=db.get_bind()) as session:
+            return list_member_changes(session, team_id, since, limit)
+
+    return await _member_change_reads.do_async(
+        (team_id, since, limit),
+        lambda: anyio.to_thread.run_sync(read),
+    )
+
+
+def reconcile_member_counts(db: Session, batch_size: int = 500) -> int:
+    # Recomputes the denormalized counts from team_memberships one batch of teams at a
+    # time. The batch's team rows are locked first so concurrent membership writes wait
+    # instead of racing the recount. Returns the number of teams that were repaired.
+    repaired = 0
+    last_id = 0
+    while True:
+        teams = (
+            db.query(Team)
+            .filter(Team.id > last_id)
+            .order_by(Team.id.asc())
+            .limit(batch_size)
+            .with_for_update()
+            .all()
+        )
+        if not teams:
+            return repaired
+        last_id = teams[-1].id
+
+        actual: dict[int, dict[Role, int]] = {team.id: {} for team in teams}
+        rows = (
+            db.query(Membership.team_id, Membership.role, func.count())
+            .filter(Membership.team_id.in_(actual.keys()))
+            .group_by(Membership.team_id, Membership.role)
+            .all()
+        )
+        for team_id, role, count in rows:
+            actual[team_id][Role(role)] = count
+
+        for team in teams:
+            counts = actual[team.id]
+            expected = {role: counts.get(role, 0) for role in Role}
+            if team.role_counts == expected and team.member_count == sum(expected.values()):
+                continue
+            for role, count in expected.items():
+                setattr(team, role_count_column(role).key, count)
+            team.member_count = sum(expected.values())
+            team.version += 1
+            repaired += 1
+
+        db.commit()
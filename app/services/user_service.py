@@ -0,0 +1,37 @@
+# Business logic for the user directory: email-prefix search for picking members to add.
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.db.search import LIKE_ESCAPE, prefix_pattern
+from app.models.membership import Membership
+from app.models.user import User
+
+
+def search_users(
+    db: Session,
+    email_prefix: str,
+    limit: int,
+    exclude_team_id: int | None = None,
+    after: str | None = None,
+) -> list[User]:
+    # Emails are stored lowercased. The prefix LIKE is served by the pg_trgm GIN index
+    # on users.email on Postgres; pages are keyset on the (unique) email.
+    stmt = (
+        select(User)
+        .where(
+            User.email.like(prefix_pattern(email_prefix.strip().lower()), escape=LIKE_ESCAPE),
+            User.deactivated_at.is_(None),
+        )
+        .order_by(User.email)
+        .limit(limit)
+    )
+    if exclude_team_id is not None:
+        stmt = stmt.where(
+            ~select(Membership.user_id)
+            .where(Membership.team_id == exclude_team_id, Membership.user_id == User.id)
+            .exists()
+        )
+    if after is not None:
+        stmt = stmt.where(User.email > after)
+    return list(db.execute(stmt).scalars())
@@ -0,0 +1,90 @@
+# Benchmarks exporting all memberships: one list_members call per team (what the analytics
+# and backup jobs did) versus the streaming export, with throughput and peak Python memory.
+#
+#   DATABASE_URL=postgresql+psycopg://... python -m benchmarks.bench_export --teams 20000 --members 50
+
+import argparse
+import time
+import tracemalloc
+
+from sqlalchemy import insert, select
+
+from app.core.enums import Role
+from app.db.session import engine
+from app.models.membership import Membership
+from app.models.team import Team
+from app.services import export_service, team_service
+from benchmarks.common import make_users, session, setup_schema
+
+CHUNK = 10_000
+
+
+def seed(db, teams: int, members: int) -> list[int]:
+    users = [u.id for u in make_users(db, members, prefix="export")]
+    db.execute(insert(Team), [{"name": f"export {i}", "member_count": members} for i in range(teams)])
+    team_ids = list(db.scalars(select(Team.id).where(Team.name.like("export %")).order_by(Team.id).limit(teams)))
+    rows = ({"user_id": u, "team_id": t, "role": Role.member} for t in team_ids for u in users)
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == CHUNK:
+            db.execute(insert(Membership), batch)
+            batch = []
+    if batch:
+        db.execute(insert(Membership), batch)
+    db.commit()
+    return team_ids
+
+
+def measure(label: str, fn) -> None:
+    started = time.perf_counter()
+    rows, size = fn()
+    elapsed = time.perf_counter() - started
+    # Second run for memory only: tracemalloc slows allocation-heavy code several times over.
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{label:<36} rows={rows:<9} {elapsed:8.2f}s {rows / elapsed:12,.0f} rows/s "
+        f"{size / 1e6 / elapsed:8.1f} MB/s peak={peak / 1e6:7.1f} MB"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--teams", type=int, default=5_000)
+    parser.add_argument("--members", type=int, default=50)
+    args = parser.parse_args()
+
+    setup_schema()
+    db = session()
+    team_ids = seed(db, args.teams, args.members)
+    print(f"dialect={engine.dialect.name} driver={engine.dialect.driver}")
+
+    def per_team():
+        rows = 0
+        for team_id in team_ids:
+            members = team_service.list_members(db, team_id)
+            rows += len(members)
+            db.expunge_all()
+        return rows, 0
+
+    def streamed(fmt):
+        def run():
+            size = lines = 0
+            with engine.connect() as connection:
+                for chunk in export_service.stream(connection, "memberships", fmt, chunk_bytes=256 * 1024, fetch_rows=5000):
+                    size += len(chunk)
+                    lines += chunk.count(b"\n")
+            return lines, size
+        return run
+
+    measure("list_members per team", per_team)
+    measure("export memberships (csv)", streamed("csv"))
+    measure("export memberships (ndjson)", streamed("ndjson"))
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
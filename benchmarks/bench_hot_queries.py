@@ -0,0 +1,71 @@
+# Benchmarks the per-request dependency lookups: queries rebuilt on every call (as before)
+# versus the statements built once in deps/team_service.
+#
+#   DATABASE_URL=postgresql+psycopg://... python -m benchmarks.bench_hot_queries --iterations 20000
+
+import argparse
+
+from sqlalchemy import select
+
+from app.api.v1 import deps
+from app.models.membership import Membership
+from app.models.team import Team
+from app.models.team_closure import TeamClosure
+from app.models.user import User
+from app.schemas.team import TeamCreate
+from app.services import team_service
+from benchmarks.common import make_users, session, setup_schema, summarize, timed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=10_000)
+    args = parser.parse_args()
+
+    setup_schema()
+    db = session()
+    (user,) = make_users(db, 1, prefix="hot")
+    team_id = team_service.create_team(db, user, TeamCreate(name="hot")).id
+    user_id = user.id
+
+    def fresh(fn):
+        # Each request has its own session; don't let the identity map serve repeats.
+        def call():
+            fn()
+            db.expunge_all()
+        return call
+
+    cases = {
+        "user by id": (
+            lambda: db.query(User).filter(User.id == user_id).first(),
+            lambda: db.execute(deps._USER_BY_ID, {"user_id": user_id}).scalar_one_or_none(),
+        ),
+        "team by id": (
+            lambda: db.execute(
+                select(Team.__table__).where(Team.id == team_id, Team.deleted_at.is_(None))
+            ).mappings().first(),
+            lambda: db.execute(team_service._TEAM_BY_ID, {"team_id": team_id}).mappings().first(),
+        ),
+        "effective membership": (
+            lambda: db.query(Membership)
+            .join(TeamClosure, TeamClosure.ancestor_id == Membership.team_id)
+            .filter(TeamClosure.descendant_id == team_id, Membership.user_id == user_id)
+            .order_by(team_service._ROLE_RANK, TeamClosure.depth)
+            .first(),
+            lambda: team_service.get_effective_membership(db, team_id, user_id),
+        ),
+    }
+
+    print(f"dialect={db.get_bind().dialect.name} driver={db.get_bind().dialect.driver}")
+    for label, (rebuilt, prebuilt) in cases.items():
+        # Warm up the compiled cache (and psycopg's prepared statements) for both forms.
+        timed(fresh(rebuilt), 100)
+        timed(fresh(prebuilt), 100)
+        print(summarize(f"{label}, rebuilt per call", timed(fresh(rebuilt), args.iterations)))
+        print(summarize(f"{label}, built once", timed(fresh(prebuilt), args.iterations)))
+
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# Benchmarks membership lookups on a plain table versus the same rows hash-partitioned by team_id
+# (Postgres only). Both are scratch tables with the production layout, filled with generate_series.
+#
+#   DATABASE_URL=postgresql+psycopg://... python -m benchmarks.bench_membership_partitioning --teams 100000 --members 50
+
+import argparse
+import random
+
+from sqlalchemy import text
+
+from app.db.membership_partitioning import MEMBERSHIP_PARTITIONS, partition_ddl
+from benchmarks.common import session, summarize, timed
+
+_COLUMNS = """
+    user_id INTEGER NOT NULL,
+    team_id INTEGER NOT NULL,
+    role VARCHAR(16) NOT NULL,
+    joined_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+    PRIMARY KEY (user_id, team_id)
+"""
+
+
+def build(db, table: str, partitioned: bool, teams: int, members: int, users: int) -> None:
+    db.execute(text(f"DROP TABLE IF EXISTS {table}"))
+    db.execute(text(f"CREATE TABLE {table} ({_COLUMNS}){' PARTITION BY HASH (team_id)' if partitioned else ''}"))
+    if partitioned:
+        for statement in partition_ddl(table):
+            db.execute(text(statement))
+    # Same pseudo-random membership for both tables: member k of team t is user (t * 7919 + k) % users.
+    db.execute(text(f"""
+        INSERT INTO {table} (user_id, team_id, role, joined_at)
+        SELECT (t * 7919 + k) % :users, t,
+            CASE WHEN k = 0 THEN 'admin' ELSE 'member' END,
+            now() - make_interval(secs => k)
+        FROM generate_series(1, :teams) t, generate_series(0, :members - 1) k
+        ON CONFLICT DO NOTHING
+    """), {"teams": teams, "members": members, "users": users})
+    db.execute(text(f"CREATE INDEX ix_{table}_team_id_joined_at ON {table} (team_id, joined_at)"))
+    db.execute(text(f"ANALYZE {table}"))
+    db.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--teams", type=int, default=20_000)
+    parser.add_argument("--members", type=int, default=50)
+    parser.add_argument("--users", type=int, default=200_000)
+    parser.add_argument("--iterations", type=int, default=5_000)
+    args = parser.parse_args()
+
+    db = session()
+    if db.get_bind().dialect.name != "postgresql":
+        raise SystemExit("bench_membership_partitioning needs Postgres")
+
+    tables = {"plain": "bench_memberships_plain", f"hash x{MEMBERSHIP_PARTITIONS}": "bench_memberships_hash"}
+    for table in tables.values():
+        build(db, table, partitioned=table.endswith("hash"), teams=args.teams, members=args.members, users=args.users)
+    rows = db.execute(text("SELECT count(*) FROM bench_memberships_plain")).scalar()
+    print(f"teams={args.teams} memberships={rows}")
+
+    rng = random.Random(7)
+    samples = db.execute(
+        text("SELECT user_id, team_id FROM bench_memberships_plain ORDER BY random() LIMIT 1000")
+    ).all()
+
+    def case(sql: str, params):
+        return lambda: db.execute(text(sql), params(rng.choice(samples))).all()
+
+    for label, table in tables.items():
+        queries = {
+            "point lookup (user_id, team_id)": (
+                f"SELECT role FROM {table} WHERE user_id = :u AND team_id = :t",
+                lambda s: {"u": s.user_id, "t": s.team_id},
+            ),
+            "team listing, first 50 by joined_at": (
+                f"SELECT user_id, role, joined_at FROM {table} WHERE team_id = :t ORDER BY joined_at LIMIT 50",
+                lambda s: {"t": s.team_id},
+            ),
+            "team role counts": (
+                f"SELECT role, count(*) FROM {table} WHERE team_id = :t GROUP BY role",
+                lambda s: {"t": s.team_id},
+            ),
+            # No team_id: every partition is probed, the cost of partitioning on team_id.
+            "teams of one user": (
+                f"SELECT team_id FROM {table} WHERE user_id = :u",
+                lambda s: {"u": s.user_id},
+            ),
+        }
+        for name, (sql, params) in queries.items():
+            fn = case(sql, params)
+            timed(fn, 100)
+            print(summarize(f"{label}: {name}", timed(fn, args.iterations)))
+
+    plan = db.execute(text(
+        "EXPLAIN SELECT role FROM bench_memberships_hash WHERE user_id = 1 AND team_id = 1"
+    )).scalars().all()
+    print("hash point lookup plan:\n  " + "\n  ".join(plan))
+
+    for table in tables.values():
+        db.execute(text(f"DROP TABLE {table}"))
+    db.commit()
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
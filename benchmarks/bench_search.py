@@ -0,0 +1,85 @@
+# Benchmarks typeahead queries (team search, user email-prefix search) on large tables.
+#
+#   DATABASE_URL=postgresql+psycopg://... python -m benchmarks.bench_search --teams 1000000 --users 1000000
+
+import argparse
+import random
+
+from sqlalchemy import func, insert, select
+
+from app.core.enums import Role
+from app.core.security import hash_password
+from app.models.membership import Membership
+from app.models.team import Team
+from app.models.team_closure import TeamClosure
+from app.models.user import User
+from app.services import team_service, user_service
+from benchmarks.common import session, setup_schema, summarize, timed
+
+WORDS = ["platform", "billing", "growth", "search", "mobile", "infra", "data", "design", "support", "security",
+         "payments", "identity", "edge", "ledger", "catalog", "checkout", "ops", "research", "sales", "legal"]
+CHUNK = 10_000
+
+
+def seed(db, teams: int, users: int, visible: int) -> int:
+    rng = random.Random(42)
+    first_team = (db.scalar(select(func.max(Team.id))) or 0) + 1
+    for start in range(0, teams, CHUNK):
+        rows = [
+            {"name": f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}"}
+            for i in range(start, min(start + CHUNK, teams))
+        ]
+        db.execute(insert(Team), rows)
+    team_ids = list(db.scalars(select(Team.id).where(Team.id >= first_team)))
+    for start in range(0, len(team_ids), CHUNK):
+        db.execute(insert(TeamClosure), [
+            {"ancestor_id": t, "descendant_id": t, "depth": 0} for t in team_ids[start:start + CHUNK]
+        ])
+
+    password = hash_password("password123")
+    tag = rng.randrange(1 << 30)
+    for start in range(0, users, CHUNK):
+        db.execute(insert(User), [
+            {"email": f"{rng.choice(WORDS)}.{i}.{tag}@example.com", "hashed_password": password}
+            for i in range(start, min(start + CHUNK, users))
+        ])
+    db.commit()
+
+    searcher = User(email=f"searcher.{tag}@example.com", hashed_password=password)
+    db.add(searcher)
+    db.flush()
+    for start in range(0, visible, CHUNK):
+        db.execute(insert(Membership), [
+            {"user_id": searcher.id, "team_id": t, "role": Role.admin}
+            for t in team_ids[start:min(start + CHUNK, visible)]
+        ])
+    db.commit()
+    return searcher.id
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--teams", type=int, default=200_000)
+    parser.add_argument("--users", type=int, default=200_000)
+    parser.add_argument("--visible", type=int, default=5_000, help="teams the searching user belongs to")
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    setup_schema()
+    db = session()
+    searcher_id = seed(db, args.teams, args.users, args.visible)
+    print(f"teams={args.teams} users={args.users} visible={args.visible}")
+
+    for query in ("pla", "payments led", "zzz"):
+        print(summarize(f"team search q={query!r}", timed(
+            lambda: team_service.search_teams(db, searcher_id, query, 21), args.iterations)))
+        db.rollback()
+    for prefix in ("bil", "billing.12", "zzz"):
+        print(summarize(f"user search email={prefix!r}", timed(
+            lambda: user_service.search_users(db, prefix, 21), args.iterations)))
+        db.rollback()
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
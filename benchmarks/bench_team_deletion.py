@@ -0,0 +1,116 @@
+# Benchmarks read/write latency on other teams while a large team is deleted: one
+# cascading DELETE versus the batched delete job.
+#
+#   DATABASE_URL=postgresql+psycopg://... python -m benchmarks.bench_team_deletion --members 200000
+
+import argparse
+import threading
+import time
+
+from sqlalchemy import delete, insert
+
+from app.core.config import settings
+from app.core.enums import Role
+from app.models.membership import Membership
+from app.models.team import Team
+from app.schemas.team import TeamCreate
+from app.services import job_service, team_service
+from app.services.job_handlers import DELETE_TEAM, delete_team
+from benchmarks.common import make_users, session, setup_schema, summarize
+
+
+def build_team(db, owner, users, name: str) -> int:
+    team = team_service.create_team(db, owner, TeamCreate(name=name))
+    rows = [{"user_id": u.id, "team_id": team.id, "role": Role.member} for u in users if u.id != owner.id]
+    for start in range(0, len(rows), 10_000):
+        db.execute(insert(Membership), rows[start:start + 10_000])
+    db.commit()
+    return team.id
+
+
+def run_load(readers: int, neighbour_id: int, member_ids: list[int], stop: threading.Event):
+    # Readers hit a different team whose members overlap the one being deleted; one
+    # writer keeps flipping a shared member's role there.
+    samples: dict[str, list[float]] = {"read": [], "write": []}
+
+    def reader(i: int) -> None:
+        db = session()
+        while not stop.is_set():
+            start = time.perf_counter()
+            team_service.get_team(db, neighbour_id)
+            team_service.get_effective_membership(db, neighbour_id, member_ids[i % len(member_ids)])
+            db.rollback()
+            samples["read"].append((time.perf_counter() - start) * 1000)
+        db.close()
+
+    def writer() -> None:
+        db = session()
+        roles = [Role.viewer, Role.member]
+        n = 0
+        while not stop.is_set():
+            start = time.perf_counter()
+            team_service.change_member_role(db, neighbour_id, member_ids[n % len(member_ids)], roles[n % 2])
+            samples["write"].append((time.perf_counter() - start) * 1000)
+            n += 1
+        db.close()
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    return samples, threads
+
+
+def measure(label: str, readers: int, neighbour_id: int, member_ids: list[int], action) -> None:
+    stop = threading.Event()
+    samples, threads = run_load(readers, neighbour_id, member_ids, stop)
+    time.sleep(0.5)
+    start = time.perf_counter()
+    action()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for thread in threads:
+        thread.join()
+    print(f"{label}: deletion took {elapsed:.2f}s")
+    print(summarize("  reads on neighbour team", samples["read"]))
+    print(summarize("  role changes on neighbour team", samples["write"]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--members", type=int, default=100_000)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=settings.DELETE_BATCH_SIZE)
+    args = parser.parse_args()
+    settings.DELETE_BATCH_SIZE = args.batch_size
+
+    setup_schema()
+    db = session()
+    users = make_users(db, args.members, prefix="deletion")
+    owner = users[0]
+    neighbour_id = build_team(db, owner, users[:1000], "neighbour")
+    member_ids = [u.id for u in users[1:1000]]
+    print(f"members={args.members} readers={args.readers} batch={args.batch_size}")
+
+    cascade_id = build_team(db, owner, users, "cascade")
+    batched_id = build_team(db, owner, users, "batched")
+
+    measure("idle baseline", args.readers, neighbour_id, member_ids, lambda: time.sleep(2))
+
+    def cascade() -> None:
+        db.execute(delete(Team).where(Team.id == cascade_id))
+        db.commit()
+
+    measure("single cascading DELETE", args.readers, neighbour_id, member_ids, cascade)
+
+    def batched() -> None:
+        team_service.soft_delete_team(db, team_service.get_team(db, batched_id))
+        job = job_service.enqueue(db, DELETE_TEAM, {"team_id": batched_id})
+        delete_team(db, job)
+
+    measure("batched delete job", args.readers, neighbour_id, member_ids, batched)
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
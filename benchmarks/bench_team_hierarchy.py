@@ -0,0 +1,83 @@
+# Benchmarks effective-role resolution and reparenting on deep and wide team hierarchies.
+#
+#   DATABASE_URL=postgresql+psycopg://... python -m benchmarks.bench_team_hierarchy --depth 200 --width 5000
+
+import argparse
+
+from app.core.enums import Role
+from app.models.membership import Membership
+from app.schemas.team import TeamCreate
+from app.services import team_service
+from benchmarks.common import make_users, session, setup_schema, summarize, timed
+
+
+def build_chain(db, owner, depth: int) -> list[int]:
+    ids = []
+    parent_id = None
+    for i in range(depth):
+        team = team_service.create_team(db, owner, TeamCreate(name=f"deep-{i}", parent_id=parent_id))
+        ids.append(team.id)
+        parent_id = team.id
+    return ids
+
+
+def build_fan(db, owner, width: int) -> tuple[int, list[int]]:
+    root = team_service.create_team(db, owner, TeamCreate(name="wide-root"))
+    children = [
+        team_service.create_team(db, owner, TeamCreate(name=f"wide-{i}", parent_id=root.id)).id
+        for i in range(width)
+    ]
+    return root.id, children
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--depth", type=int, default=200)
+    parser.add_argument("--width", type=int, default=2000)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    setup_schema()
+    db = session()
+    owner, reader = make_users(db, 2, prefix="hierarchy")
+
+    chain = build_chain(db, owner, args.depth)
+    root_id, children = build_fan(db, owner, args.width)
+
+    # The reader only holds a viewer role at the top of each hierarchy.
+    db.add_all([
+        Membership(user_id=reader.id, team_id=chain[0], role=Role.viewer),
+        Membership(user_id=reader.id, team_id=root_id, role=Role.viewer),
+    ])
+    db.commit()
+
+    leaf = chain[-1]
+    print(f"deep chain: depth={args.depth}   wide fan: width={args.width}")
+    print(summarize("effective role, direct member (depth 0)", timed(
+        lambda: team_service.get_effective_membership(db, chain[0], owner.id), args.iterations)))
+    print(summarize(f"effective role, inherited (depth {args.depth - 1})", timed(
+        lambda: team_service.get_effective_membership(db, leaf, reader.id), args.iterations)))
+    print(summarize("effective role, inherited (wide leaf)", timed(
+        lambda: team_service.get_effective_membership(db, children[-1], reader.id), args.iterations)))
+    print(summarize("effective role, non-member (deep leaf)", timed(
+        lambda: team_service.get_effective_membership(db, leaf, 0), args.iterations)))
+
+    # Reparenting cost grows with (ancestors of new parent) x (subtree size).
+    mid = chain[len(chain) // 2]
+    moves = []
+    for target in (None, chain[len(chain) // 4]):
+        team = team_service.get_team(db, mid)
+        moves += timed(lambda: team_service.move_team(db, team, target), 1)
+    print(summarize(f"move mid-chain subtree ({len(chain) - len(chain) // 2} teams)", moves))
+
+    fan_moves = []
+    for target in (None, root_id):
+        team = team_service.get_team(db, children[0])
+        fan_moves += timed(lambda: team_service.move_team(db, team, target), 1)
+    print(summarize("move single wide leaf", fan_moves))
+
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
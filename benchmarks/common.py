@@ -0,0 +1,57 @@
+# Shared helpers for the benchmark scripts: schema setup, fixture users, and latency summaries.
+
+import statistics
+import time
+import uuid
+from typing import Callable
+
+from app.core.security import hash_password
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+from app.models.user import User
+
+import app.models  # noqa: F401 - registers all models on Base.metadata
+
+# Every benchmark user gets the same hash; bcrypt cost is not what is measured here.
+_PASSWORD_HASH = None
+
+
+def setup_schema() -> None:
+    Base.metadata.create_all(bind=engine)
+
+
+def make_users(db, count: int, prefix: str = "bench") -> list[User]:
+    global _PASSWORD_HASH
+    if _PASSWORD_HASH is None:
+        _PASSWORD_HASH = hash_password("password123")
+
+    run = uuid.uuid4().hex[:8]
+    users = [
+        User(email=f"{prefix}-{run}-{i}@example.com", hashed_password=_PASSWORD_HASH)
+        for i in range(count)
+    ]
+    db.add_all(users)
+    db.commit()
+    return users
+
+
+def timed(fn: Callable[[], object], iterations: int) -> list[float]:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summarize(label: str, samples_ms: list[float]) -> str:
+    ordered = sorted(samples_ms)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return (
+        f"{label:<48} n={len(ordered):<6} "
+        f"p50={statistics.median(ordered):8.3f}ms p99={p99:8.3f}ms max={ordered[-1]:8.3f}ms"
+    )
+
+
+def session():
+    return SessionLocal()
@@ -1,17 +1,50 @@
-# Test fixtures for DB session, TestClient overrides, and helpers for auth/team operations.
+# Test fixtures for DB session, TestClient overrides, and helpers for auth/team operations.
+#
+# Each test runs inside one connection-level transaction that is rolled back afterwards;
+# every session opened during the test joins it and its commit() only releases a
+# SAVEPOINT. Tests that need real commits seen by other connections (their own
+# threads, engine.connect()) are marked `committed` and cleaned up with DELETEs instead.
+# Under pytest-xdist (`pytest -n auto`) every worker uses its own database.
+
+import os
 
 import pytest
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from tests.worker_db import worker_database_url
+
+# Must happen before app.db.session creates the engine.
+settings.DATABASE_URL = worker_database_url(settings.DATABASE_URL, os.environ.get("PYTEST_XDIST_WORKER"))
+# bcrypt's minimum cost: hashes are still real bcrypt, just ~256x cheaper than the default.
+settings.BCRYPT_ROUNDS = 4
+
 from fastapi.testclient import TestClient
-from sqlalchemy.orm import Session
 
+import app.main as main_module
 from app.main import app
+from app.core.audit import audit_log
+from app.db import sqlite
 from app.db.session import SessionLocal, engine
 from app.db.base import Base
 from app.api.v1.deps import get_db
 
+from app.models.audit_event import AuditEvent
 from app.models.user import User
 from app.models.team import Team
 from app.models.membership import Membership
+from app.models.membership_event import MembershipEvent
+from app.models.idempotency_key import IdempotencyKey
+from app.models.job import Job
+from app.models.refresh_token import RefreshToken
+from app.models.team_closure import TeamClosure
+
+def pytest_configure(config):
+    if sqlite.is_memory(settings.DATABASE_URL):
+        # The first test's transaction would hold the single in-memory connection, and
+        # every other session opened during it would wait on the write lock forever.
+        raise pytest.UsageError("DATABASE_URL=sqlite:// can't run the tests; use a SQLite file or Postgres")
+    config.addinivalue_line("markers", "committed: commit for real and clean up with DELETEs afterwards")
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -21,37 +54,76 @@ def setup_database():
 
 
 @pytest.fixture
-def db_session() -> Session:
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def committed(request) -> bool:
+    return request.node.get_closest_marker("committed") is not None
+
+
+@pytest.fixture
+def db_session(committed: bool, monkeypatch) -> Session:
+    if committed:
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+        return
+
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        monkeypatch.setattr(
+            SessionLocal,
+            "kw",
+            {**SessionLocal.kw, "bind": connection, "join_transaction_mode": "create_savepoint"},
+        )
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+            transaction.rollback()
 
 
 @pytest.fixture
-def client(db_session: Session):
+def client(db_session: Session, committed: bool, monkeypatch):
     def override_get_db():
         try:
             yield db_session
         finally:
             pass
 
+    if not committed:
+        # The test's connection must only be used by one thread at a time, so the lifespan's
+        # background threads (revocation sync, index refresh, audit writer) get their own
+        # connections. Those only read, except the audit writer: it is not woken up during
+        # the test, and the buffer is flushed into the test's transaction before shutdown.
+        monkeypatch.setattr(main_module, "SessionLocal", sessionmaker(bind=engine, autoflush=False))
+        monkeypatch.setattr(settings, "AUDIT_FLUSH_INTERVAL_SECONDS", 3600)
+
     app.dependency_overrides[get_db] = override_get_db
 
     with TestClient(app) as test_client:
         yield test_client
+        if not committed:
+            audit_log.flush(SessionLocal)
 
     app.dependency_overrides.clear()
 
 
 @pytest.fixture(autouse=True)
-def clean_database(db_session: Session):
+def clean_database(db_session: Session, committed: bool):
     yield
+    if not committed:
+        return
 
+    db_session.query(MembershipEvent).delete()
     db_session.query(Membership).delete()
+    db_session.query(TeamClosure).delete()
     db_session.query(Team).delete()
+    db_session.query(RefreshToken).delete()
+    db_session.query(IdempotencyKey).delete()
+    db_session.query(Job).delete()
     db_session.query(User).delete()
+    db_session.query(AuditEvent).delete()
     db_session.commit()
 
 
@@ -91,4 +163,4 @@ def create_team(client, auth_header):
             json={"name": name},
             headers=auth_header(token),
         )
-    return _create
\ No newline at end of file
+    return _create
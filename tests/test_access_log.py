@@ -0,0 +1,64 @@
+# Tests for the structured access log middleware and JSON log formatting.
+
+import json
+import logging
+
+from app.core.config import settings
+from app.core.log_config import JsonFormatter
+
+
+def _access_records(caplog):
+    return [r for r in caplog.records if r.name == "app.access"]
+
+
+def test_access_log_records_route_user_team_and_db_time(
+    client, caplog, register_user, login_user, auth_header, create_team
+):
+    assert register_user("logged@example.com").status_code == 201
+    token = login_user("logged@example.com")
+    team_id = create_team(token, "Logged Team").json()["id"]
+    caplog.clear()
+
+    with caplog.at_level(logging.INFO, logger="app.access"):
+        res = client.get(
+            f"/api/v1/teams/{team_id}",
+            headers={**auth_header(token), "X-Request-ID": "req-123"},
+        )
+    assert res.status_code == 200
+    assert res.headers["X-Request-ID"] == "req-123"
+
+    [record] = _access_records(caplog)
+    assert record.request_id == "req-123"
+    assert record.route == "/api/v1/teams/{team_id}"
+    assert record.status == 200
+    assert record.team_id == team_id
+    assert record.user_id is not None
+    assert record.db_queries > 0
+    assert record.latency_ms >= record.db_ms >= 0
+
+
+def test_successful_requests_are_sampled_but_errors_always_logged(client, caplog, monkeypatch):
+    monkeypatch.setattr(settings, "ACCESS_LOG_SAMPLE_RATE", 0.0)
+
+    with caplog.at_level(logging.INFO, logger="app.access"):
+        assert client.get("/health").status_code == 200
+        assert client.post("/api/v1/teams", json={"name": "NoAuth"}).status_code == 401
+
+    assert [r.status for r in _access_records(caplog)] == [401]
+
+
+def test_json_formatter_includes_extra_fields():
+    record = logging.makeLogRecord({
+        "name": "app.access",
+        "levelname": "INFO",
+        "msg": "%s %s",
+        "args": ("GET", "/health"),
+        "status": 200,
+        "route": "/health",
+    })
+
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["msg"] == "GET /health"
+    assert entry["status"] == 200
+    assert entry["route"] == "/health"
+    assert entry["logger"] == "app.access"
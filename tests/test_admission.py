@@ -0,0 +1,94 @@
+# Tests for admission control: queueing, shedding with Retry-After, and the adaptive limit.
+
+import asyncio
+
+from app.core.admission import AdaptiveLimiter, AdmissionControlMiddleware
+
+
+def _scope(path):
+    return {"type": "http", "method": "GET", "path": path, "headers": []}
+
+
+async def _call(middleware, path):
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await middleware(_scope(path), receive, send)
+    return sent[0]["status"], dict(sent[0]["headers"])
+
+
+def _slow_app(delay):
+    async def app(scope, receive, send):
+        await asyncio.sleep(delay)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+    return app
+
+
+def test_over_budget_requests_are_shed_with_retry_after():
+    limiter = AdaptiveLimiter("auth", max_limit=1, queue_timeout=0.05)
+    middleware = AdmissionControlMiddleware(_slow_app(0.2), {"/api/v1/auth": limiter})
+
+    async def scenario():
+        return await asyncio.gather(
+            _call(middleware, "/api/v1/auth/login"),
+            _call(middleware, "/api/v1/auth/login"),
+            _call(middleware, "/api/v1/auth/login"),
+            _call(middleware, "/health"),
+        )
+
+    results = asyncio.run(scenario())
+    statuses = sorted(status for status, _ in results)
+    assert statuses == [200, 200, 503, 503]
+    assert all(headers[b"retry-after"] == b"1" for status, headers in results if status == 503)
+    assert limiter.in_flight == 0
+
+
+def test_queued_request_gets_slot_before_deadline():
+    limiter = AdaptiveLimiter("teams", max_limit=1, queue_timeout=1.0)
+    middleware = AdmissionControlMiddleware(_slow_app(0.05), {"/api/v1/teams": limiter})
+
+    async def scenario():
+        return await asyncio.gather(
+            _call(middleware, "/api/v1/teams/1"),
+            _call(middleware, "/api/v1/teams/2"),
+        )
+
+    assert [status for status, _ in asyncio.run(scenario())] == [200, 200]
+    assert limiter.in_flight == 0
+
+
+def test_exempt_paths_bypass_budget():
+    limiter = AdaptiveLimiter("teams", max_limit=1, queue_timeout=0.01)
+    middleware = AdmissionControlMiddleware(
+        _slow_app(0.05), {"/api/v1/teams": limiter}, exempt_suffixes=("/members/changes",)
+    )
+
+    async def scenario():
+        return await asyncio.gather(*[_call(middleware, "/api/v1/teams/1/members/changes") for _ in range(3)])
+
+    assert [status for status, _ in asyncio.run(scenario())] == [200, 200, 200]
+
+
+def test_limit_shrinks_when_latency_rises_and_recovers():
+    limiter = AdaptiveLimiter("teams", max_limit=32, queue_timeout=0.1)
+    for _ in range(200):
+        limiter.in_flight += 1
+        limiter.release(0.01)
+    assert limiter.limit == 32
+
+    for _ in range(50):
+        limiter.in_flight += 1
+        limiter.release(0.2)
+    degraded = limiter.limit
+    assert degraded < 16
+
+    for _ in range(500):
+        limiter.in_flight += 1
+        limiter.release(0.01)
+    assert limiter.limit > degraded
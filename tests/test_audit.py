@@ -0,0 +1,124 @@
+# Tests for the audit trail: buffered batch writes, backpressure, flush on shutdown, and the query endpoint.
+
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+
+from app.core.audit import DENIED, AuditLog, audit_log
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.audit_event import AuditEvent
+from app.services import audit_service
+
+
+def test_mutations_and_denials_are_audited_and_paginated(
+    client, db_session, register_user, login_user, auth_header, create_team
+):
+    assert register_user("audit-admin@example.com").status_code == 201
+    viewer_id = register_user("audit-viewer@example.com").json()["id"]
+    token = login_user("audit-admin@example.com")
+    team_id = create_team(token, "Audited").json()["id"]
+    client.post(f"/api/v1/teams/{team_id}/members", json={"email": "audit-viewer@example.com", "role": "viewer"}, headers=auth_header(token))
+    client.patch(f"/api/v1/teams/{team_id}/members/{viewer_id}", json={"role": "member"}, headers=auth_header(token))
+
+    viewer = auth_header(login_user("audit-viewer@example.com"))
+    assert client.delete(f"/api/v1/teams/{team_id}/members/{viewer_id}", headers=viewer).status_code == 403
+    assert client.get(f"/api/v1/teams/{team_id}/audit", headers=viewer).status_code == 403
+
+    audit_log.flush(SessionLocal)
+    first = client.get(f"/api/v1/teams/{team_id}/audit", params={"limit": 3}, headers=auth_header(token)).json()
+    rest = client.get(
+        f"/api/v1/teams/{team_id}/audit", params={"limit": 3, "cursor": first["next_cursor"]}, headers=auth_header(token)
+    ).json()
+    assert rest["next_cursor"] is None
+
+    events = first["items"] + rest["items"]
+    assert [(e["action"], e["outcome"]) for e in events] == [
+        ("permission.denied", "denied"),
+        ("permission.denied", "denied"),
+        ("member.role_change", "ok"),
+        ("member.add", "ok"),
+        ("team.create", "ok"),
+    ]
+    assert events[0]["actor_id"] == viewer_id
+    assert events[0]["detail"] == {"action": "team:audit:read", "reason": "insufficient_role"}
+    assert events[2]["target_user_id"] == viewer_id
+    assert all(e["request_id"] for e in events)
+
+    too_wide = {"since": "2026-01-01T00:00:00Z", "until": "2026-06-01T00:00:00Z"}
+    assert client.get(f"/api/v1/teams/{team_id}/audit", params=too_wide, headers=auth_header(token)).status_code == 422
+
+
+def test_full_buffer_applies_backpressure_then_drops(monkeypatch):
+    monkeypatch.setattr(settings, "AUDIT_BUFFER_SIZE", 2)
+    monkeypatch.setattr(settings, "AUDIT_ENQUEUE_TIMEOUT_MS", 50)
+    log = AuditLog()
+    assert log.record("member.add") and log.record("member.add")
+
+    # Denials never wait; mutations wait for room up to the timeout.
+    started = time.perf_counter()
+    assert not log.record("permission.denied", DENIED, essential=False)
+    assert time.perf_counter() - started < 0.04
+    started = time.perf_counter()
+    assert not log.record("member.remove")
+    assert time.perf_counter() - started >= 0.04
+    assert log.dropped == 2
+    assert len(log) == 2
+
+
+def test_failed_flush_keeps_events_for_the_next_attempt(db_session):
+    log = AuditLog()
+    log.record("member.add", team_id=1)
+    log.record("member.remove", team_id=1)
+
+    def broken_session():
+        raise RuntimeError("db down")
+
+    with pytest.raises(RuntimeError):
+        log.flush(broken_session)
+    assert len(log) == 2
+
+    assert log.flush(SessionLocal) == 2
+    assert [e.action for e in db_session.query(AuditEvent).order_by(AuditEvent.id)] == ["member.add", "member.remove"]
+
+
+def test_stop_flushes_buffered_events(db_session, monkeypatch):
+    monkeypatch.setattr(settings, "AUDIT_BATCH_SIZE", 2)
+    log = AuditLog()
+    log.start(SessionLocal, interval=60)
+    for i in range(5):
+        log.record("member.add", team_id=7, target_user_id=i)
+    log.stop()
+
+    assert len(log) == 0
+    assert db_session.query(AuditEvent).filter(AuditEvent.team_id == 7).count() == 5
+
+
+def test_retention_removes_old_events(db_session):
+    now = datetime.now(timezone.utc)
+    db_session.add_all([
+        AuditEvent(created_at=now - timedelta(days=400), action="member.add", outcome="ok", team_id=3),
+        AuditEvent(created_at=now, action="member.add", outcome="ok", team_id=3),
+    ])
+    db_session.commit()
+
+    audit_service.drop_old_partitions(db_session, today=date.today(), keep_months=12)
+    assert db_session.query(AuditEvent).filter(AuditEvent.team_id == 3).count() == 1
+
+
+@pytest.mark.skipif(not settings.DATABASE_URL.startswith("postgresql"), reason="audit partitions are Postgres-only")
+def test_new_partition_takes_over_rows_from_the_default_partition(db_session):
+    # Far enough ahead that no partition exists yet, so the row lands in the default one.
+    month = date.today().replace(day=1) + timedelta(days=31 * 30)
+    db_session.add(AuditEvent(
+        created_at=datetime(month.year, month.month, 2, tzinfo=timezone.utc), action="member.add", outcome="ok", team_id=4,
+    ))
+    db_session.commit()
+
+    assert audit_service.ensure_partitions(db_session, today=month, months_ahead=0) == [f"audit_events_{month:%Y_%m}"]
+    partition = db_session.execute(
+        text("SELECT tableoid::regclass::text FROM audit_events WHERE team_id = 4")
+    ).scalar_one()
+    assert partition == f"audit_events_{month:%Y_%m}"
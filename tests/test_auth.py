@@ -1,5 +1,12 @@
 # Tests for registration and login behaviors.
 
+import threading
+
+import pytest
+
+from app.db.session import SessionLocal
+from app.services import auth_service
+
 def test_register_success(client, register_user):
     res = register_user("user1@example.com", "password123")
     assert res.status_code == 201
@@ -45,3 +52,85 @@ def test_login_unknown_email_returns_401(client):
         json={"email": "unknown@example.com", "password": "password123"},
     )
     assert res.status_code == 401
+
+
+def _login_pair(client, email: str, password: str = "password123") -> dict:
+    res = client.post("/api/v1/auth/login", json={"email": email, "password": password})
+    assert res.status_code == 200
+    return res.json()
+
+
+def test_login_returns_refresh_token_and_refresh_rotates_it(client, register_user):
+    assert register_user("refresh@example.com").status_code == 201
+    tokens = _login_pair(client, "refresh@example.com")
+    assert tokens["refresh_token"]
+    assert tokens["expires_in"] > 0
+
+    res = client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert res.status_code == 200
+    rotated = res.json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+
+    me = client.post(
+        "/api/v1/teams",
+        json={"name": "Refreshed"},
+        headers={"Authorization": f"Bearer {rotated['access_token']}"},
+    )
+    assert me.status_code == 201
+
+
+def test_reusing_rotated_refresh_token_revokes_session(client, register_user):
+    assert register_user("reuse@example.com").status_code == 201
+    tokens = _login_pair(client, "reuse@example.com")
+    rotated = client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).json()
+
+    replay = client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert replay.status_code == 401
+
+    after = client.post("/api/v1/auth/refresh", json={"refresh_token": rotated["refresh_token"]})
+    assert after.status_code == 401
+
+
+def test_logout_revokes_access_tokens_of_the_session(client, register_user):
+    assert register_user("logout@example.com").status_code == 201
+    tokens = _login_pair(client, "logout@example.com")
+    other = _login_pair(client, "logout@example.com")
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+
+    assert client.post("/api/v1/teams", json={"name": "Before"}, headers=headers).status_code == 201
+
+    res = client.post("/api/v1/auth/logout", json={"refresh_token": tokens["refresh_token"]})
+    assert res.status_code == 204
+
+    assert client.post("/api/v1/teams", json={"name": "After"}, headers=headers).status_code == 401
+    assert client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+
+    other_headers = {"Authorization": f"Bearer {other['access_token']}"}
+    assert client.post("/api/v1/teams", json={"name": "Other"}, headers=other_headers).status_code == 201
+
+
+@pytest.mark.committed
+def test_concurrent_refreshes_with_one_token_mint_one_pair(client, register_user):
+    assert register_user("race@example.com").status_code == 201
+    refresh_token = _login_pair(client, "race@example.com")["refresh_token"]
+    # Both exchanges have read the token as unused before either claims it.
+    both_read = threading.Barrier(2, timeout=5)
+    results = []
+
+    def exchange():
+        with SessionLocal() as db:
+            get = db.get
+            db.get = lambda *args, **kwargs: (both_read.wait(), get(*args, **kwargs))[1]
+            results.append(auth_service.refresh_tokens(db, refresh_token))
+
+    threads = [threading.Thread(target=exchange) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert len(results) == 2
+    assert sum(result is not None for result in results) == 1
+    # The loser counts as reuse, so the pair the winner got is revoked as well.
+    winner = next(result for result in results if result is not None)
+    assert client.post("/api/v1/auth/refresh", json={"refresh_token": winner[1]}).status_code == 401
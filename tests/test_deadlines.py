@@ -0,0 +1,89 @@
+# Tests for request deadlines: header/route budgets, 504 mapping, and statement timeout detection.
+
+import time
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.core.config import settings
+from app.core.deadline import is_statement_timeout, remaining
+from app.core.request_context import RequestContext, bind_request_context, reset_request_context
+
+
+def test_expired_client_deadline_returns_504(
+    client, register_user, login_user, auth_header, create_team
+):
+    assert register_user("deadline@example.com").status_code == 201
+    token = login_user("deadline@example.com")
+    team_id = create_team(token, "Deadline Team").json()["id"]
+
+    ok = client.get(
+        f"/api/v1/teams/{team_id}",
+        headers={**auth_header(token), "X-Request-Timeout-Ms": "5000"},
+    )
+    assert ok.status_code == 200
+
+    expired = client.get(
+        f"/api/v1/teams/{team_id}",
+        headers={**auth_header(token), "X-Request-Timeout-Ms": "0.001"},
+    )
+    assert expired.status_code == 504
+    assert expired.json() == {"detail": "Request deadline exceeded"}
+
+
+def test_route_budget_replaces_global_default(
+    client, monkeypatch, register_user, login_user, auth_header, create_team
+):
+    assert register_user("route-budget@example.com").status_code == 201
+    token = login_user("route-budget@example.com")
+    team_id = create_team(token, "Budget Team").json()["id"]
+
+    monkeypatch.setattr(settings, "REQUEST_TIMEOUT_MS", 0.001)
+    assert client.get(f"/api/v1/teams/{team_id}", headers=auth_header(token)).status_code == 504
+
+    # The long-poll route declares its own, longer budget.
+    res = client.get(f"/api/v1/teams/{team_id}/members/changes", headers=auth_header(token))
+    assert res.status_code == 200
+
+
+def test_client_header_only_shortens_budget(monkeypatch):
+    monkeypatch.setattr(settings, "REQUEST_TIMEOUT_MS", 0)
+    ctx = RequestContext("r1")
+    assert remaining(ctx) is None
+
+    ctx.requested_timeout = 5.0
+    assert 4.9 < remaining(ctx) <= 5.0
+
+    ctx.route_timeout = 1.0
+    assert remaining(ctx) <= 1.0
+
+    ctx.requested_timeout = 0.5
+    assert remaining(ctx) <= 0.5
+
+
+def test_statement_timeout_is_recognised_by_sqlstate():
+    class Canceled(Exception):
+        sqlstate = "57014"
+
+    class Other(Exception):
+        sqlstate = "40001"
+
+    assert is_statement_timeout(OperationalError("SELECT 1", {}, Canceled()))
+    assert not is_statement_timeout(OperationalError("SELECT 1", {}, Other()))
+
+
+@pytest.mark.skipif(not settings.DATABASE_URL.startswith("postgresql"), reason="statement_timeout is Postgres-only")
+def test_statement_timeout_shrinks_with_the_budget(db_session):
+    ctx = RequestContext("r1")
+    ctx.requested_timeout = 2.0
+    token = bind_request_context(ctx)
+    try:
+        db_session.rollback()
+        db_session.execute(text("SELECT 1"))
+        time.sleep(1)
+        # The transaction began with ~2s; what is left now is about half of that.
+        timeout_ms = int(db_session.execute(text("SELECT setting FROM pg_settings WHERE name = 'statement_timeout'")).scalar())
+    finally:
+        reset_request_context(token)
+    assert timeout_ms <= 1100
@@ -0,0 +1,113 @@
+# Tests for team deletion and user deactivation: immediate soft-delete, then batched removal by the worker.
+
+import pytest
+
+from app.core.config import settings
+from app.core.enums import JobStatus
+from app.models.job import Job
+from app.models.membership import Membership
+from app.models.membership_event import MembershipEvent
+from app.models.team import Team
+from app.services import job_handlers, job_service
+
+
+def test_deleted_team_404s_immediately_and_worker_removes_rows_in_batches(
+    client, db_session, monkeypatch, register_user, login_user, auth_header, create_team
+):
+    monkeypatch.setattr(settings, "DELETE_BATCH_SIZE", 2)
+    monkeypatch.setattr(settings, "DELETE_BATCH_PAUSE_MS", 0)
+    for email in ("del-admin@example.com", "del-a@example.com", "del-b@example.com", "del-c@example.com"):
+        assert register_user(email).status_code == 201
+    token = login_user("del-admin@example.com")
+    team_id = create_team(token, "Doomed").json()["id"]
+    for email in ("del-a@example.com", "del-b@example.com", "del-c@example.com"):
+        client.post(f"/api/v1/teams/{team_id}/members", json={"email": email}, headers=auth_header(token))
+
+    res = client.delete(f"/api/v1/teams/{team_id}", headers=auth_header(token))
+    assert res.status_code == 202
+    job = res.json()
+    assert job["total"] == 4
+    assert res.headers["Location"] == f"/api/v1/jobs/{job['id']}"
+
+    # Gone for every read before the worker has touched a single membership.
+    assert client.get(f"/api/v1/teams/{team_id}", headers=auth_header(token)).status_code == 404
+    assert client.get(f"/api/v1/teams/{team_id}/members", headers=auth_header(token)).status_code == 404
+    assert db_session.query(Membership).filter(Membership.team_id == team_id).count() == 4
+
+    job_handlers.process_next(db_session)
+    status_res = client.get(f"/api/v1/jobs/{job['id']}", headers=auth_header(token)).json()
+    assert status_res["status"] == JobStatus.succeeded
+    assert status_res["result"] == {"memberships_removed": 4}
+    assert db_session.query(Membership).filter(Membership.team_id == team_id).count() == 0
+    assert db_session.query(MembershipEvent).filter(MembershipEvent.team_id == team_id).count() == 0
+    assert db_session.get(Team, team_id) is None
+
+
+def test_delete_requires_admin_and_no_live_children(
+    client, db_session, register_user, login_user, auth_header, create_team
+):
+    assert register_user("del-owner@example.com").status_code == 201
+    assert register_user("del-member@example.com").status_code == 201
+    token = login_user("del-owner@example.com")
+    parent_id = create_team(token, "Parent").json()["id"]
+    client.post(f"/api/v1/teams/{parent_id}/members", json={"email": "del-member@example.com"}, headers=auth_header(token))
+    child = client.post("/api/v1/teams", json={"name": "Child", "parent_id": parent_id}, headers=auth_header(token))
+
+    member_token = login_user("del-member@example.com")
+    assert client.delete(f"/api/v1/teams/{parent_id}", headers=auth_header(member_token)).status_code == 403
+    assert client.delete(f"/api/v1/teams/{parent_id}", headers=auth_header(token)).status_code == 409
+    assert db_session.query(Job).count() == 0
+
+    assert client.delete(f"/api/v1/teams/{child.json()['id']}", headers=auth_header(token)).status_code == 202
+    assert client.delete(f"/api/v1/teams/{parent_id}", headers=auth_header(token)).status_code == 202
+
+
+def test_delete_and_its_job_commit_together(
+    client, db_session, monkeypatch, register_user, login_user, auth_header, create_team
+):
+    assert register_user("atomic@example.com").status_code == 201
+    token = login_user("atomic@example.com")
+    team_id = create_team(token, "Atomic").json()["id"]
+    enqueue = job_service.enqueue
+
+    def enqueue_then_crash(*args, **kwargs):
+        enqueue(*args, **kwargs)
+        raise RuntimeError("crashed before commit")
+
+    monkeypatch.setattr(job_service, "enqueue", enqueue_then_crash)
+    with pytest.raises(RuntimeError):
+        client.delete(f"/api/v1/teams/{team_id}", headers=auth_header(token))
+    with pytest.raises(RuntimeError):
+        client.delete("/api/v1/users/me", headers=auth_header(token))
+    db_session.rollback()
+
+    # Neither change was committed without its job, so nothing is left half done.
+    assert db_session.query(Job).count() == 0
+    assert client.get(f"/api/v1/teams/{team_id}", headers=auth_header(token)).status_code == 200
+
+
+def test_deactivated_user_is_locked_out_and_memberships_removed(
+    client, db_session, monkeypatch, register_user, login_user, auth_header, create_team
+):
+    monkeypatch.setattr(settings, "DELETE_BATCH_SIZE", 1)
+    monkeypatch.setattr(settings, "DELETE_BATCH_PAUSE_MS", 0)
+    assert register_user("leaver-admin@example.com").status_code == 201
+    user_id = register_user("leaver@example.com").json()["id"]
+    admin_token = login_user("leaver-admin@example.com")
+    team_ids = [create_team(admin_token, f"Team {i}").json()["id"] for i in range(3)]
+    for team_id in team_ids:
+        client.post(f"/api/v1/teams/{team_id}/members", json={"email": "leaver@example.com"}, headers=auth_header(admin_token))
+
+    login = client.post("/api/v1/auth/login", json={"email": "leaver@example.com", "password": "password123"}).json()
+    res = client.delete("/api/v1/users/me", headers=auth_header(login["access_token"]))
+    assert res.status_code == 202
+    assert res.json()["total"] == 3
+
+    assert client.get(f"/api/v1/teams/{team_ids[0]}", headers=auth_header(login["access_token"])).status_code == 401
+    assert client.post("/api/v1/auth/refresh", json={"refresh_token": login["refresh_token"]}).status_code == 401
+    assert client.post("/api/v1/auth/login", json={"email": "leaver@example.com", "password": "password123"}).status_code == 401
+
+    job_handlers.process_next(db_session)
+    assert db_session.query(Membership).filter(Membership.user_id == user_id).count() == 0
+    team = client.get(f"/api/v1/teams/{team_ids[0]}", headers=auth_header(admin_token)).json()
+    assert team["member_count"] == 1
@@ -0,0 +1,77 @@
+# Tests for the bulk export: admin-only access, CSV and NDJSON bodies, chunking, and the CLI.
+
+import csv
+import io
+import json
+
+import pytest
+
+from app.cli import export as export_cli
+from app.core.config import settings
+from app.db.session import engine
+from app.services import export_service
+
+# The export reads through its own connection, so the data has to be committed.
+pytestmark = pytest.mark.committed
+
+
+def _setup(client, monkeypatch, register_user, login_user, create_team):
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", ["Export-Admin@example.com"])
+    assert register_user("export-admin@example.com").status_code == 201
+    assert register_user("export-other@example.com").status_code == 201
+    token = login_user("export-admin@example.com")
+    team_id = create_team(token, 'Export, "Quoted"').json()["id"]
+    return token, team_id
+
+
+def test_export_requires_admin(client, monkeypatch, register_user, login_user, auth_header, create_team):
+    _setup(client, monkeypatch, register_user, login_user, create_team)
+    other = auth_header(login_user("export-other@example.com"))
+    assert client.get("/api/v1/admin/export/users", headers=other).status_code == 403
+    assert client.get("/api/v1/admin/export/users").status_code == 401
+
+
+def test_export_csv_and_ndjson(client, monkeypatch, register_user, login_user, auth_header, create_team):
+    token, team_id = _setup(client, monkeypatch, register_user, login_user, create_team)
+
+    res = client.get("/api/v1/admin/export/users", headers=auth_header(token))
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/csv")
+    assert res.headers["content-disposition"] == 'attachment; filename="users.csv"'
+    rows = list(csv.DictReader(io.StringIO(res.text)))
+    assert [r["email"] for r in rows] == ["export-admin@example.com", "export-other@example.com"]
+    assert "hashed_password" not in rows[0]
+
+    teams = list(csv.DictReader(io.StringIO(
+        client.get("/api/v1/admin/export/teams", headers=auth_header(token)).text
+    )))
+    assert [(int(t["id"]), t["name"]) for t in teams] == [(team_id, 'Export, "Quoted"')]
+
+    res = client.get("/api/v1/admin/export/memberships", params={"format": "ndjson"}, headers=auth_header(token))
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in res.text.splitlines()]
+    assert [(m["team_id"], m["role"]) for m in lines] == [(team_id, "admin")]
+    assert set(lines[0]) == {"user_id", "team_id", "role", "joined_at"}
+
+    assert client.get("/api/v1/admin/export/secrets", headers=auth_header(token)).status_code == 422
+
+
+def test_stream_yields_bounded_chunks(db_session, register_user):
+    for i in range(30):
+        assert register_user(f"export-chunk-{i}@example.com").status_code == 201
+
+    with engine.connect() as connection:
+        chunks = list(export_service.stream(connection, "users", "ndjson", chunk_bytes=512, fetch_rows=4))
+    assert len(chunks) > 1
+    # Each chunk ends once it passes chunk_bytes, so it holds at most one extra fetch batch.
+    assert all(len(chunk) < 512 + 4 * 200 for chunk in chunks)
+    assert len(b"".join(chunks).splitlines()) == 30
+
+
+def test_cli_writes_one_file_per_table(tmp_path, register_user):
+    assert register_user("export-cli@example.com").status_code == 201
+    export_cli.main(["--format", "csv", "--output-dir", str(tmp_path)])
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["memberships.csv", "teams.csv", "users.csv"]
+    assert "export-cli@example.com" in (tmp_path / "users.csv").read_text()
+    assert (tmp_path / "memberships.csv").read_text().splitlines() == ["user_id,team_id,role,joined_at"]
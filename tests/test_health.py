@@ -0,0 +1,49 @@
+# Tests for liveness/readiness probes and the cached DB ping.
+
+import pytest
+
+from app.core.config import settings
+from app.core.readiness import ReadinessProbe, readiness
+from app.db.session import engine
+
+
+@pytest.fixture(autouse=True)
+def fresh_probe():
+    readiness.reset()
+    yield
+    readiness.reset()
+
+
+def test_live_and_ready_when_database_responds(client):
+    assert client.get("/health/live").json() == {"health": "ok"}
+
+    res = client.get("/health/ready")
+    assert res.status_code == 200
+    body = res.json()
+    assert body["ready"] is True
+    assert body["reasons"] == []
+    assert body["checks"]["ping_ms"] >= 0
+    assert body["checks"]["pool_wait_ms"] >= 0
+
+
+def test_not_ready_when_latency_exceeds_thresholds(client, monkeypatch):
+    monkeypatch.setattr(settings, "READINESS_MAX_PING_MS", -1.0)
+    monkeypatch.setattr(settings, "READINESS_MAX_POOL_WAIT_MS", -1.0)
+
+    res = client.get("/health/ready")
+    assert res.status_code == 503
+    assert res.json()["reasons"] == ["pool_wait", "db_latency"]
+
+
+def test_ping_result_is_cached(monkeypatch):
+    monkeypatch.setattr(settings, "READINESS_CACHE_SECONDS", 60.0)
+    pings = []
+    monkeypatch.setattr("app.core.readiness._probe", lambda e: pings.append(e) or {"ready": True})
+
+    probe = ReadinessProbe()
+    assert probe.check(engine) is probe.check(engine)
+    assert len(pings) == 1
+
+    monkeypatch.setattr(settings, "READINESS_CACHE_SECONDS", 0.0)
+    probe.check(engine)
+    assert len(pings) == 2
@@ -0,0 +1,39 @@
+# Tests for the prebuilt hot-path statements and psycopg 3 prepared-statement settings.
+
+from sqlalchemy import event
+from sqlalchemy.engine.default import CACHE_HIT
+
+from app.core.config import settings
+from app.db.session import connect_args, engine
+
+
+def test_prepare_threshold_only_for_psycopg3(monkeypatch):
+    assert connect_args("postgresql+psycopg://u:p@db/app") == {"prepare_threshold": settings.DB_PREPARE_THRESHOLD}
+    assert connect_args("postgresql+psycopg2://u:p@db/app") == {}
+    assert connect_args("sqlite:///app.db") == {}
+
+    monkeypatch.setattr(settings, "DB_PREPARED_STATEMENTS", False)
+    assert connect_args("postgresql+psycopg://u:p@db/app") == {"prepare_threshold": None}
+
+
+def test_dependency_lookups_hit_the_compiled_cache(client, register_user, login_user, auth_header, create_team):
+    assert register_user("hot@example.com").status_code == 201
+    token = login_user("hot@example.com")
+    team_id = create_team(token, "Hot").json()["id"]
+    client.get(f"/api/v1/teams/{team_id}", headers=auth_header(token))
+
+    seen = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        seen.append((statement, context.cache_hit is CACHE_HIT))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        assert client.get(f"/api/v1/teams/{team_id}", headers=auth_header(token)).status_code == 200
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    lookups = [hit for statement, hit in seen if "FROM users" in statement or "FROM teams" in statement
+               or "FROM team_memberships" in statement]
+    assert len(lookups) == 3
+    assert all(lookups)
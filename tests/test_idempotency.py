@@ -0,0 +1,204 @@
+# Tests for Idempotency-Key replay, key reuse checks, in-process coalescing and TTL purge.
+
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from starlette.requests import Request
+
+from app.api.v1 import idempotency
+from app.api.v1.idempotency import run_idempotent
+from app.core.deadline import DeadlineExceeded
+from app.core.request_context import RequestContext, bind_request_context, reset_request_context
+from app.db.session import SessionLocal
+from app.models.idempotency_key import IdempotencyKey
+from app.models.team import Team
+from app.schemas.team import TeamCreate, TeamPublic
+from app.services import idempotency_service
+from app.services.membership_index import membership_index
+
+
+def test_retried_team_creation_replays_first_response(
+    client, db_session, register_user, login_user, auth_header
+):
+    assert register_user("idem-creator@example.com").status_code == 201
+    token = login_user("idem-creator@example.com")
+    headers = {**auth_header(token), "Idempotency-Key": "create-1"}
+
+    first = client.post("/api/v1/teams", json={"name": "Once"}, headers=headers)
+    retry = client.post("/api/v1/teams", json={"name": "Once"}, headers=headers)
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.json() == first.json()
+    assert "Idempotent-Replayed" not in first.headers
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert db_session.query(Team).filter(Team.name == "Once").count() == 1
+
+    reused = client.post("/api/v1/teams", json={"name": "Other"}, headers=headers)
+    assert reused.status_code == 422
+
+
+def test_retried_member_add_replays_instead_of_conflict(
+    client, register_user, login_user, auth_header, create_team
+):
+    assert register_user("idem-admin@example.com").status_code == 201
+    assert register_user("idem-member@example.com").status_code == 201
+    token = login_user("idem-admin@example.com")
+    team_id = create_team(token, "Idem Team").json()["id"]
+    body = {"email": "idem-member@example.com", "role": "member"}
+
+    first = client.post(
+        f"/api/v1/teams/{team_id}/members",
+        json=body,
+        headers={**auth_header(token), "Idempotency-Key": "add-1"},
+    )
+    retry = client.post(
+        f"/api/v1/teams/{team_id}/members",
+        json=body,
+        headers={**auth_header(token), "Idempotency-Key": "add-1"},
+    )
+    assert first.status_code == retry.status_code == 201
+    assert retry.json() == first.json()
+
+    # Without a key the duplicate still goes through the normal conflict path.
+    plain = client.post(f"/api/v1/teams/{team_id}/members", json=body, headers=auth_header(token))
+    assert plain.status_code == 409
+
+
+def _request(path: str) -> Request:
+    return Request({
+        "type": "http",
+        "method": "POST",
+        "scheme": "http",
+        "server": ("test", 80),
+        "path": path,
+        "query_string": b"",
+        "headers": [],
+    })
+
+
+def test_outcome_commits_with_the_operation(
+    client, db_session, monkeypatch, register_user, login_user, auth_header
+):
+    assert register_user("idem-atomic@example.com").status_code == 201
+    headers = {**auth_header(login_user("idem-atomic@example.com")), "Idempotency-Key": "atomic-1"}
+
+    def crash(*args, **kwargs):
+        raise RuntimeError("crashed before the outcome was stored")
+
+    monkeypatch.setattr(idempotency_service, "complete_key", crash)
+    with pytest.raises(RuntimeError):
+        client.post("/api/v1/teams", json={"name": "Half Done"}, headers=headers)
+    db_session.rollback()
+
+    # The team was not committed on its own, so a retry can safely create it.
+    assert db_session.query(Team).filter(Team.name == "Half Done").count() == 0
+
+
+def test_index_only_changes_once_the_outcome_commits(
+    client, db_session, monkeypatch, register_user, login_user, auth_header, create_team
+):
+    assert register_user("idem-index-admin@example.com").status_code == 201
+    member_id = register_user("idem-index-member@example.com").json()["id"]
+    token = login_user("idem-index-admin@example.com")
+    team_id = create_team(token, "Idem Index").json()["id"]
+    membership_index.build(db_session)
+    try:
+        def crash(*args, **kwargs):
+            raise RuntimeError("crashed before the outcome was stored")
+
+        monkeypatch.setattr(idempotency_service, "complete_key", crash)
+        with pytest.raises(RuntimeError):
+            client.post(
+                f"/api/v1/teams/{team_id}/members",
+                json={"email": "idem-index-member@example.com", "role": "member"},
+                headers={**auth_header(token), "Idempotency-Key": "index-1"},
+            )
+        assert membership_index.get(team_id, member_id) is None
+    finally:
+        membership_index.stop()
+
+
+def test_key_is_released_when_the_operation_runs_out_of_time(db_session, register_user):
+    user_id = register_user("idem-late@example.com").json()["id"]
+    ctx = RequestContext("late")
+    ctx.requested_timeout = 0.05
+
+    def operation(commit):
+        time.sleep(0.1)
+        raise DeadlineExceeded()
+
+    token = bind_request_context(ctx)
+    try:
+        with pytest.raises(DeadlineExceeded):
+            run_idempotent(_request("/api/v1/teams"), db_session, user_id, "late", TeamCreate(name="Late"),
+                           201, TeamPublic, operation)
+    finally:
+        reset_request_context(token)
+
+    # The client can retry with the same key instead of getting 409 until the claim expires.
+    assert db_session.query(IdempotencyKey).filter(IdempotencyKey.user_id == user_id).count() == 0
+
+
+def test_duplicate_waits_no_longer_than_its_deadline(db_session, monkeypatch, register_user):
+    user_id = register_user("idem-wait@example.com").json()["id"]
+    payload = TeamCreate(name="Waiting")
+    request = _request("/api/v1/teams")
+    # The first request with this key is still running in another thread.
+    fingerprint = idempotency_service.request_hash("POST", "/api/v1/teams", payload.model_dump_json())
+    monkeypatch.setitem(idempotency._in_flight, (user_id, "wait"), idempotency._Call(fingerprint))
+    ctx = RequestContext("wait")
+    ctx.requested_timeout = 0.05
+
+    token = bind_request_context(ctx)
+    started = time.perf_counter()
+    try:
+        with pytest.raises(DeadlineExceeded):
+            run_idempotent(request, db_session, user_id, "wait", payload, 201, TeamPublic, lambda commit: None)
+    finally:
+        reset_request_context(token)
+    assert time.perf_counter() - started < 1
+
+
+@pytest.mark.committed
+def test_concurrent_duplicates_run_operation_once(client, db_session, register_user):
+    user_id = register_user("idem-burst@example.com").json()["id"]
+    request = _request("/api/v1/teams")
+    payload = TeamCreate(name="Burst")
+    runs = []
+
+    def operation(commit):
+        runs.append(1)
+        time.sleep(0.2)
+        return {"id": 1, "name": "Burst", "parent_id": None, "member_count": 1,
+                "role_counts": {"admin": 1, "member": 0, "viewer": 0}, "created_at": datetime.now(timezone.utc)}
+
+    responses = []
+
+    def worker():
+        with SessionLocal() as db:
+            responses.append(run_idempotent(request, db, user_id, "burst", payload, 201, TeamPublic, operation))
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(runs) == 1
+    assert len({r.body for r in responses}) == 1
+    assert sum(r.headers.get("Idempotent-Replayed") == "true" for r in responses) == 3
+
+
+def test_purge_removes_only_expired_keys(db_session, register_user):
+    user_id = register_user("idem-purge@example.com").json()["id"]
+    now = datetime.now(timezone.utc)
+    db_session.add_all([
+        IdempotencyKey(user_id=user_id, key="old", request_hash="x", status_code=201, expires_at=now - timedelta(hours=1)),
+        IdempotencyKey(user_id=user_id, key="new", request_hash="x", status_code=201, expires_at=now + timedelta(hours=1)),
+    ])
+    db_session.commit()
+
+    assert idempotency_service.purge_expired_keys(db_session, batch_size=1) == 1
+    assert [k.key for k in db_session.query(IdempotencyKey).filter(IdempotencyKey.user_id == user_id)] == ["new"]
@@ -0,0 +1,31 @@
+# Tests for the test harness itself: per-test transactions, SAVEPOINT commits, and per-worker database URLs.
+
+import bcrypt
+
+from app.db.session import SessionLocal
+from app.models.user import User
+from tests.worker_db import worker_database_url
+
+
+def test_commit_only_releases_a_savepoint(db_session):
+    db_session.add(User(email="isolated@example.com", hashed_password=b"x"))
+    db_session.commit()
+
+    # The outer transaction is still open, and every session opened meanwhile joins it.
+    assert db_session.get_bind().in_transaction()
+    with SessionLocal() as other:
+        assert other.query(User).filter(User.email == "isolated@example.com").count() == 1
+
+
+def test_registration_uses_cheap_hashes(register_user, db_session):
+    assert register_user("cheap-hash@example.com").status_code == 201
+    user = db_session.query(User).filter(User.email == "cheap-hash@example.com").one()
+    assert user.hashed_password.startswith(b"$2b$04$")
+    assert bcrypt.checkpw(b"password123", user.hashed_password)
+
+
+def test_worker_database_url():
+    assert worker_database_url("sqlite:////tmp/t.db", None) == "sqlite:////tmp/t.db"
+    assert worker_database_url("sqlite:////tmp/t.db", "gw3") == "sqlite:////tmp/t_gw3.db"
+    assert worker_database_url("sqlite://", "gw3") == "sqlite://"
+    assert worker_database_url("postgresql+psycopg://u:p@db/app", None) == "postgresql+psycopg://u:p@db/app"
@@ -0,0 +1,94 @@
+# Tests for the background job queue: 202 + polling, batched bulk member import, stale recovery and failures.
+
+from datetime import datetime, timedelta, timezone
+
+from app.core.config import settings
+from app.core.enums import JobStatus
+from app.models.job import Job
+from app.services import job_handlers, job_service
+
+
+def test_bulk_add_returns_202_and_worker_processes_in_batches(
+    client, db_session, monkeypatch, register_user, login_user, auth_header, create_team
+):
+    monkeypatch.setattr(settings, "JOB_BATCH_SIZE", 2)
+    for email in ("bulk-admin@example.com", "bulk-a@example.com", "bulk-b@example.com", "bulk-c@example.com"):
+        assert register_user(email).status_code == 201
+    token = login_user("bulk-admin@example.com")
+    team_id = create_team(token, "Bulk Team").json()["id"]
+
+    res = client.post(
+        f"/api/v1/teams/{team_id}/members/bulk",
+        json={"members": [
+            {"email": "bulk-a@example.com", "role": "viewer"},
+            {"email": "bulk-b@example.com"},
+            {"email": "bulk-admin@example.com", "role": "viewer"},
+            {"email": "nobody@example.com"},
+            {"email": "bulk-c@example.com", "role": "admin"},
+        ]},
+        headers=auth_header(token),
+    )
+    assert res.status_code == 202
+    job = res.json()
+    assert job["status"] == "queued"
+    assert job["total"] == 5
+    assert res.headers["Location"] == f"/api/v1/jobs/{job['id']}"
+
+    processed = job_handlers.process_next(db_session)
+    assert processed.id == job["id"]
+    assert job_handlers.process_next(db_session) is None
+
+    status_res = client.get(f"/api/v1/jobs/{job['id']}", headers=auth_header(token)).json()
+    assert status_res["status"] == "succeeded"
+    assert status_res["progress"] == 5
+    assert status_res["result"] == {"added": 3, "already_member": 1, "unknown_email": 1}
+
+    team = client.get(f"/api/v1/teams/{team_id}", headers=auth_header(token)).json()
+    assert team["member_count"] == 4
+    assert team["role_counts"] == {"admin": 2, "member": 1, "viewer": 1}
+
+
+def test_jobs_are_private_to_their_creator(
+    client, register_user, login_user, auth_header, create_team
+):
+    assert register_user("job-owner@example.com").status_code == 201
+    assert register_user("job-snoop@example.com").status_code == 201
+    token = login_user("job-owner@example.com")
+    team_id = create_team(token, "Job Team").json()["id"]
+
+    job_id = client.post(
+        f"/api/v1/teams/{team_id}/members/bulk",
+        json={"members": [{"email": "job-snoop@example.com"}]},
+        headers=auth_header(token),
+    ).json()["id"]
+
+    snoop = client.get(f"/api/v1/jobs/{job_id}", headers=auth_header(login_user("job-snoop@example.com")))
+    assert snoop.status_code == 404
+
+
+def test_stale_running_job_is_requeued_then_failed_after_max_attempts(db_session, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_MAX_ATTEMPTS", 2)
+    old = datetime.now(timezone.utc) - timedelta(seconds=settings.JOB_STALE_SECONDS + 60)
+    retry = Job(kind="noop", payload={}, status=JobStatus.running, attempts=1, heartbeat_at=old)
+    give_up = Job(kind="noop", payload={}, status=JobStatus.running, attempts=2, heartbeat_at=old)
+    fresh = Job(kind="noop", payload={}, status=JobStatus.running, attempts=1, heartbeat_at=datetime.now(timezone.utc))
+    db_session.add_all([retry, give_up, fresh])
+    db_session.commit()
+
+    assert job_service.requeue_stale(db_session) == 2
+    db_session.expire_all()
+    assert [retry.status, give_up.status, fresh.status] == [JobStatus.queued, JobStatus.failed, JobStatus.running]
+
+
+def test_handler_errors_mark_job_failed(db_session, monkeypatch):
+    def explode(db, job):
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(job_handlers.HANDLERS, "explode", explode)
+    job = job_service.enqueue(db_session, "explode", {})
+
+    job_handlers.process_next(db_session, ["explode"])
+    db_session.refresh(job)
+    assert job.status == JobStatus.failed
+    assert job.error == "RuntimeError: boom"
+    assert job.attempts == 1
@@ -0,0 +1,65 @@
+# Tests for asymmetric JWT signing, kid-based key rotation, and the JWKS endpoint.
+
+import pytest
+import rsa
+from jose.exceptions import JWTError
+
+from app.core.config import settings
+from app.core.security import create_access_token, decode_access_token, get_signing_keys
+
+
+def _write_key(directory, kid: str) -> None:
+    _, private_key = rsa.newkeys(1024)
+    (directory / f"{kid}.pem").write_bytes(private_key.save_pkcs1())
+
+
+@pytest.fixture
+def rs256_keys(tmp_path, monkeypatch):
+    _write_key(tmp_path, "2026-01")
+    monkeypatch.setattr(settings, "JWT_ALGORITHM", "RS256")
+    monkeypatch.setattr(settings, "JWT_KEYS_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "JWT_ACTIVE_KEY_ID", "2026-01")
+    get_signing_keys.cache_clear()
+    yield tmp_path
+    get_signing_keys.cache_clear()
+
+
+def test_rs256_tokens_verify_across_key_rotation(rs256_keys, monkeypatch):
+    old_token = create_access_token("42")
+    assert decode_access_token(old_token)["sub"] == "42"
+
+    _write_key(rs256_keys, "2026-02")
+    monkeypatch.setattr(settings, "JWT_ACTIVE_KEY_ID", "2026-02")
+    get_signing_keys.cache_clear()
+
+    new_token = create_access_token("43")
+    assert decode_access_token(new_token)["sub"] == "43"
+    assert decode_access_token(old_token)["sub"] == "42"
+
+    (rs256_keys / "2026-01.pem").unlink()
+    get_signing_keys.cache_clear()
+    with pytest.raises(JWTError):
+        decode_access_token(old_token)
+
+
+def test_jwks_publishes_public_keys_only(client, rs256_keys):
+    res = client.get("/.well-known/jwks.json")
+    assert res.status_code == 200
+
+    keys = res.json()["keys"]
+    assert [k["kid"] for k in keys] == ["2026-01"]
+    assert keys[0]["kty"] == "RSA"
+    assert keys[0]["use"] == "sig"
+    assert "d" not in keys[0]
+
+
+def test_rs256_tokens_authenticate_requests(client, rs256_keys, register_user, login_user):
+    assert register_user("rs256@example.com").status_code == 201
+    token = login_user("rs256@example.com")
+
+    res = client.post(
+        "/api/v1/teams",
+        json={"name": "Signed"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 201
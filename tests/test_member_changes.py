@@ -0,0 +1,118 @@
+# Tests for the membership change feed and long-poll wake-ups.
+
+import asyncio
+import threading
+
+from sqlalchemy import event
+
+from app.core.enums import Role
+from app.db.session import engine
+from app.schemas.team import TeamMemberAdd
+from app.services import team_service
+from app.services.change_notifier import ChangeNotifier
+
+
+def test_change_feed_returns_deltas_since_cursor(
+    client, register_user, login_user, auth_header, create_team
+):
+    assert register_user("feed-admin@example.com").status_code == 201
+    assert register_user("feed-member@example.com").status_code == 201
+    token = login_user("feed-admin@example.com")
+    team_id = create_team(token, "Feed Team").json()["id"]
+
+    first = client.get(f"/api/v1/teams/{team_id}/members/changes", headers=auth_header(token))
+    assert first.status_code == 200
+    body = first.json()
+    assert [e["event"] for e in body["events"]] == ["added"]
+    assert body["events"][0]["role"] == "admin"
+    cursor = body["cursor"]
+
+    user_id = client.post(
+        f"/api/v1/teams/{team_id}/members",
+        json={"email": "feed-member@example.com", "role": "viewer"},
+        headers=auth_header(token),
+    ).json()["user_id"]
+    client.patch(
+        f"/api/v1/teams/{team_id}/members/{user_id}",
+        json={"role": "member"},
+        headers=auth_header(token),
+    )
+    client.delete(f"/api/v1/teams/{team_id}/members/{user_id}", headers=auth_header(token))
+
+    delta = client.get(
+        f"/api/v1/teams/{team_id}/members/changes",
+        params={"since": cursor, "limit": 2},
+        headers=auth_header(token),
+    ).json()
+    assert [(e["event"], e["role"]) for e in delta["events"]] == [("added", "viewer"), ("role_changed", "member")]
+    assert all(e["user_id"] == user_id for e in delta["events"])
+    assert delta["has_more"] is True
+
+    rest = client.get(
+        f"/api/v1/teams/{team_id}/members/changes",
+        params={"since": delta["cursor"]},
+        headers=auth_header(token),
+    ).json()
+    assert [(e["event"], e["role"]) for e in rest["events"]] == [("removed", "member")]
+    assert rest["has_more"] is False
+
+
+def test_long_poll_times_out_with_unchanged_cursor(
+    client, register_user, login_user, auth_header, create_team
+):
+    assert register_user("feed-poll@example.com").status_code == 201
+    token = login_user("feed-poll@example.com")
+    team_id = create_team(token, "Poll Team").json()["id"]
+
+    cursor = client.get(f"/api/v1/teams/{team_id}/members/changes", headers=auth_header(token)).json()["cursor"]
+    res = client.get(
+        f"/api/v1/teams/{team_id}/members/changes",
+        params={"since": cursor, "wait": 0.2},
+        headers=auth_header(token),
+    )
+    assert res.status_code == 200
+    assert res.json() == {"events": [], "cursor": cursor, "has_more": False}
+
+
+def test_notifier_wakes_waiter_from_another_thread():
+    notifier = ChangeNotifier()
+
+    async def scenario():
+        waiter = asyncio.create_task(notifier.wait(7, timeout=5))
+        await asyncio.sleep(0.05)
+        threading.Thread(target=notifier.notify, args=(7,)).start()
+        return await waiter
+
+    assert asyncio.run(scenario()) is True
+
+
+def test_membership_writes_lock_the_team_before_recording_events(
+    db_session, register_user, login_user, create_team
+):
+    assert register_user("order-admin@example.com").status_code == 201
+    assert register_user("order-a@example.com").status_code == 201
+    assert register_user("order-b@example.com").status_code == 201
+    team_id = create_team(login_user("order-admin@example.com"), "Ordered").json()["id"]
+
+    def writes(change):
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            words = statement.split(None, 3)[:3]
+            if words[0] in ("INSERT", "UPDATE"):
+                statements.append(" ".join(words))
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            change()
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        return statements
+
+    # Event ids must follow the order writers take the team row lock in.
+    for change in (
+        lambda: team_service.add_members_bulk(db_session, team_id, [("order-a@example.com", Role.viewer)]),
+        lambda: team_service.add_member(db_session, team_id, TeamMemberAdd(email="order-b@example.com", role=Role.viewer)),
+    ):
+        statements = writes(change)
+        assert statements.index("UPDATE teams SET") < statements.index("INSERT INTO team_membership_events")
@@ -0,0 +1,65 @@
+# Tests for sparse fieldsets (?fields=) and embedded users (?include=user) on member listings.
+
+import pytest
+from sqlalchemy import event
+
+from app.db.session import engine
+from app.services.membership_index import membership_index
+
+
+@pytest.fixture
+def team_with_members(client, register_user, login_user, auth_header, create_team):
+    for email in ("fields-admin@example.com", "fields-a@example.com"):
+        assert register_user(email).status_code == 201
+    token = login_user("fields-admin@example.com")
+    team_id = create_team(token, "Fields").json()["id"]
+    client.post(f"/api/v1/teams/{team_id}/members", json={"email": "fields-a@example.com", "role": "viewer"}, headers=auth_header(token))
+    return team_id, auth_header(token)
+
+
+def test_default_listing_is_unchanged(client, team_with_members):
+    team_id, headers = team_with_members
+    members = client.get(f"/api/v1/teams/{team_id}/members", headers=headers).json()
+    assert [set(m) for m in members] == [{"user_id", "role", "joined_at"}] * 2
+
+
+def test_include_user_embeds_emails_with_one_query(client, team_with_members):
+    team_id, headers = team_with_members
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if "FROM team_memberships" in statement:
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        res = client.get(f"/api/v1/teams/{team_id}/members", params={"include": "user", "fields": "role,user"}, headers=headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert res.status_code == 200
+    assert [m["user"]["email"] for m in res.json()] == ["fields-admin@example.com", "fields-a@example.com"]
+    assert [set(m) for m in res.json()] == [{"role", "user"}] * 2
+    listing = [s for s in statements if "JOIN users" in s]
+    assert len(listing) == 1
+    assert "joined_at," not in listing[0].split("FROM")[0]
+
+
+@pytest.mark.parametrize("index_ready", [False, True])
+def test_fields_selects_only_requested_columns(client, db_session, team_with_members, index_ready):
+    team_id, headers = team_with_members
+    if index_ready:
+        membership_index.build(db_session)
+    try:
+        res = client.get(f"/api/v1/teams/{team_id}/members", params={"fields": "user_id"}, headers=headers)
+    finally:
+        membership_index.stop()
+    assert res.status_code == 200
+    assert all(set(m) == {"user_id"} for m in res.json())
+    assert len(res.json()) == 2
+
+
+@pytest.mark.parametrize("params", [{"fields": "email"}, {"fields": "user"}, {"include": "teams"}, {"fields": ","}])
+def test_unknown_fields_or_includes_are_rejected(client, team_with_members, params):
+    team_id, headers = team_with_members
+    assert client.get(f"/api/v1/teams/{team_id}/members", params=params, headers=headers).status_code == 422
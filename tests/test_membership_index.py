@@ -0,0 +1,199 @@
+# Tests for the in-process membership index and the RBAC path that reads from it.
+
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import update
+
+from app.core.enums import Role
+from app.models.membership import Membership
+from app.models.team import Team
+from app.services.membership_index import MembershipIndex, _TeamEntry, membership_index
+
+
+@pytest.fixture
+def live_index():
+    yield membership_index
+    membership_index.stop()
+
+
+def test_build_answers_lookups_and_listing(
+    client, db_session, register_user, login_user, auth_header, create_team
+):
+    assert register_user("idx-admin@example.com").status_code == 201
+    assert register_user("idx-viewer@example.com").status_code == 201
+    token = login_user("idx-admin@example.com")
+
+    team_id = create_team(token, "Indexed").json()["id"]
+    viewer = client.post(
+        f"/api/v1/teams/{team_id}/members",
+        json={"email": "idx-viewer@example.com", "role": "viewer"},
+        headers=auth_header(token),
+    ).json()
+
+    index = MembershipIndex()
+    index.build(db_session)
+
+    membership = index.get(team_id, viewer["user_id"])
+    assert membership is not None
+    assert membership.role == Role.viewer
+    assert index.get(team_id, 10_000_000) is None
+
+    members = index.members(team_id)
+    assert [m.role for m in members] == [Role.admin, Role.viewer]
+    assert index.teams_for_user(viewer["user_id"]) == [team_id]
+
+    usage = index.memory_usage()
+    assert usage["memberships"] == 2
+    assert usage["bytes_per_million_memberships"] > 0
+
+
+def test_incremental_upsert_and_remove(db_session):
+    index = MembershipIndex()
+    index.build(db_session)
+    now = datetime.now(timezone.utc)
+
+    index.upsert(1, 30, Role.member, now)
+    index.upsert(1, 10, Role.viewer, now)
+    index.upsert(2, 10, Role.admin, now)
+    assert index.get(1, 10).role == Role.viewer
+    assert index.teams_for_user(10) == [1, 2]
+
+    index.upsert(1, 10, Role.admin, now)
+    assert index.get(1, 10).role == Role.admin
+
+    index.remove(1, 10)
+    assert index.get(1, 10) is None
+    assert index.teams_for_user(10) == [2]
+    assert [m.user_id for m in index.members(1)] == [30]
+
+
+def test_batches_copy_each_team_entry_once(monkeypatch):
+    index = MembershipIndex()
+    index.ready = True
+    now = datetime.now(timezone.utc)
+    index.upsert(1, 1, Role.admin, now)
+
+    copies = []
+    copy = _TeamEntry.copy
+    monkeypatch.setattr(_TeamEntry, "copy", lambda entry: copies.append(1) or copy(entry))
+
+    index.upsert_many(1, [(user_id, Role.member, now) for user_id in range(1000, 1, -1)])
+    assert len(copies) == 1
+    assert list(index._teams[1].user_ids) == list(range(1, 1001))
+    assert index.teams_for_user(500) == [1]
+
+    index.remove_many(1, range(2, 1001))
+    assert len(copies) == 2
+    assert [m.user_id for m in index.members(1)] == [1]
+    assert index.teams_for_user(500) == []
+
+
+def test_rbac_reads_from_index_and_tracks_mutations(
+    client, db_session, live_index, register_user, login_user, auth_header, create_team
+):
+    assert register_user("live-admin@example.com").status_code == 201
+    assert register_user("live-member@example.com").status_code == 201
+    admin_token = login_user("live-admin@example.com")
+    member_token = login_user("live-member@example.com")
+
+    team_id = create_team(admin_token, "Live").json()["id"]
+    live_index.build(db_session)
+
+    add_res = client.post(
+        f"/api/v1/teams/{team_id}/members",
+        json={"email": "live-member@example.com", "role": "member"},
+        headers=auth_header(admin_token),
+    )
+    assert add_res.status_code == 201
+    user_id = add_res.json()["user_id"]
+    assert live_index.get(team_id, user_id).role == Role.member
+
+    members_res = client.get(f"/api/v1/teams/{team_id}/members", headers=auth_header(member_token))
+    assert members_res.status_code == 200
+    assert len(members_res.json()) == 2
+
+    client.delete(f"/api/v1/teams/{team_id}/members/{user_id}", headers=auth_header(admin_token))
+    assert live_index.get(team_id, user_id) is None
+
+    read_res = client.get(f"/api/v1/teams/{team_id}", headers=auth_header(member_token))
+    assert read_res.status_code == 403
+
+
+def test_refresh_applies_changes_made_elsewhere(
+    client, db_session, register_user, login_user, auth_header, create_team
+):
+    assert register_user("elsewhere-admin@example.com").status_code == 201
+    assert register_user("elsewhere-a@example.com").status_code == 201
+    assert register_user("elsewhere-b@example.com").status_code == 201
+    token = login_user("elsewhere-admin@example.com")
+    team_id = create_team(token, "Elsewhere").json()["id"]
+    ids = {}
+    for email in ("elsewhere-a@example.com", "elsewhere-b@example.com"):
+        ids[email] = client.post(
+            f"/api/v1/teams/{team_id}/members", json={"email": email, "role": "member"}, headers=auth_header(token)
+        ).json()["user_id"]
+
+    # Stands in for another worker's index: the requests below never touch it.
+    index = MembershipIndex()
+    index.build(db_session)
+    a, b = ids["elsewhere-a@example.com"], ids["elsewhere-b@example.com"]
+    assert index.get(team_id, a).role == Role.member
+
+    client.delete(f"/api/v1/teams/{team_id}/members/{a}", headers=auth_header(token))
+    client.patch(f"/api/v1/teams/{team_id}/members/{b}", json={"role": "viewer"}, headers=auth_header(token))
+    assert index.get(team_id, a) is not None
+
+    assert index.refresh(db_session) >= 2
+    assert index.get(team_id, a) is None
+    assert index.get(team_id, b).role == Role.viewer
+
+
+def test_writes_are_authorized_against_the_database(
+    client, db_session, live_index, register_user, login_user, auth_header, create_team
+):
+    assert register_user("stale-admin@example.com").status_code == 201
+    assert register_user("stale-target@example.com").status_code == 201
+    token = login_user("stale-admin@example.com")
+    team_id = create_team(token, "Stale").json()["id"]
+    live_index.build(db_session)
+
+    # Demoted by another worker: this process's index still says admin.
+    user_id = live_index.members(team_id)[0].user_id
+    db_session.query(Membership).filter_by(team_id=team_id, user_id=user_id).update({"role": Role.viewer})
+    db_session.commit()
+    assert live_index.get(team_id, user_id).role == Role.admin
+
+    assert client.get(f"/api/v1/teams/{team_id}", headers=auth_header(token)).status_code == 200
+    add_res = client.post(
+        f"/api/v1/teams/{team_id}/members",
+        json={"email": "stale-target@example.com", "role": "member"},
+        headers=auth_header(token),
+    )
+    assert add_res.status_code == 403
+
+
+def test_member_listing_matches_its_etag_when_the_index_lags(
+    client, db_session, live_index, register_user, login_user, auth_header, create_team
+):
+    assert register_user("lag-admin@example.com").status_code == 201
+    other = register_user("lag-other@example.com").json()
+    token = login_user("lag-admin@example.com")
+    team_id = create_team(token, "Lagging").json()["id"]
+    live_index.build(db_session)
+    first = client.get(f"/api/v1/teams/{team_id}/members", headers=auth_header(token))
+
+    # Added by another worker: the version moves, this process's index doesn't.
+    db_session.add(Membership(team_id=team_id, user_id=other["id"], role=Role.viewer))
+    db_session.execute(update(Team).where(Team.id == team_id).values(version=Team.version + 1))
+    db_session.commit()
+    assert len(live_index.members(team_id)) == 1
+
+    res = client.get(
+        f"/api/v1/teams/{team_id}/members",
+        headers={**auth_header(token), "If-None-Match": first.headers["ETag"]},
+    )
+    assert res.status_code == 200
+    assert res.headers["ETag"] != first.headers["ETag"]
+    assert {m["user_id"] for m in res.json()} >= {other["id"]}
+    assert len(res.json()) == 2
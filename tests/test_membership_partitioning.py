@@ -0,0 +1,104 @@
+# Tests for hash partitioning of team_memberships: Postgres DDL, the team_id index, and team-scoped queries.
+
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import inspect, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateTable
+
+from app.db import membership_partitioning
+from app.db.membership_partitioning import MEMBERSHIP_PARTITIONS, partition_ddl
+from app.db.session import engine
+from app.models.membership import Membership
+from app.models.team import Team
+from app.models.user import User
+
+
+def test_postgres_ddl_is_hash_partitioned_by_team_id():
+    ddl = str(CreateTable(Membership.__table__).compile(dialect=postgresql.dialect()))
+    assert "PARTITION BY HASH (team_id)" in ddl
+    assert "PRIMARY KEY (user_id, team_id)" in ddl
+
+    statements = partition_ddl("team_memberships")
+    assert len(statements) == MEMBERSHIP_PARTITIONS
+    assert statements[0] == (
+        "CREATE TABLE team_memberships_00 PARTITION OF team_memberships "
+        f"FOR VALUES WITH (MODULUS {MEMBERSHIP_PARTITIONS}, REMAINDER 0)"
+    )
+    assert statements[-1].endswith(f"REMAINDER {MEMBERSHIP_PARTITIONS - 1})")
+
+
+def test_swap_renames_shadow_table_and_partitions():
+    statements = membership_partitioning.swap_ddl()
+    assert statements[0] == "LOCK TABLE team_memberships IN ACCESS EXCLUSIVE MODE"
+    assert "ALTER TABLE team_memberships RENAME TO team_memberships_unpartitioned" in statements
+    assert "ALTER TABLE team_memberships_p RENAME TO team_memberships" in statements
+    assert statements.index("ALTER TABLE team_memberships RENAME TO team_memberships_unpartitioned") < (
+        statements.index("ALTER TABLE team_memberships_p RENAME TO team_memberships")
+    )
+    assert f"ALTER TABLE team_memberships_p_{MEMBERSHIP_PARTITIONS - 1:02d} RENAME TO team_memberships_{MEMBERSHIP_PARTITIONS - 1:02d}" in statements
+
+
+def test_team_scoped_listing_uses_team_id_index(db_session):
+    # Other backends have no partitions; the (team_id, joined_at) index serves the same queries.
+    indexes = {ix["name"]: ix["column_names"] for ix in inspect(engine).get_indexes("team_memberships")}
+    assert indexes["ix_team_memberships_team_id_joined_at"] == ["team_id", "joined_at"]
+
+    if engine.dialect.name == "sqlite":
+        query = select(Membership).where(Membership.team_id == 1).order_by(Membership.joined_at)
+        compiled = query.compile(engine, compile_kwargs={"literal_binds": True})
+        plan = " ".join(row[-1] for row in db_session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+        assert "ix_team_memberships_team_id_joined_at" in plan
+
+
+@pytest.mark.skipif(engine.dialect.name != "postgresql", reason="partitioning is Postgres-only")
+def test_backfill_with_writes_in_between_verifies_and_swaps(db_session):
+    users = [User(email=f"partition-{i}@example.com", hashed_password=b"x") for i in range(5)]
+    team = Team(name="Partitioned")
+    db_session.add_all([*users, team])
+    db_session.flush()
+    connection = db_session.connection()
+
+    # Start from the layout before migration 4b7f2c9d1e86; the test transaction is rolled back.
+    connection.exec_driver_sql("DROP TABLE team_memberships CASCADE")
+    connection.exec_driver_sql("""
+        CREATE TABLE team_memberships (
+            user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+            team_id INTEGER NOT NULL REFERENCES teams (id) ON DELETE CASCADE,
+            role VARCHAR(16) NOT NULL,
+            joined_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+            CONSTRAINT team_memberships_pkey PRIMARY KEY (user_id, team_id)
+        )
+    """)
+    add = text("INSERT INTO team_memberships (user_id, team_id, role) VALUES (:user_id, :team_id, 'viewer')")
+    connection.execute(add, [{"user_id": user.id, "team_id": team.id} for user in users[:4]])
+    for statement in membership_partitioning.shadow_ddl():
+        connection.exec_driver_sql(statement)
+
+    assert membership_partitioning.backfill(connection, batch_size=2, max_batches=1, commit=False) == 2
+    # Writes while the backfill is paused: behind its cursor, ahead of it, and a new row.
+    connection.execute(
+        text("UPDATE team_memberships SET role = 'admin', joined_at = joined_at - interval '1 day' WHERE user_id = :id"),
+        {"id": users[0].id},
+    )
+    connection.execute(text("DELETE FROM team_memberships WHERE user_id = :id"), {"id": users[3].id})
+    connection.execute(add, {"user_id": users[4].id, "team_id": team.id})
+    membership_partitioning.backfill(connection, batch_size=2, commit=False)
+    connection.exec_driver_sql(membership_partitioning.finish_backfill_sql())
+
+    result = membership_partitioning.verify(connection)
+    assert (result["source_rows"], result["missing"], result["extra"]) == (4, 0, 0)
+
+    # A copy that only differs in joined_at is reported too.
+    drift = text("UPDATE team_memberships_p SET joined_at = joined_at + :delta WHERE user_id = :id")
+    connection.execute(drift, {"delta": timedelta(seconds=1), "id": users[1].id})
+    result = membership_partitioning.verify(connection)
+    assert (result["missing"], result["extra"]) == (1, 1)
+    connection.execute(drift, {"delta": timedelta(seconds=-1), "id": users[1].id})
+
+    for statement in membership_partitioning.swap_ddl():
+        connection.exec_driver_sql(statement)
+    assert connection.execute(text("SELECT relkind FROM pg_class WHERE relname = 'team_memberships'")).scalar() == "p"
+    rows = dict(connection.execute(text("SELECT user_id, role FROM team_memberships")).all())
+    assert rows == {users[0].id: "admin", users[1].id: "viewer", users[2].id: "viewer", users[4].id: "viewer"}
@@ -0,0 +1,82 @@
+# Tests for request latency, auth failure and password hashing metrics.
+
+import logging
+import queue
+
+from fastapi.testclient import TestClient
+
+from app.core import metrics
+from app.core.log_config import _DeferredQueueHandler
+from app.main import app
+
+
+def _sample(name, **labels):
+    return metrics.REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_middleware_records_latency_by_route_template(client, monkeypatch):
+    monkeypatch.setattr(metrics, "enabled", True)
+    labels = {"method": "GET", "route": "/api/v1/teams/{team_id}", "status": "4xx"}
+    before = _sample("http_request_duration_seconds_count", **labels)
+    unmatched_before = _sample(
+        "http_request_duration_seconds_count", method="GET", route="unmatched", status="4xx"
+    )
+
+    with TestClient(metrics.MetricsMiddleware(app)) as metered:
+        assert metered.get("/api/v1/teams/1").status_code == 404
+        assert metered.get("/api/v1/teams/2").status_code == 404
+        assert metered.get("/no-such-path").status_code == 404
+
+    assert _sample("http_request_duration_seconds_count", **labels) == before + 2
+    assert _sample(
+        "http_request_duration_seconds_count", method="GET", route="unmatched", status="4xx"
+    ) == unmatched_before + 1
+    assert _sample("http_requests_in_flight") == 0
+
+
+def test_auth_failures_and_bcrypt_timings_are_counted(
+    client, monkeypatch, register_user, login_user, auth_header, create_team
+):
+    monkeypatch.setattr(metrics, "enabled", True)
+    missing = _sample("auth_failures_total", status="401", reason="missing_token")
+    invalid = _sample("auth_failures_total", status="401", reason="invalid_token")
+    not_member = _sample("auth_failures_total", status="403", reason="not_member")
+    hashes = _sample("password_hash_seconds_count", operation="hash")
+
+    assert register_user("metered-owner@example.com").status_code == 201
+    assert register_user("metered-outsider@example.com").status_code == 201
+    team_id = create_team(login_user("metered-owner@example.com"), "Metered").json()["id"]
+    outsider = login_user("metered-outsider@example.com")
+
+    client.get(f"/api/v1/teams/{team_id}")
+    client.get(f"/api/v1/teams/{team_id}", headers=auth_header("garbage"))
+    client.get(f"/api/v1/teams/{team_id}", headers=auth_header(outsider))
+
+    assert _sample("auth_failures_total", status="401", reason="missing_token") == missing + 1
+    assert _sample("auth_failures_total", status="401", reason="invalid_token") == invalid + 1
+    assert _sample("auth_failures_total", status="403", reason="not_member") == not_member + 1
+    assert _sample("password_hash_seconds_count", operation="hash") == hashes + 2
+    assert _sample("password_hash_seconds_count", operation="verify") >= 2
+
+
+def test_nothing_is_recorded_when_disabled(client, monkeypatch):
+    monkeypatch.setattr(metrics, "enabled", False)
+    before = _sample("auth_failures_total", status="401", reason="missing_token")
+
+    assert client.post("/api/v1/teams", json={"name": "Unmetered"}).status_code == 401
+
+    assert _sample("auth_failures_total", status="401", reason="missing_token") == before
+    body, content_type = metrics.render_metrics()
+    assert content_type.startswith("text/plain")
+    assert b"http_request_duration_seconds" in body
+
+
+def test_dropped_log_records_are_counted(monkeypatch):
+    monkeypatch.setattr(metrics, "enabled", True)
+    before = _sample("log_records_dropped_total", level="WARNING")
+
+    handler = _DeferredQueueHandler(queue.Queue(maxsize=1))
+    for _ in range(3):
+        handler.handle(logging.LogRecord("test", logging.WARNING, __file__, 1, "busy", None, None))
+
+    assert _sample("log_records_dropped_total", level="WARNING") == before + 2
@@ -0,0 +1,70 @@
+# Tests for team search and user email-prefix search: scoping, escaping and keyset pagination.
+
+
+def test_team_search_is_scoped_to_visible_teams_and_paginates(
+    client, register_user, login_user, auth_header, create_team
+):
+    assert register_user("search-owner@example.com").status_code == 201
+    assert register_user("search-other@example.com").status_code == 201
+    token = login_user("search-owner@example.com")
+    other = login_user("search-other@example.com")
+
+    root_id = create_team(token, "Platform Root").json()["id"]
+    client.post("/api/v1/teams", json={"name": "Platform Child", "parent_id": root_id}, headers=auth_header(token))
+    create_team(token, "Platform Ops")
+    create_team(token, "Marketing")
+    create_team(other, "Platform Secret")
+
+    first = client.get("/api/v1/teams/search", params={"q": "platform", "limit": 2}, headers=auth_header(token))
+    assert first.status_code == 200
+    body = first.json()
+    assert [t["name"] for t in body["items"]] == ["Platform Child", "Platform Ops"]
+    assert body["next_cursor"]
+
+    rest = client.get(
+        "/api/v1/teams/search",
+        params={"q": "platform", "limit": 2, "cursor": body["next_cursor"]},
+        headers=auth_header(token),
+    ).json()
+    assert [t["name"] for t in rest["items"]] == ["Platform Root"]
+    assert rest["next_cursor"] is None
+
+
+def test_team_search_treats_wildcards_literally_and_validates_input(
+    client, register_user, login_user, auth_header, create_team
+):
+    assert register_user("search-wild@example.com").status_code == 201
+    token = login_user("search-wild@example.com")
+    create_team(token, "100% Uptime")
+    create_team(token, "1000 Uptime")
+
+    res = client.get("/api/v1/teams/search", params={"q": "00%"}, headers=auth_header(token))
+    assert [t["name"] for t in res.json()["items"]] == ["100% Uptime"]
+
+    assert client.get("/api/v1/teams/search", params={"q": "ab"}, headers=auth_header(token)).status_code == 422
+    bad_cursor = client.get("/api/v1/teams/search", params={"q": "uptime", "cursor": "nope"}, headers=auth_header(token))
+    assert bad_cursor.status_code == 400
+
+
+def test_user_search_requires_add_permission_and_skips_members(
+    client, register_user, login_user, auth_header, create_team
+):
+    for email in ("dir-admin@example.com", "dir-alice@example.com", "dir-alan@example.com", "dir-bob@example.com"):
+        assert register_user(email).status_code == 201
+    token = login_user("dir-admin@example.com")
+    team_id = create_team(token, "Directory").json()["id"]
+    client.post(f"/api/v1/teams/{team_id}/members", json={"email": "dir-bob@example.com", "role": "viewer"}, headers=auth_header(token))
+
+    res = client.get("/api/v1/users/search", params={"team_id": team_id, "email": "DIR-", "limit": 1}, headers=auth_header(token))
+    assert res.status_code == 200
+    assert [u["email"] for u in res.json()["items"]] == ["dir-alan@example.com"]
+    rest = client.get(
+        "/api/v1/users/search",
+        params={"team_id": team_id, "email": "dir-", "limit": 1, "cursor": res.json()["next_cursor"]},
+        headers=auth_header(token),
+    ).json()
+    assert [u["email"] for u in rest["items"]] == ["dir-alice@example.com"]
+    assert rest["next_cursor"] is None
+
+    viewer = login_user("dir-bob@example.com")
+    assert client.get("/api/v1/users/search", params={"team_id": team_id, "email": "dir-"}, headers=auth_header(viewer)).status_code == 403
@@ -0,0 +1,64 @@
+# Tests for the production launcher's worker/pool sizing and the readiness drain.
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from app.cli.serve import available_cpus, plan
+from app.core.readiness import readiness
+
+
+def test_plan_keeps_total_connections_within_budget():
+    sizing = plan(cpus=8, budget=40, pool_size=5, max_overflow=10)
+    assert sizing == {"workers": 8, "pool_size": 5, "max_overflow": 0}
+    assert sizing["workers"] * (sizing["pool_size"] + sizing["max_overflow"]) <= 40
+
+    # A small budget caps the worker count rather than starving every worker.
+    sizing = plan(cpus=16, budget=10, pool_size=5, max_overflow=10)
+    assert sizing == {"workers": 5, "pool_size": 2, "max_overflow": 0}
+
+    # WEB_CONCURRENCY overrides the CPU count; no budget leaves the pool as configured.
+    assert plan(cpus=2, budget=None, web_concurrency=3) == {"workers": 3, "pool_size": 5, "max_overflow": 10}
+
+    with pytest.raises(ValueError, match="connection_budget_exhausted"):
+        plan(cpus=4, budget=1)
+
+
+def test_available_cpus_honours_cgroup_quota(tmp_path):
+    (tmp_path / "cpu.max").write_text("150000 100000\n")
+    assert available_cpus(str(tmp_path)) == min(2, available_cpus(str(tmp_path / "none")))
+
+    (tmp_path / "cpu.max").write_text("max 100000\n")
+    assert available_cpus(str(tmp_path)) == available_cpus(str(tmp_path / "none"))
+
+
+def test_ready_fails_while_draining(client, monkeypatch):
+    monkeypatch.setattr(readiness, "draining", True)
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["reasons"] == ["draining"]
+
+    # Liveness is unaffected: the process is still serving requests.
+    assert client.get("/health/live").status_code == 200
+
+
+def test_serve_turns_on_multiprocess_metrics_before_they_are_created(tmp_path):
+    # A fresh interpreter: this one imported app.core.metrics long ago. Logs go to stdout.
+    script = (
+        "from app.cli import serve\n"
+        "def report(self):\n"
+        "    from app.core import metrics\n"
+        "    print(f'multiprocess={metrics._multiprocess}', file=__import__('sys').stderr)\n"
+        "serve.Supervisor.run = report\n"
+        "serve.serve('127.0.0.1', 0, workers=2)\n"
+    )
+    env = {key: value for key, value in os.environ.items() if key != "PROMETHEUS_MULTIPROC_DIR"}
+    env.update(DATABASE_URL=f"sqlite:///{tmp_path / 'serve.db'}", METRICS_ENABLED="true")
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=Path(__file__).resolve().parents[1], env=env, capture_output=True, text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    assert "multiprocess=True" in result.stderr.splitlines()
@@ -0,0 +1,241 @@
+# Tests for single-flight coalescing of concurrent identical reads.
+
+import asyncio
+import threading
+import time
+
+import pytest
+from sqlalchemy import event
+
+from app.core.deadline import DeadlineExceeded
+from app.core.request_context import RequestContext, bind_request_context, reset_request_context
+from app.core.singleflight import SingleFlight
+from app.db.session import SessionLocal, engine
+from app.services import team_service
+
+
+def _run_concurrently(target, n):
+    results = []
+    barrier = threading.Barrier(n)
+
+    def worker():
+        barrier.wait()
+        results.append(target())
+
+    threads = [threading.Thread(target=worker) for _ in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_threads_share_calls():
+    flight = SingleFlight("test")
+    calls = []
+
+    def load():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"value": 42}
+
+    results = _run_concurrently(lambda: flight.do("k", load), 5)
+    # At most the first caller's call and the one the rest queued behind it.
+    assert len(calls) <= 2
+    assert results == [{"value": 42}] * 5
+
+    # Nothing is cached once the call completes.
+    before = len(calls)
+    flight.do("k", load)
+    assert len(calls) == before + 1
+
+
+def test_leader_error_is_raised_in_every_waiter():
+    flight = SingleFlight("test")
+
+    def boom():
+        time.sleep(0.05)
+        raise RuntimeError("db down")
+
+    errors = []
+
+    def call():
+        try:
+            flight.do("k", boom)
+        except RuntimeError as exc:
+            errors.append(exc)
+
+    _run_concurrently(call, 3)
+    assert len(errors) == 3
+
+
+def _with_deadline(seconds, target):
+    ctx = RequestContext("r1")
+    ctx.requested_timeout = seconds
+    token = bind_request_context(ctx)
+    try:
+        return target()
+    finally:
+        reset_request_context(token)
+
+
+def _start(target):
+    thread = threading.Thread(target=target)
+    thread.start()
+    return thread
+
+
+def test_callers_only_join_calls_that_start_after_them():
+    flight = SingleFlight("test")
+    running, release = threading.Event(), threading.Event()
+    calls = []
+
+    def load():
+        calls.append(1)
+        if len(calls) == 1:
+            running.set()
+            release.wait(5)
+            return "before the write"
+        return "after the write"
+
+    first = _start(lambda: flight.do("k", load))
+    assert running.wait(5)
+    # Committed while the first call was already running: a later read must see it.
+    later = []
+    readers = [_start(lambda: later.append(flight.do("k", load))) for _ in range(3)]
+    time.sleep(0.05)
+    release.set()
+    first.join(5)
+    for reader in readers:
+        reader.join(5)
+    assert later == ["after the write"] * 3
+    assert len(calls) == 2
+
+
+def test_follower_waits_no_longer_than_its_own_deadline():
+    flight = SingleFlight("test")
+    running, release = threading.Event(), threading.Event()
+
+    def slow():
+        running.set()
+        release.wait(5)
+        return "late"
+
+    threads = [_start(lambda: flight.do("k", slow))]
+    assert running.wait(5)
+    # Queued behind the running call; the next caller joins this one.
+    threads.append(_start(lambda: flight.do("k", slow)))
+    time.sleep(0.05)
+    started = time.perf_counter()
+    with pytest.raises(DeadlineExceeded):
+        _with_deadline(0.1, lambda: flight.do("k", slow))
+    assert time.perf_counter() - started < 1
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+
+def test_follower_runs_the_call_when_the_leader_ran_out_of_time():
+    flight = SingleFlight("test")
+    running, release = threading.Event(), threading.Event()
+    calls = []
+
+    def load():
+        calls.append(1)
+        if len(calls) == 1:
+            running.set()
+            release.wait(5)
+            return "stale"
+        if len(calls) == 2:
+            raise DeadlineExceeded()
+        return "fresh"
+
+    threads = [_start(lambda: flight.do("k", load))]
+    assert running.wait(5)
+    threads.append(_start(lambda: pytest.raises(DeadlineExceeded, flight.do, "k", load)))
+    time.sleep(0.05)
+    follower = []
+    threads.append(_start(lambda: follower.append(_with_deadline(5, lambda: flight.do("k", load)))))
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert follower == ["fresh"]
+    assert len(calls) == 3
+
+
+def test_async_waiters_share_one_task_and_survive_cancellation():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def scenario():
+        waiters = [asyncio.ensure_future(flight.do_async("k", load)) for _ in range(4)]
+        await asyncio.sleep(0)
+        waiters[0].cancel()
+        return await asyncio.gather(*waiters[1:])
+
+    assert asyncio.run(scenario()) == ["done"] * 3
+    assert len(calls) == 1
+
+
+@pytest.mark.committed
+def test_concurrent_get_team_runs_at_most_two_queries(client, register_user, login_user, create_team):
+    assert register_user("herd@example.com").status_code == 201
+    team_id = create_team(login_user("herd@example.com"), "Popular").json()["id"]
+    queries = []
+
+    def slow_team_select(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith("SELECT") and "FROM teams" in statement:
+            queries.append(statement)
+            time.sleep(0.1)
+
+    def read():
+        with SessionLocal() as db:
+            team = team_service.get_team(db, team_id)
+            return team.name, team in db
+
+    event.listen(engine, "before_cursor_execute", slow_team_select)
+    try:
+        results = _run_concurrently(read, 4)
+    finally:
+        event.remove(engine, "before_cursor_execute", slow_team_select)
+
+    # The first caller's query may already be running when the others arrive; they
+    # share the one queued behind it.
+    assert len(queries) <= 2
+    assert results == [("Popular", True)] * 4
+
+
+@pytest.mark.parametrize("path", ["", "/members"])
+def test_team_reads_still_return_full_payload(client, register_user, login_user, auth_header, create_team, path):
+    assert register_user("snapshot@example.com").status_code == 201
+    token = login_user("snapshot@example.com")
+    team_id = create_team(token, "Snapshot").json()["id"]
+
+    res = client.get(f"/api/v1/teams/{team_id}{path}", headers=auth_header(token))
+    assert res.status_code == 200
+    if path:
+        assert [m["role"] for m in res.json()] == ["admin"]
+    else:
+        assert res.json()["member_count"] == 1
+
+
+def test_write_routes_look_the_team_up_themselves(
+    client, monkeypatch, register_user, login_user, auth_header, create_team
+):
+    assert register_user("own-read@example.com").status_code == 201
+    token = login_user("own-read@example.com")
+    team_id = create_team(token, "Own Read").json()["id"]
+    shared = []
+    do = team_service._team_reads.do
+    monkeypatch.setattr(team_service._team_reads, "do", lambda key, fn: shared.append(key) or do(key, fn))
+
+    assert client.get(f"/api/v1/teams/{team_id}", headers=auth_header(token)).status_code == 200
+    assert shared == [team_id]
+    assert client.delete(f"/api/v1/teams/{team_id}", headers=auth_header(token)).status_code == 202
+    assert shared == [team_id]
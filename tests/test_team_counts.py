@@ -0,0 +1,70 @@
+# Tests for denormalized member counts on teams and their reconciliation.
+
+from app.models.team import Team
+from app.services import team_service
+
+
+def _counts(res):
+    body = res.json()
+    return body["member_count"], body["role_counts"]
+
+
+def test_counts_follow_membership_mutations(
+    client, register_user, login_user, auth_header, create_team
+):
+    assert register_user("count-admin@example.com").status_code == 201
+    assert register_user("count-viewer@example.com").status_code == 201
+    token = login_user("count-admin@example.com")
+
+    created = create_team(token, "Counted")
+    assert _counts(created) == (1, {"admin": 1, "member": 0, "viewer": 0})
+    team_id = created.json()["id"]
+
+    user_id = client.post(
+        f"/api/v1/teams/{team_id}/members",
+        json={"email": "count-viewer@example.com", "role": "viewer"},
+        headers=auth_header(token),
+    ).json()["user_id"]
+    team_res = client.get(f"/api/v1/teams/{team_id}", headers=auth_header(token))
+    assert _counts(team_res) == (2, {"admin": 1, "member": 0, "viewer": 1})
+
+    client.patch(
+        f"/api/v1/teams/{team_id}/members/{user_id}",
+        json={"role": "admin"},
+        headers=auth_header(token),
+    )
+    team_res = client.get(f"/api/v1/teams/{team_id}", headers=auth_header(token))
+    assert _counts(team_res) == (2, {"admin": 2, "member": 0, "viewer": 0})
+
+    client.delete(f"/api/v1/teams/{team_id}/members/{user_id}", headers=auth_header(token))
+    team_res = client.get(f"/api/v1/teams/{team_id}", headers=auth_header(token))
+    assert _counts(team_res) == (1, {"admin": 1, "member": 0, "viewer": 0})
+
+    # A failed duplicate add must not move the counters.
+    client.post(
+        f"/api/v1/teams/{team_id}/members",
+        json={"email": "count-admin@example.com", "role": "viewer"},
+        headers=auth_header(token),
+    )
+    team_res = client.get(f"/api/v1/teams/{team_id}", headers=auth_header(token))
+    assert _counts(team_res) == (1, {"admin": 1, "member": 0, "viewer": 0})
+
+
+def test_reconcile_repairs_drifted_counts(
+    client, db_session, register_user, login_user, create_team
+):
+    assert register_user("drift@example.com").status_code == 201
+    token = login_user("drift@example.com")
+    drifted_id = create_team(token, "Drifted").json()["id"]
+    create_team(token, "Healthy")
+
+    team = db_session.get(Team, drifted_id)
+    team.member_count = 7
+    team.role_viewer_count = 6
+    db_session.commit()
+
+    assert team_service.reconcile_member_counts(db_session, batch_size=1) == 1
+
+    db_session.refresh(team)
+    assert team.member_count == 1
+    assert team.role_counts == {"admin": 1, "member": 0, "viewer": 0}
@@ -0,0 +1,83 @@
+# Tests for ETag / If-None-Match handling on team and member reads.
+
+def test_team_and_members_return_304_until_membership_changes(
+    client, register_user, login_user, auth_header, create_team
+):
+    assert register_user("etag-admin@example.com").status_code == 201
+    assert register_user("etag-viewer@example.com").status_code == 201
+    token = login_user("etag-admin@example.com")
+    team_id = create_team(token, "ETag Team").json()["id"]
+
+    team_res = client.get(f"/api/v1/teams/{team_id}", headers=auth_header(token))
+    members_res = client.get(f"/api/v1/teams/{team_id}/members", headers=auth_header(token))
+    team_etag = team_res.headers["ETag"]
+    members_etag = members_res.headers["ETag"]
+    assert team_etag != members_etag
+
+    cached = client.get(
+        f"/api/v1/teams/{team_id}/members",
+        headers={**auth_header(token), "If-None-Match": members_etag},
+    )
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["ETag"] == members_etag
+
+    add_res = client.post(
+        f"/api/v1/teams/{team_id}/members",
+        json={"email": "etag-viewer@example.com", "role": "viewer"},
+        headers=auth_header(token),
+    )
+    assert add_res.status_code == 201
+
+    refreshed = client.get(
+        f"/api/v1/teams/{team_id}/members",
+        headers={**auth_header(token), "If-None-Match": members_etag},
+    )
+    assert refreshed.status_code == 200
+    assert len(refreshed.json()) == 2
+    assert refreshed.headers["ETag"] != members_etag
+
+    team_refreshed = client.get(
+        f"/api/v1/teams/{team_id}",
+        headers={**auth_header(token), "If-None-Match": team_etag},
+    )
+    assert team_refreshed.status_code == 200
+
+
+def test_conditional_get_still_requires_membership(
+    client, register_user, login_user, auth_header, create_team
+):
+    assert register_user("etag-owner@example.com").status_code == 201
+    assert register_user("etag-outsider@example.com").status_code == 201
+    owner_token = login_user("etag-owner@example.com")
+    outsider_token = login_user("etag-outsider@example.com")
+    team_id = create_team(owner_token, "Private").json()["id"]
+
+    etag = client.get(f"/api/v1/teams/{team_id}", headers=auth_header(owner_token)).headers["ETag"]
+
+    res = client.get(
+        f"/api/v1/teams/{team_id}",
+        headers={**auth_header(outsider_token), "If-None-Match": etag},
+    )
+    assert res.status_code == 403
+
+
+def test_member_field_selections_get_their_own_etags(
+    client, register_user, login_user, auth_header, create_team
+):
+    assert register_user("etag-fields@example.com").status_code == 201
+    token = login_user("etag-fields@example.com")
+    team_id = create_team(token, "Sparse ETags").json()["id"]
+    url = f"/api/v1/teams/{team_id}/members"
+
+    full = client.get(url, headers=auth_header(token)).headers["ETag"]
+    sparse = client.get(f"{url}?fields=role,user_id", headers=auth_header(token)).headers["ETag"]
+    embedded = client.get(f"{url}?include=user", headers=auth_header(token)).headers["ETag"]
+    assert len({full, sparse, embedded}) == 3
+
+    # Equivalent selections share one; a copy of another selection is not confirmed.
+    reordered = client.get(f"{url}?fields=user_id,%20role", headers=auth_header(token))
+    assert reordered.headers["ETag"] == sparse
+    stale = client.get(f"{url}?fields=role,user_id", headers={**auth_header(token), "If-None-Match": full})
+    assert stale.status_code == 200
+    assert client.get(f"{url}?fields=role", headers={**auth_header(token), "If-None-Match": sparse}).status_code == 200
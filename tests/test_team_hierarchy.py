@@ -0,0 +1,124 @@
+# Tests for parent/child teams, inherited roles, and closure-table maintenance on reparenting.
+
+from app.core.enums import Role
+from app.models.team_closure import TeamClosure
+from app.services.membership_index import MembershipIndex
+
+
+def _add(client, auth_header, token, team_id, email, role):
+    res = client.post(
+        f"/api/v1/teams/{team_id}/members",
+        json={"email": email, "role": role},
+        headers=auth_header(token),
+    )
+    assert res.status_code == 201
+    return res.json()
+
+
+def _create_child(client, auth_header, token, name, parent_id):
+    return client.post(
+        "/api/v1/teams",
+        json={"name": name, "parent_id": parent_id},
+        headers=auth_header(token),
+    )
+
+
+def test_roles_on_parent_are_inherited_by_descendants(
+    client, register_user, login_user, auth_header, create_team
+):
+    for email in ("org-admin@example.com", "org-viewer@example.com", "newcomer@example.com"):
+        assert register_user(email).status_code == 201
+    admin_token = login_user("org-admin@example.com")
+    viewer_token = login_user("org-viewer@example.com")
+
+    org_id = create_team(admin_token, "Org").json()["id"]
+    _add(client, auth_header, admin_token, org_id, "org-viewer@example.com", "viewer")
+
+    dept = _create_child(client, auth_header, admin_token, "Dept", org_id)
+    assert dept.status_code == 201
+    assert dept.json()["parent_id"] == org_id
+    squad_id = _create_child(client, auth_header, admin_token, "Squad", dept.json()["id"]).json()["id"]
+
+    assert client.get(f"/api/v1/teams/{squad_id}", headers=auth_header(viewer_token)).status_code == 200
+    denied = client.post(
+        f"/api/v1/teams/{squad_id}/members",
+        json={"email": "newcomer@example.com", "role": "member"},
+        headers=auth_header(viewer_token),
+    )
+    assert denied.status_code == 403
+
+    # The org admin administers the grandchild without a direct membership.
+    _add(client, auth_header, admin_token, squad_id, "newcomer@example.com", "member")
+
+
+def test_creating_child_requires_admin_on_parent(
+    client, register_user, login_user, auth_header, create_team
+):
+    assert register_user("parent-owner@example.com").status_code == 201
+    assert register_user("parent-viewer@example.com").status_code == 201
+    owner_token = login_user("parent-owner@example.com")
+    viewer_token = login_user("parent-viewer@example.com")
+
+    parent_id = create_team(owner_token, "Parent").json()["id"]
+    _add(client, auth_header, owner_token, parent_id, "parent-viewer@example.com", "viewer")
+
+    res = _create_child(client, auth_header, viewer_token, "Child", parent_id)
+    assert res.status_code == 403
+
+    missing = _create_child(client, auth_header, owner_token, "Orphan", 10_000_000)
+    assert missing.status_code == 404
+
+
+def test_reparenting_updates_inheritance_and_rejects_cycles(
+    client, db_session, register_user, login_user, auth_header, create_team
+):
+    assert register_user("mover@example.com").status_code == 201
+    assert register_user("a-viewer@example.com").status_code == 201
+    token = login_user("mover@example.com")
+    viewer_token = login_user("a-viewer@example.com")
+
+    a_id = create_team(token, "Team A").json()["id"]
+    b_id = create_team(token, "Team B").json()["id"]
+    c_id = _create_child(client, auth_header, token, "Team C", b_id).json()["id"]
+    _add(client, auth_header, token, a_id, "a-viewer@example.com", "viewer")
+
+    assert client.get(f"/api/v1/teams/{c_id}", headers=auth_header(viewer_token)).status_code == 403
+
+    moved = client.put(f"/api/v1/teams/{b_id}/parent", json={"parent_id": a_id}, headers=auth_header(token))
+    assert moved.status_code == 200
+    assert moved.json()["parent_id"] == a_id
+
+    depths = {
+        (row.ancestor_id, row.descendant_id): row.depth
+        for row in db_session.query(TeamClosure).filter(TeamClosure.descendant_id == c_id)
+    }
+    assert depths == {(c_id, c_id): 0, (b_id, c_id): 1, (a_id, c_id): 2}
+    assert client.get(f"/api/v1/teams/{c_id}", headers=auth_header(viewer_token)).status_code == 200
+
+    cycle = client.put(f"/api/v1/teams/{a_id}/parent", json={"parent_id": c_id}, headers=auth_header(token))
+    assert cycle.status_code == 409
+
+    detached = client.put(f"/api/v1/teams/{b_id}/parent", json={"parent_id": None}, headers=auth_header(token))
+    assert detached.status_code == 200
+    assert client.get(f"/api/v1/teams/{c_id}", headers=auth_header(viewer_token)).status_code == 403
+
+
+def test_index_resolves_inherited_roles(
+    client, db_session, register_user, login_user, auth_header, create_team
+):
+    assert register_user("idx-org@example.com").status_code == 201
+    assert register_user("idx-lead@example.com").status_code == 201
+    token = login_user("idx-org@example.com")
+
+    org_id = create_team(token, "Idx Org").json()["id"]
+    child_id = _create_child(client, auth_header, token, "Idx Child", org_id).json()["id"]
+    lead = _add(client, auth_header, token, org_id, "idx-lead@example.com", "viewer")
+    _add(client, auth_header, token, child_id, "idx-lead@example.com", "member")
+
+    index = MembershipIndex()
+    index.build(db_session)
+
+    effective = index.get_effective(child_id, lead["user_id"])
+    assert effective.role == Role.member
+    assert effective.team_id == child_id
+    assert index.get_effective(org_id, lead["user_id"]).role == Role.viewer
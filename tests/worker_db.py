@@ -0,0 +1,35 @@
+# Per-worker test databases for parallel runs (pytest-xdist): a SQLite file or a Postgres database per worker.
+
+import os
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+
+
+def worker_database_url(url: str, worker: str | None) -> str:
+    # PYTEST_XDIST_WORKER is gw0, gw1, ...; a plain `pytest` run keeps DATABASE_URL as is.
+    if not worker:
+        return url
+
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite":
+        if not parsed.database or parsed.database == ":memory:":
+            return url
+        root, ext = os.path.splitext(parsed.database)
+        return parsed.set(database=f"{root}_{worker}{ext}").render_as_string(hide_password=False)
+
+    name = f"{parsed.database}_test_{worker}"
+    _create_database(url, name)
+    return parsed.set(database=name).render_as_string(hide_password=False)
+
+
+def _create_database(url: str, name: str) -> None:
+    # CREATE DATABASE cannot run in a transaction; connect to the configured database to issue it.
+    admin = create_engine(url, isolation_level="AUTOCOMMIT")
+    try:
+        with admin.connect() as connection:
+            exists = connection.execute(text("SELECT 1 FROM pg_database WHERE datname = :name"), {"name": name}).scalar()
+            if not exists:
+                connection.exec_driver_sql(f'CREATE DATABASE "{name}"')
+    finally:
+        admin.dispose()